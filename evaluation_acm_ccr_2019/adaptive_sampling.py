@@ -0,0 +1,247 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import collections
+import heapq
+import logging
+import math
+import statistics
+
+logger = logging.getLogger(__name__)
+
+""" This module decides how many repetitions are sampled for each (number of nodes, probability) combination (cell) of
+    a treewidth study when sampling adaptively.
+
+    Each cell is first sampled min_repetitions times. Afterwards, further repetitions are only sampled for cells whose
+    confidence interval of the mean treewidth (and optionally of the mean runtime) is wider than the configured width.
+    Repetitions are handed out to the cells with the widest confidence intervals (relative to the configured widths)
+    first, until either all cells are sufficiently precise, have been sampled max_repetitions times, or the total budget
+    of repetitions is used up. As the number of repetitions of a cell depends on the results obtained so far, it may
+    vary between executions."""
+
+ADAPTIVE_SAMPLING_PARAMETERS = [
+    "min_repetitions",
+    "max_repetitions",
+    "total_repetitions",
+    "confidence_level",
+    "treewidth_ci_width",
+    "relative_runtime_ci_width",
+]
+
+DEFAULT_MIN_REPETITIONS = 30
+DEFAULT_MAX_REPETITIONS_FACTOR = 10
+DEFAULT_CONFIDENCE_LEVEL = 0.95
+DEFAULT_TREEWIDTH_CI_WIDTH = 0.5
+
+
+class RunningStatistics(object):
+    ''' Mean and variance of a series of values computed by Welford's algorithm. '''
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._sum_of_squared_deviations = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._sum_of_squared_deviations += delta * (value - self.mean)
+
+    def get_standard_deviation(self):
+        if self.count < 2:
+            return None
+        return math.sqrt(self._sum_of_squared_deviations / (self.count - 1))
+
+
+class CellState(object):
+    ''' The sampling state of a single cell. '''
+
+    def __init__(self, num_nodes, probability):
+        self.num_nodes = num_nodes
+        self.probability = probability
+        self.treewidth_statistics = RunningStatistics()
+        self.runtime_statistics = RunningStatistics()
+        self.number_of_completed_repetitions = 0
+        self.number_of_pending_repetitions = 0
+        self.used_repetition_indices = set()
+        self.next_repetition_index = 0
+        self.version = 0
+
+    def get_number_of_dispatched_repetitions(self):
+        return self.number_of_completed_repetitions + self.number_of_pending_repetitions
+
+    def take_repetition_indices(self, count):
+        repetition_indices = []
+        while len(repetition_indices) < count:
+            if self.next_repetition_index not in self.used_repetition_indices:
+                repetition_indices.append(self.next_repetition_index)
+                self.used_repetition_indices.add(self.next_repetition_index)
+            self.next_repetition_index += 1
+        return repetition_indices
+
+
+class AdaptiveSamplingController(object):
+    ''' Hands out chunks of repetitions (see next_chunk) and adapts the number of repetitions per cell to the results
+        reported via add_result.
+    '''
+
+    def __init__(self, cells, chunk_size, min_repetitions=DEFAULT_MIN_REPETITIONS, max_repetitions=None,
+                 total_repetitions=None, confidence_level=DEFAULT_CONFIDENCE_LEVEL,
+                 treewidth_ci_width=DEFAULT_TREEWIDTH_CI_WIDTH, relative_runtime_ci_width=None):
+        if max_repetitions is None:
+            max_repetitions = min_repetitions
+        if not 1 <= min_repetitions <= max_repetitions:
+            raise ValueError("Invalid repetition bounds: expected 1 <= min_repetitions ({}) <= max_repetitions "
+                             "({})".format(min_repetitions, max_repetitions))
+        if not 0 < confidence_level < 1:
+            raise ValueError("The confidence level must lie in (0, 1), but is {}.".format(confidence_level))
+        self.chunk_size = chunk_size
+        self.min_repetitions = min_repetitions
+        self.max_repetitions = max_repetitions
+        self.total_repetitions = total_repetitions
+        self.treewidth_ci_width = treewidth_ci_width
+        self.relative_runtime_ci_width = relative_runtime_ci_width
+        self.z_value = statistics.NormalDist().inv_cdf(0.5 + confidence_level / 2.0)
+        self.cells = collections.OrderedDict(((num_nodes, prob), CellState(num_nodes, prob)) for num_nodes, prob in cells)
+        self.number_of_dispatched_repetitions = 0
+        self._cells_below_minimum = None
+        # heap of (-priority, -version, (num_nodes, prob)); entries of outdated versions are skipped
+        self._priority_heap = []
+
+    @staticmethod
+    def from_parameters(parameters, cells, chunk_size, default_repetitions):
+        ''' Creates the controller from the adaptive_sampling parameters of a yaml parameter file. By default, the total
+            number of repetitions equals the number of repetitions of uniform sampling, i.e. the repetitions saved in
+            cells with small confidence intervals are spent on the remaining cells (up to max_repetitions each).
+        '''
+        unknown_parameters = set(parameters) - set(ADAPTIVE_SAMPLING_PARAMETERS)
+        if unknown_parameters:
+            raise ValueError("Unknown adaptive sampling parameters {}; must be among {}".format(
+                sorted(unknown_parameters), ADAPTIVE_SAMPLING_PARAMETERS))
+        cells = list(cells)
+        parameters = dict(parameters)
+        parameters.setdefault("min_repetitions", min(DEFAULT_MIN_REPETITIONS, default_repetitions))
+        parameters.setdefault("max_repetitions", DEFAULT_MAX_REPETITIONS_FACTOR * default_repetitions)
+        parameters.setdefault("total_repetitions", default_repetitions * len(cells))
+        return AdaptiveSamplingController(cells, chunk_size, **parameters)
+
+    def add_completed_task(self, num_nodes, prob, repetition_index, treewidth, runtime):
+        ''' Registers the result of a task completed in a previous execution. '''
+        cell = self.cells[(num_nodes, prob)]
+        cell.used_repetition_indices.add(repetition_index)
+        cell.number_of_pending_repetitions += 1
+        self.number_of_dispatched_repetitions += 1
+        self.add_result(num_nodes, prob, treewidth, runtime)
+
+    def add_result(self, num_nodes, prob, treewidth, runtime):
+        cell = self.cells[(num_nodes, prob)]
+        cell.number_of_pending_repetitions -= 1
+        cell.number_of_completed_repetitions += 1
+        if treewidth is not None:
+            cell.treewidth_statistics.add(treewidth)
+            cell.runtime_statistics.add(runtime)
+        self._update_priority(cell)
+
+    def _get_confidence_interval_width(self, running_statistics, number_of_samples):
+        standard_deviation = running_statistics.get_standard_deviation()
+        return 2.0 * self.z_value * standard_deviation / math.sqrt(number_of_samples)
+
+    def get_priority(self, cell):
+        ''' Returns the largest ratio of a (projected) confidence interval width and the respective configured width or
+            None if no further repetitions shall be sampled for the cell. The confidence intervals are projected to the
+            number of dispatched repetitions, such that pending repetitions are taken into account. As long as fewer
+            than two repetitions have been dispatched, the confidence interval is undefined and considered infinitely
+            wide.
+        '''
+        number_of_samples = cell.get_number_of_dispatched_repetitions()
+        if number_of_samples >= self.max_repetitions:
+            return None
+        if number_of_samples < 2:
+            return float("inf")
+        if cell.treewidth_statistics.count < 2:
+            # no variance estimate available although repetitions were sampled, e.g. as the computations timed out
+            return None
+        priority = self._get_confidence_interval_width(cell.treewidth_statistics, number_of_samples) / \
+            self.treewidth_ci_width
+        if self.relative_runtime_ci_width is not None and cell.runtime_statistics.mean > 0:
+            relative_runtime_ci_width = self._get_confidence_interval_width(cell.runtime_statistics, number_of_samples) / \
+                cell.runtime_statistics.mean
+            priority = max(priority, relative_runtime_ci_width / self.relative_runtime_ci_width)
+        if priority <= 1.0:
+            return None
+        return priority
+
+    def _update_priority(self, cell):
+        cell.version += 1
+        if cell.get_number_of_dispatched_repetitions() < self.min_repetitions:
+            return
+        priority = self.get_priority(cell)
+        if priority is not None:
+            heapq.heappush(self._priority_heap, (-priority, -cell.version, (cell.num_nodes, cell.probability)))
+
+    def _is_budget_exhausted(self):
+        return self.total_repetitions is not None and self.number_of_dispatched_repetitions >= self.total_repetitions
+
+    def next_chunk(self):
+        ''' Returns the next chunk (num_nodes, prob, repetition_indices) or None if currently no further repetitions
+            shall be sampled. Note that later calls may return chunks again after results have been added.
+        '''
+        if self._cells_below_minimum is None:
+            self._cells_below_minimum = collections.deque(
+                cell for cell in self.cells.values() if cell.get_number_of_dispatched_repetitions() < self.min_repetitions)
+            if self.total_repetitions is not None and \
+                    self.min_repetitions * len(self.cells) > self.total_repetitions:
+                logger.warning("The total number of repetitions ({}) does not suffice to sample each of the {} cells "
+                               "{} times".format(self.total_repetitions, len(self.cells), self.min_repetitions))
+
+        while self._cells_below_minimum:
+            cell = self._cells_below_minimum[0]
+            count = min(self.chunk_size, self.min_repetitions - cell.get_number_of_dispatched_repetitions())
+            if count <= 0:
+                self._cells_below_minimum.popleft()
+                continue
+            return self._dispatch(cell, count)
+
+        while self._priority_heap and not self._is_budget_exhausted():
+            _, negative_version, cell_key = heapq.heappop(self._priority_heap)
+            cell = self.cells[cell_key]
+            if -negative_version != cell.version:
+                continue
+            count = min(self.chunk_size, self.max_repetitions - cell.get_number_of_dispatched_repetitions())
+            if self.total_repetitions is not None:
+                count = min(count, self.total_repetitions - self.number_of_dispatched_repetitions)
+            return self._dispatch(cell, count)
+        return None
+
+    def _dispatch(self, cell, count):
+        repetition_indices = cell.take_repetition_indices(count)
+        cell.number_of_pending_repetitions += count
+        self.number_of_dispatched_repetitions += count
+        self._update_priority(cell)
+        return cell.num_nodes, cell.probability, tuple(repetition_indices)
+
+    def log_summary(self):
+        repetitions = [cell.number_of_completed_repetitions for cell in self.cells.values()]
+        logger.info("Adaptive sampling: {} repetitions in {} cells (min {}, mean {:.1f}, max {} per cell)".format(
+            sum(repetitions), len(repetitions), min(repetitions), float(sum(repetitions)) / len(repetitions),
+            max(repetitions)))
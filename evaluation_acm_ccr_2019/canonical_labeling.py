@@ -0,0 +1,127 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+""" This module computes canonical forms of (small) undirected graphs, i.e. a representation that is identical for
+    two graphs if and only if they are isomorphic.
+
+    The canonical form is obtained by the individualization-refinement scheme: the nodes are partitioned by color
+    refinement and, as long as the partition is not discrete, each node of the first non-singleton cell is individualized
+    in turn. Among all discrete partitions (leaves of the search tree), the one yielding the lexicographically smallest
+    sorted edge list defines the canonical labeling. Nodes having the same neighbors (twins) lead to identical subtrees,
+    such that only one of them is individualized. As the search may still be exponential, it is aborted after a given
+    number of leaves."""
+
+DEFAULT_MAX_LEAVES = 1000
+
+
+class _LeafLimitExceeded(Exception):
+    pass
+
+
+def compute_canonical_form(nodes, edges, max_leaves=DEFAULT_MAX_LEAVES):
+    """ Returns the tuple (canonical_form, labeling), where canonical_form is a string encoding the isomorphism class
+        of the graph given by the nodes and edges and labeling maps each node to its canonical index (0, ..., n-1).
+        Returns None if the canonical form could not be computed within max_leaves leaves of the search tree.
+    """
+    nodes = list(nodes)
+    node_index = {node: index for index, node in enumerate(nodes)}
+    adjacency = [set() for _ in nodes]
+    for edge in edges:
+        i, j = [node_index[node] for node in edge]
+        adjacency[i].add(j)
+        adjacency[j].add(i)
+
+    search = _CanonicalLabelingSearch(adjacency, max_leaves)
+    try:
+        certificate, labels = search.run()
+    except _LeafLimitExceeded:
+        logger.debug("Canonical labeling aborted after {} leaves".format(max_leaves))
+        return None
+
+    number_of_nodes = len(nodes)
+    adjacency_bitmask = 0
+    for i, j in certificate:
+        adjacency_bitmask |= 1 << (i * number_of_nodes + j)
+    canonical_form = "{}:{:x}".format(number_of_nodes, adjacency_bitmask)
+    return canonical_form, {node: labels[node_index[node]] for node in nodes}
+
+
+def _refine(colors, adjacency):
+    """ Refines the given coloring until the color of each node, together with the multiset of its neighbors' colors,
+        determines its new color. Colors are ranked by their signatures, such that the result does not depend on the
+        numbering of the nodes.
+    """
+    number_of_colors = len(set(colors))
+    while True:
+        signatures = [(colors[v], tuple(sorted(colors[u] for u in adjacency[v]))) for v in range(len(colors))]
+        ranks = {signature: rank for rank, signature in enumerate(sorted(set(signatures)))}
+        colors = [ranks[signature] for signature in signatures]
+        if len(ranks) == number_of_colors:
+            return colors
+        number_of_colors = len(ranks)
+
+
+class _CanonicalLabelingSearch(object):
+
+    def __init__(self, adjacency, max_leaves):
+        self.adjacency = adjacency
+        self.max_leaves = max_leaves
+        self.number_of_leaves = 0
+        self.best_certificate = None
+        self.best_labels = None
+
+    def run(self):
+        self._search([0] * len(self.adjacency))
+        return self.best_certificate, self.best_labels
+
+    def _are_twins(self, u, v):
+        return self.adjacency[u] - {v} == self.adjacency[v] - {u}
+
+    def _search(self, colors):
+        colors = _refine(colors, self.adjacency)
+        cells = {}
+        for v, color in enumerate(colors):
+            cells.setdefault(color, []).append(v)
+
+        if len(cells) == len(colors):
+            self.number_of_leaves += 1
+            if self.number_of_leaves > self.max_leaves:
+                raise _LeafLimitExceeded()
+            certificate = tuple(sorted((min(colors[u], colors[v]), max(colors[u], colors[v]))
+                                       for u in range(len(colors)) for v in self.adjacency[u] if u < v))
+            if self.best_certificate is None or certificate < self.best_certificate:
+                self.best_certificate = certificate
+                self.best_labels = colors
+            return
+
+        target_color = min(color for color, cell in cells.items() if len(cell) > 1)
+        individualized_nodes = []
+        for v in cells[target_color]:
+            if any(self._are_twins(v, u) for u in individualized_nodes):
+                # swapping twins is an automorphism preserving the coloring: the subtree of v equals the one of u
+                continue
+            individualized_nodes.append(v)
+            self._search([2 * color - 1 if u == v else 2 * color for u, color in enumerate(colors)])
@@ -0,0 +1,203 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+import os
+import sys
+import threading
+
+import yaml
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows, where no resource usage of child processes is recorded
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+""" This module accounts for the resources used by the child processes spawned to compute tree decompositions (e.g. the
+    JVM running Tamaki's algorithm).
+
+    The user and system CPU time of the children terminating while a ChildResourceMonitor is active are obtained from
+    getrusage(RUSAGE_CHILDREN). As the maximum resident set size reported by getrusage is the maximum over all children
+    ever waited for, the peak RSS of the children is instead obtained by polling the high-water mark (VmHWM) of all
+    (transitive) child processes in /proc while the monitor is active. Children terminating before the first poll are
+    only accounted for if their peak RSS exceeds that of all earlier children. Hence, the peak RSS may be unknown (None)
+    for very short solver calls or on systems without /proc.
+
+    The ResourceUsageSummary aggregates the usage per (number of nodes, probability) combination and is saved as yaml
+    file next to the results of a study, such that the number of worker processes can be chosen according to the
+    measured memory usage."""
+
+# interval in seconds in which the peak RSS of the child processes is polled
+DEFAULT_POLL_INTERVAL = 0.05
+
+# ru_maxrss is given in bytes on macOS and in kilobytes elsewhere
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+class ChildResourceUsage(object):
+    ''' The CPU times (in seconds) and the peak resident set size (in bytes, None if unknown) of child processes. '''
+    __slots__ = ("user_time", "system_time", "peak_rss")
+
+    def __init__(self, user_time=0.0, system_time=0.0, peak_rss=None):
+        self.user_time = user_time
+        self.system_time = system_time
+        self.peak_rss = peak_rss
+
+    def __getstate__(self):
+        return self.user_time, self.system_time, self.peak_rss
+
+    def __setstate__(self, state):
+        self.user_time, self.system_time, self.peak_rss = state
+
+    def __str__(self):
+        peak_rss = "unknown" if self.peak_rss is None else "{:.1f} MiB".format(self.peak_rss / 2.0 ** 20)
+        return "user {:.3f}s, system {:.3f}s, peak RSS {}".format(self.user_time, self.system_time, peak_rss)
+
+
+def _get_child_pids(pid):
+    child_pids = []
+    try:
+        for task in os.listdir("/proc/{}/task".format(pid)):
+            with open("/proc/{}/task/{}/children".format(pid, task), "r") as f:
+                child_pids.extend(int(child_pid) for child_pid in f.read().split())
+    except (IOError, OSError, ValueError):
+        pass
+    return child_pids
+
+
+def _get_peak_rss(pid):
+    ''' Returns the high-water mark of the resident set size of the process in bytes or None. '''
+    try:
+        with open("/proc/{}/status".format(pid), "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def get_descendant_pids(pid):
+    ''' Returns the pids of all (transitive) child processes of the process, as far as they are visible in /proc. '''
+    descendant_pids = []
+    pids_to_visit = _get_child_pids(pid)
+    while pids_to_visit:
+        child_pid = pids_to_visit.pop()
+        descendant_pids.append(child_pid)
+        pids_to_visit.extend(_get_child_pids(child_pid))
+    return descendant_pids
+
+
+class ChildResourceMonitor(object):
+    ''' Context manager measuring the resource usage of the child processes terminating while it is active, which is
+        available as usage after the with block. Note that the CPU time of children spawned by other threads of the
+        process is accounted for as well.
+    '''
+
+    def __init__(self, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.usage = None
+        self._peak_rss = None
+        self._stop_event = threading.Event()
+        self._poll_thread = None
+        self._rusage_start = None
+
+    def __enter__(self):
+        if resource is None:
+            return self
+        self._rusage_start = resource.getrusage(resource.RUSAGE_CHILDREN)
+        if os.path.isdir("/proc/self/task"):
+            self._poll_thread = threading.Thread(target=self._poll, name="child_resource_monitor")
+            self._poll_thread.daemon = True
+            self._poll_thread.start()
+        return self
+
+    def _poll(self):
+        pid = os.getpid()
+        while not self._stop_event.wait(self.poll_interval):
+            for child_pid in get_descendant_pids(pid):
+                peak_rss = _get_peak_rss(child_pid)
+                if peak_rss is not None and (self._peak_rss is None or peak_rss > self._peak_rss):
+                    self._peak_rss = peak_rss
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if resource is None:
+            return
+        if self._poll_thread is not None:
+            self._stop_event.set()
+            self._poll_thread.join()
+        rusage_end = resource.getrusage(resource.RUSAGE_CHILDREN)
+        peak_rss = self._peak_rss
+        if rusage_end.ru_maxrss > self._rusage_start.ru_maxrss:
+            # a child terminating during the monitoring exceeded the peak RSS of all earlier children
+            peak_rss = max(peak_rss or 0, rusage_end.ru_maxrss * _MAXRSS_UNIT)
+        self.usage = ChildResourceUsage(user_time=rusage_end.ru_utime - self._rusage_start.ru_utime,
+                                        system_time=rusage_end.ru_stime - self._rusage_start.ru_stime,
+                                        peak_rss=peak_rss)
+
+
+class ResourceUsageSummary(object):
+    ''' The CPU times and peak RSS of the child processes aggregated per (number of nodes, probability) combination. '''
+
+    def __init__(self):
+        # maps (num_nodes, probability) to [number of results, total user time, total system time, number of results
+        # with known peak RSS, total peak RSS, maximal peak RSS]
+        self.cells = {}
+
+    def add_results(self, results):
+        for result in results:
+            if result.child_cpu_time_user is None:
+                continue
+            cell = self.cells.setdefault((result.num_nodes, result.edge_probability), [0, 0.0, 0.0, 0, 0, 0])
+            cell[0] += 1
+            cell[1] += result.child_cpu_time_user
+            cell[2] += result.child_cpu_time_system
+            if result.child_peak_rss is not None:
+                cell[3] += 1
+                cell[4] += result.child_peak_rss
+                cell[5] = max(cell[5], result.child_peak_rss)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def get_max_peak_rss(self):
+        return max([cell[5] for cell in self.cells.values()] or [0])
+
+    def save(self, path):
+        entries = []
+        for (num_nodes, probability), cell in sorted(self.cells.items()):
+            count, total_user_time, total_system_time, count_peak_rss, total_peak_rss, max_peak_rss = cell
+            entries.append(dict(
+                num_nodes=num_nodes,
+                probability=probability,
+                count=count,
+                mean_child_cpu_time_user=total_user_time / count,
+                mean_child_cpu_time_system=total_system_time / count,
+                mean_child_peak_rss_mib=total_peak_rss / count_peak_rss / 2.0 ** 20 if count_peak_rss else None,
+                max_child_peak_rss_mib=max_peak_rss / 2.0 ** 20 if count_peak_rss else None,
+            ))
+        logger.info("Writing resource usage of {} combinations to {}".format(len(entries), path))
+        with open(path, "w") as f:
+            yaml.safe_dump(entries, f, default_flow_style=False)
@@ -28,10 +28,17 @@ import logging
 import click
 from . import treewidth_computation_experiments
 from . import treewidth_computation_plots
+from . import treewidth_cache
+from . import exact_treewidth
+from . import decomposition_backends
+from . import tree_decomposition_verification
+from . import worker_supervision
+from . import progress_telemetry
+from . import memory_watchdog
+from . import graph_storage_extraction
 from . import runtime_comparison_separation_dynvmp_vs_lp as sep_dynvmp_vs_lp
 from . import plot_data, algorithm_heatmap_plots, runtime_evaluation
 from alib import util
-from alib import datamodel
 
 try:
     import pickle as pickle
@@ -64,15 +71,52 @@ def cli():
 @click.option('--threads', default=1)
 @click.option('--timeout', type=click.INT, default=-1)
 @click.option('--remove_intermediate_solutions/--keep_intermediate_solutions', is_flag=True, default=False, help="shall intermediate solutions be removed after execution?")
-def execute_treewidth_computation_experiment(yaml_parameter_file, threads, timeout, remove_intermediate_solutions):
+@click.option('--chunk_size', type=click.INT, default=treewidth_computation_experiments.DEFAULT_CHUNK_SIZE, help="number of repetitions handed out to a worker process at once")
+@click.option('--resume', is_flag=True, default=False, help="continue an interrupted execution by skipping the results contained in the existing intermediate solutions")
+@click.option('--shard', type=click.STRING, default=None, help="only process the i-th of N parts of the parameter space (given as i/N with 0 <= i < N)")
+@click.option('--aggregated_format', type=click.Choice(treewidth_computation_experiments.AGGREGATED_RESULT_FORMATS), default="pickle", help="write the aggregated results as pickle, in the (memory-mappable) columnar format, or both")
+@click.option('--treewidth_cache/--no_treewidth_cache', 'use_treewidth_cache', is_flag=True, default=False, help="reuse the tree decompositions of isomorphic graphs via a cache shared by all worker processes")
+@click.option('--treewidth_cache_max_nodes', type=click.INT, default=treewidth_cache.DEFAULT_MAX_NODES, help="maximal number of nodes of graphs looked up in the treewidth cache")
+@click.option('--treewidth_bounds/--no_treewidth_bounds', 'use_treewidth_bounds', is_flag=True, default=False, help="skip the solver for graphs whose lower and upper treewidth bounds match")
+@click.option('--preprocessing/--no_preprocessing', 'use_preprocessing', is_flag=True, default=False, help="apply safe reductions and decompose the connected components of the reduced graph independently")
+@click.option('--component_threads', type=click.INT, default=1, help="number of components decomposed concurrently by each worker when using --preprocessing")
+@click.option('--exact_solver_max_nodes', type=click.INT, default=0, help="decompose graphs (or components) with at most this many nodes by the in-process exact solver instead of Tamaki's algorithm")
+@click.option('--anytime/--no_anytime', is_flag=True, default=False, help="decompose graphs which the solver fails to decompose (e.g. due to the timeout) heuristically and record bounds on their treewidth")
+@click.option('--backend', type=click.Choice(decomposition_backends.BACKENDS), default=decomposition_backends.DEFAULT_BACKEND, help="solver computing the tree decompositions; the heuristic backends only yield upper bounds on the treewidth")
+@click.option('--verification', type=click.Choice(tree_decomposition_verification.VERIFICATION_POLICIES), default=tree_decomposition_verification.DEFAULT_VERIFICATION_POLICY, help="verify all tree decompositions, a random sample of them, or none")
+@click.option('--verification_sample_rate', type=click.FLOAT, default=tree_decomposition_verification.DEFAULT_SAMPLE_RATE, help="fraction of the tree decompositions verified when using --verification sampled")
+@click.option('--task_order', type=click.Choice(treewidth_computation_experiments.TASK_ORDERS), default="lpt", help="hand out the chunks by descending predicted runtime (lpt) or in the order of the parameter space (product)")
+@click.option('--runtime_model', 'runtime_model_file', type=click.Path(exists=True), default=None, help="runtime model (or aggregated results) of an earlier study used to predict the runtimes of the chunks")
+@click.option('--max_chunk_attempts', type=click.IntRange(min=1), default=worker_supervision.DEFAULT_MAX_CHUNK_ATTEMPTS, help="number of worker processes a chunk may kill before its remaining tasks are given up")
+@click.option('--progress_interval', type=click.FLOAT, default=progress_telemetry.DEFAULT_REPORT_INTERVAL, help="interval in seconds in which the progress and the ETA are reported")
+@click.option('--prometheus_textfile', type=click.Path(dir_okay=False), default=None, help="file to which the progress metrics are written in the textfile format of the Prometheus node exporter")
+@click.option('--memory_budget', type=click.FLOAT, default=None, help="memory budget in GiB for the worker processes and their solver processes; chunks are deferred when the usage approaches it")
+@click.option('--memory_soft_limit', type=click.FLOAT, default=memory_watchdog.DEFAULT_SOFT_LIMIT, help="fraction of the memory budget above which only chunks whose predicted memory usage fits into the budget are handed out")
+def execute_treewidth_computation_experiment(yaml_parameter_file, threads, timeout, remove_intermediate_solutions, chunk_size, resume, shard, aggregated_format, use_treewidth_cache, treewidth_cache_max_nodes, use_treewidth_bounds, use_preprocessing, component_threads, exact_solver_max_nodes, anytime, backend, verification, verification_sample_rate, task_order, runtime_model_file, max_chunk_attempts, progress_interval, prometheus_textfile, memory_budget, memory_soft_limit):
     click.echo('Generate Scenarios for evaluation of the treewidth model')
 
-    util.ExperimentPathHandler.initialize()
+    if shard is not None:
+        try:
+            shard = treewidth_computation_experiments.parse_shard(shard)
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--shard")
+
+    if resume:
+        # the output folder contains the intermediate solutions of the interrupted execution
+        util.ExperimentPathHandler.initialize(check_emptiness_log=False, check_emptiness_output=False)
+    else:
+        util.ExperimentPathHandler.initialize()
 
     if timeout <= 0:
         timeout = None
 
+    memory_budget_in_bytes = None
+    if memory_budget is not None:
+        memory_budget_in_bytes = int(memory_budget * 2 ** 30)
+
     file_basename = os.path.basename(yaml_parameter_file.name).split(".")[0].lower()
+    if shard is not None:
+        file_basename = "{}_shard_{}_of_{}".format(file_basename, shard[0], shard[1])
     log_file = os.path.join(util.ExperimentPathHandler.LOG_DIR, "{}_parent.log".format(file_basename))
     output_file = os.path.join(util.ExperimentPathHandler.OUTPUT_DIR,
                                "{}_results_{{process_index}}.pickle".format(file_basename))
@@ -81,10 +125,80 @@ def execute_treewidth_computation_experiment(yaml_parameter_file, threads, timeo
                                                                output_file,
                                                                threads,
                                                                timeout,
-                                                               remove_intermediate_solutions)
+                                                               remove_intermediate_solutions,
+                                                               chunk_size=chunk_size,
+                                                               resume=resume,
+                                                               shard=shard,
+                                                               aggregated_format=aggregated_format,
+                                                               use_treewidth_cache=use_treewidth_cache,
+                                                               treewidth_cache_max_nodes=treewidth_cache_max_nodes,
+                                                               use_treewidth_bounds=use_treewidth_bounds,
+                                                               use_preprocessing=use_preprocessing,
+                                                               component_threads=component_threads,
+                                                               exact_solver_max_nodes=exact_solver_max_nodes,
+                                                               anytime=anytime,
+                                                               backend=backend,
+                                                               verification_policy=verification,
+                                                               verification_sample_rate=verification_sample_rate,
+                                                               task_order=task_order,
+                                                               runtime_model_file=runtime_model_file,
+                                                               max_chunk_attempts=max_chunk_attempts,
+                                                               progress_interval=progress_interval,
+                                                               prometheus_textfile=prometheus_textfile,
+                                                               memory_budget=memory_budget_in_bytes,
+                                                               memory_soft_limit=memory_soft_limit)
+
+
+@cli.command(short_help="Combines the aggregated results of several shards of a treewidth computation experiment")
+@click.argument('output_pickle_file', type=click.Path())
+@click.argument('input_pickle_files', type=click.Path(exists=True), nargs=-1, required=True)
+def combine_treewidth_computation_results(output_pickle_file, input_pickle_files):
+    util.ExperimentPathHandler.initialize(check_emptiness_log=False, check_emptiness_output=False)
+    file_basename = os.path.basename(output_pickle_file).split(".")[0].lower()
+    log_file = os.path.join(util.ExperimentPathHandler.LOG_DIR, "combine_treewidth_results_{}.log".format(file_basename))
+    util.initialize_root_logger(log_file)
+    treewidth_computation_experiments.combine_aggregated_result_pickles(input_pickle_files, output_pickle_file)
+
+
+@cli.command(short_help="Compares the widths and runtimes of several tree decomposition backends on the same graphs")
+@click.argument('yaml_parameter_file', type=click.File('r'))
+@click.argument('output_file', type=click.Path())
+@click.option('--backends', type=click.STRING, default=",".join(decomposition_backends.DEFAULT_BENCHMARK_BACKENDS), help="comma-separated list of the backends to compare")
+@click.option('--repetitions', type=click.INT, default=None, help="number of graphs per combination of number of nodes and probability (default: scenario_repetition)")
+@click.option('--timeout', type=click.INT, default=-1)
+def benchmark_tree_decomposition_backends(yaml_parameter_file, output_file, backends, repetitions, timeout):
+    try:
+        backend_names = decomposition_backends.parse_backends(backends)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--backends")
+    if timeout <= 0:
+        timeout = None
+    util.ExperimentPathHandler.initialize(check_emptiness_log=False, check_emptiness_output=False)
+    file_basename = os.path.basename(yaml_parameter_file.name).split(".")[0].lower()
+    log_file = os.path.join(util.ExperimentPathHandler.LOG_DIR, "benchmark_backends_{}.log".format(file_basename))
+    util.initialize_root_logger(log_file)
+    treewidth_computation_experiments.run_backend_benchmark_from_yaml(yaml_parameter_file, output_file, backend_names,
+                                                                       repetitions=repetitions, timeout=timeout)
+
+
+@cli.command(short_help="Compares the treewidths of a study with those computed by the in-process exact solver")
+@click.argument('yaml_parameter_file', type=click.File('r'))
+@click.argument('results_pickle_file', type=click.Path(exists=True))  # aggregated results pickle or columnar results
+@click.option('--max_nodes', type=click.INT, default=exact_treewidth.DEFAULT_MAX_NODES, help="only validate graphs with at most this many nodes")
+@click.option('--max_graphs', type=click.INT, default=None, help="validate at most this many graphs")
+def validate_exact_treewidth_solver(yaml_parameter_file, results_pickle_file, max_nodes, max_graphs):
+    util.ExperimentPathHandler.initialize(check_emptiness_log=False, check_emptiness_output=False)
+    file_basename = os.path.basename(results_pickle_file).split(".")[0].lower()
+    log_file = os.path.join(util.ExperimentPathHandler.LOG_DIR, "validate_exact_treewidth_solver_{}.log".format(file_basename))
+    util.initialize_root_logger(log_file)
+    mismatches = treewidth_computation_experiments.validate_exact_solver(yaml_parameter_file, results_pickle_file,
+                                                                         max_nodes=max_nodes, max_graphs=max_graphs)
+    if mismatches:
+        raise click.ClickException("The treewidths of {} graphs differ".format(len(mismatches)))
+
 
 @cli.command(short_help="Extracts undirected graphs from treewidth experiments")
-@click.argument('input_pickle_file', type=click.Path())
+@click.argument('input_pickle_file', type=click.Path())  # aggregated results pickle, columnar results, or per-process result files (directory or glob pattern)
 @click.argument('output_pickle_file', type=click.Path())
 @click.argument('min_tw', type=click.INT)
 @click.argument('max_tw', type=click.INT)
@@ -92,6 +206,10 @@ def execute_treewidth_computation_experiment(yaml_parameter_file, threads, timeo
 @click.option('--max_nodes', type=click.INT, default=sys.maxsize)
 @click.option('--min_conn_prob', type=click.FLOAT, default=0)
 @click.option('--max_conn_prob', type=click.FLOAT, default=1.0)
+@click.option('--use_treewidth_upper_bound', is_flag=True, default=False, help="classify graphs whose treewidth is unknown (e.g. decomposed by a heuristic backend) by the width of their decomposition")
+@click.option('--threads', type=click.IntRange(min=1), default=1, help="number of processes reading the cells of columnar results or the per-process result files in parallel")
+@click.option('--output_format', type=click.Choice(['pickle', 'graph_store']), default="pickle", help="write an undirected graph storage pickle or a (memory-mappable) graph store directory indexed by treewidth and number of nodes")
+@click.option('--deduplicate_isomorphic_graphs', is_flag=True, default=False, help="store only one graph per isomorphism class and treewidth together with the size of the class as multiplicity (requires --output_format graph_store)")
 def create_undirected_graph_storage_from_treewidth_experiments(input_pickle_file,
                                                                output_pickle_file,
                                                                min_tw,
@@ -99,39 +217,32 @@ def create_undirected_graph_storage_from_treewidth_experiments(input_pickle_file
                                                                min_nodes,
                                                                max_nodes,
                                                                min_conn_prob,
-                                                               max_conn_prob):
+                                                               max_conn_prob,
+                                                               use_treewidth_upper_bound,
+                                                               threads,
+                                                               output_format,
+                                                               deduplicate_isomorphic_graphs):
+    if deduplicate_isomorphic_graphs and output_format != "graph_store":
+        raise click.BadParameter("the undirected graph storage pickle cannot hold the multiplicities of the "
+                                 "isomorphism classes; use --output_format graph_store",
+                                 param_hint="--deduplicate_isomorphic_graphs")
     util.ExperimentPathHandler.initialize()
-    file_basename = os.path.basename(input_pickle_file).split(".")[0].lower()
+    file_basename = os.path.basename(input_pickle_file.rstrip(os.sep)).split(".")[0].lower()
     log_file = os.path.join(util.ExperimentPathHandler.LOG_DIR, "creation_undirected_graph_storage_from_treewidth_{}.log".format(file_basename))
     util.initialize_root_logger(log_file)
 
     # get root logger
     logger = logging.getLogger()
 
-    graph_storage = datamodel.UndirectedGraphStorage(parameter_name="treewidth")
-
-    input_contents = None
-    logger.info("Reading file {}".format(input_pickle_file))
-    with open(input_pickle_file, "rb") as f:
-        input_contents = pickle.load(f)
-
-    for number_of_nodes in list(input_contents.keys()):
-        logger.info("Handling graphs stored for number of nodes {}".format(number_of_nodes))
-        data_for_nodes = input_contents[number_of_nodes]
-        for connection_probability in list(data_for_nodes.keys()):
-            if connection_probability < min_conn_prob or connection_probability > max_conn_prob:
-                continue
-            list_of_results = data_for_nodes[connection_probability]
-            for treewidth_computation_result in list_of_results:
-                result_tw = treewidth_computation_result.treewidth
-                if result_tw is None:
-                    continue
-                if result_tw < min_tw or result_tw > max_tw:
-                    continue
-                undirected_edge_representation = treewidth_computation_result.undirected_graph_edge_representation
-                if undirected_edge_representation is None:
-                    continue
-                graph_storage.add_graph_as_edge_representation(result_tw, undirected_edge_representation)
+    result_filter = graph_storage_extraction.ResultFilter(min_tw, max_tw, min_nodes, max_nodes, min_conn_prob,
+                                                          max_conn_prob,
+                                                          use_treewidth_upper_bound=use_treewidth_upper_bound)
+    if output_format == "graph_store":
+        graph_storage_extraction.extract_graph_store(input_pickle_file, result_filter, output_pickle_file,
+                                                     threads=threads, deduplicate=deduplicate_isomorphic_graphs)
+        return
+    graph_storage = graph_storage_extraction.extract_undirected_graph_storage(input_pickle_file, result_filter,
+                                                                              threads=threads)
 
     logger.info("Writing file {}".format(output_pickle_file))
     with open(output_pickle_file, "wb") as f:
@@ -140,7 +251,7 @@ def create_undirected_graph_storage_from_treewidth_experiments(input_pickle_file
 
 @cli.command(short_help="Generate plots for treewidth computation by Tamaki's algorithm")
 @click.argument('parameters_file', type=click.File('r'))
-@click.argument('results_pickle_file', type=click.File('rb'))
+@click.argument('results_pickle_file', type=click.Path(exists=True))  # aggregated results pickle or columnar results
 @click.argument('output_path', type=click.Path())
 @click.option('--output_filetype', type=click.Choice(['png', 'pdf', 'eps']), default="png", help="the filetype which shall be created")
 def treewidth_plot_computation_results(parameters_file, results_pickle_file, output_path, output_filetype):
@@ -0,0 +1,459 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import array
+import logging
+import mmap
+import os
+
+import numpy as np
+
+from . import phase_timing
+
+try:
+    import pickle as pickle
+except ImportError:
+    import pickle
+
+logger = logging.getLogger(__name__)
+
+""" This module contains a columnar storage format for the aggregated results of treewidth computation experiments.
+
+    Instead of pickling a nested dict of millions of TreeDecompositionAlgorithmResult objects, the scalar fields of the
+    results are stored in typed numpy arrays (one .npy file per field) within a directory. The (rarely stored) edge
+    representations of the graphs are pickled into a separate side file and addressed by offset and length. All arrays
+    and the side file can be memory-mapped, such that only the accessed data is actually read.
+
+    The rows are sorted by number of nodes, edge probability, and repetition index."""
+
+FORMAT_VERSION = 1
+
+# treewidth value used in the treewidth column if no tree decomposition was computed (e.g. due to a timeout)
+MISSING_TREEWIDTH = -1
+
+# value used in optional integer columns (other than treewidth bounds) if the value is not available
+MISSING_INT = -1
+
+COLUMN_TYPES = [
+    ("num_nodes", np.int16, "h"),
+    ("edge_probability", np.float64, "d"),
+    ("repetition_index", np.int32, "i"),
+    ("treewidth", np.int16, "h"),
+    ("runtime_treewidth_computation", np.float64, "d"),
+    ("edge_representation_offset", np.int64, "q"),
+    ("edge_representation_length", np.int64, "q"),
+]
+
+# columns which may be missing in results written by earlier versions, given as (name, numpy dtype, array typecode,
+# value representing None); for missing columns, all values are None (or the default of the result attribute)
+OPTIONAL_COLUMN_TYPES = [
+    ("runtime_verification", np.float64, "d", np.nan),
+    ("child_cpu_time_user", np.float64, "d", np.nan),
+    ("child_cpu_time_system", np.float64, "d", np.nan),
+    ("child_peak_rss", np.int64, "q", MISSING_INT),
+    ("cache_hit", np.int8, "b", 0),
+    ("treewidth_lower_bound", np.int16, "h", MISSING_TREEWIDTH),
+    ("treewidth_upper_bound", np.int16, "h", MISSING_TREEWIDTH),
+]
+OPTIONAL_COLUMN_MISSING_VALUES = {name: missing_value for name, _, _, missing_value in OPTIONAL_COLUMN_TYPES}
+
+# optional columns holding the wall and CPU times of the phases (see phase_timing.PHASES), given as (name, clock, phase)
+PHASE_TIMING_COLUMNS = [("{}_time_{}".format(clock, phase), clock, phase)
+                        for clock in ["wall", "cpu"] for phase in phase_timing.PHASES]
+
+# optional columns holding (few distinct) strings, given as (name, default value); the strings are stored as int8
+# codes referring to the lines of the file <name>_categories.txt
+OPTIONAL_CATEGORICAL_COLUMNS = [
+    ("decomposition_method", "solver"),
+    ("decomposition_backend", "tamaki"),
+]
+
+EDGE_REPRESENTATION_FILENAME = "edge_representations.bin"
+FORMAT_VERSION_FILENAME = "format_version.txt"
+
+
+def is_columnar_results_path(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, FORMAT_VERSION_FILENAME))
+
+
+def get_columnar_results_path(aggregated_pickle_file):
+    """ Returns the directory of the columnar results corresponding to the given aggregated results pickle. """
+    return os.path.splitext(aggregated_pickle_file)[0] + ".columnar"
+
+
+class ColumnarResultsWriter(object):
+    """ Writes TreeDecompositionAlgorithmResult objects (or any objects offering the same attributes and
+        get_serialized_edge_representation) to the columnar format. The scalar fields are buffered in compact arrays,
+        while the edge representations are directly written to the side file. The columns are sorted and written upon
+        close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        self._columns = {name: array.array(typecode) for name, _, typecode in COLUMN_TYPES}
+        for name, _, typecode, _ in OPTIONAL_COLUMN_TYPES:
+            self._columns[name] = array.array(typecode)
+        for name, _, _ in PHASE_TIMING_COLUMNS:
+            self._columns[name] = array.array("d")
+        self._category_codes = {}
+        for name, _ in OPTIONAL_CATEGORICAL_COLUMNS:
+            self._columns[name] = array.array("b")
+            self._category_codes[name] = {}
+        self._edge_representation_file = open(os.path.join(self.path, EDGE_REPRESENTATION_FILENAME), "wb")
+        self._edge_representation_file_size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_result(self, result):
+        offset, length = -1, 0
+        serialized_edge_representation = result.get_serialized_edge_representation()
+        if serialized_edge_representation is not None:
+            self._edge_representation_file.write(serialized_edge_representation)
+            offset, length = self._edge_representation_file_size, len(serialized_edge_representation)
+            self._edge_representation_file_size += length
+
+        self._columns["num_nodes"].append(result.num_nodes)
+        self._columns["edge_probability"].append(result.edge_probability)
+        self._columns["repetition_index"].append(result.repetition_index)
+        self._columns["treewidth"].append(MISSING_TREEWIDTH if result.treewidth is None else result.treewidth)
+        self._columns["runtime_treewidth_computation"].append(result.runtime_treewidth_computation)
+        self._columns["edge_representation_offset"].append(offset)
+        self._columns["edge_representation_length"].append(length)
+        for name, _, _, missing_value in OPTIONAL_COLUMN_TYPES:
+            value = getattr(result, name, None)
+            self._columns[name].append(missing_value if value is None else value)
+        phase_timings = getattr(result, "phase_timings", None)
+        for name, clock, phase in PHASE_TIMING_COLUMNS:
+            if phase_timings is None:
+                self._columns[name].append(np.nan)
+            elif clock == "wall":
+                self._columns[name].append(phase_timings.get_wall_time(phase))
+            else:
+                self._columns[name].append(phase_timings.get_cpu_time(phase))
+        for name, default_value in OPTIONAL_CATEGORICAL_COLUMNS:
+            category_codes = self._category_codes[name]
+            value = getattr(result, name, default_value)
+            if value not in category_codes:
+                category_codes[value] = len(category_codes)
+            self._columns[name].append(category_codes[value])
+
+    def close(self):
+        if self._edge_representation_file is None:
+            return
+        self._edge_representation_file.close()
+        self._edge_representation_file = None
+
+        columns = {name: np.frombuffer(self._columns[name], dtype=dtype) for name, dtype, _ in COLUMN_TYPES}
+        for name, dtype, _, _ in OPTIONAL_COLUMN_TYPES:
+            columns[name] = np.frombuffer(self._columns[name], dtype=dtype)
+        for name, _, _ in PHASE_TIMING_COLUMNS:
+            columns[name] = np.frombuffer(self._columns[name], dtype=np.float64)
+        for name, _ in OPTIONAL_CATEGORICAL_COLUMNS:
+            columns[name] = np.frombuffer(self._columns[name], dtype=np.int8)
+            categories = sorted(self._category_codes[name], key=self._category_codes[name].get)
+            with open(os.path.join(self.path, name + "_categories.txt"), "w") as f:
+                f.writelines("{}\n".format(category) for category in categories)
+        order = np.lexsort((columns["repetition_index"], columns["edge_probability"], columns["num_nodes"]))
+        for name in columns:
+            np.save(os.path.join(self.path, name + ".npy"), columns[name][order])
+        with open(os.path.join(self.path, FORMAT_VERSION_FILENAME), "w") as f:
+            f.write("{}\n".format(FORMAT_VERSION))
+        logger.info("Wrote {} results to {}".format(len(order), self.path))
+        self._columns = None
+
+
+class ColumnarResults(object):
+    """ Read access to results stored in the columnar format. The columns are available as numpy arrays via the
+        attributes named like the columns (see COLUMN_TYPES), which are memory-mapped if mmap_mode is given.
+    """
+
+    def __init__(self, path, mmap_mode="r"):
+        self.path = path
+        with open(os.path.join(self.path, FORMAT_VERSION_FILENAME), "r") as f:
+            format_version = int(f.read().strip())
+        if format_version != FORMAT_VERSION:
+            raise ValueError("Columnar results at {} have format version {}, but version {} is supported.".format(
+                path, format_version, FORMAT_VERSION))
+        for name, _, _ in COLUMN_TYPES:
+            setattr(self, name, np.load(os.path.join(self.path, name + ".npy"), mmap_mode=mmap_mode))
+        for name in [name for name, _, _, _ in OPTIONAL_COLUMN_TYPES] + [name for name, _, _ in PHASE_TIMING_COLUMNS]:
+            column_file = os.path.join(self.path, name + ".npy")
+            setattr(self, name, np.load(column_file, mmap_mode=mmap_mode) if os.path.exists(column_file) else None)
+        self._categories = {}
+        for name, default_value in OPTIONAL_CATEGORICAL_COLUMNS:
+            column_file = os.path.join(self.path, name + ".npy")
+            if os.path.exists(column_file):
+                setattr(self, name, np.load(column_file, mmap_mode=mmap_mode))
+                with open(os.path.join(self.path, name + "_categories.txt"), "r") as f:
+                    self._categories[name] = f.read().splitlines()
+            else:
+                setattr(self, name, None)
+                self._categories[name] = [default_value]
+        self._edge_representation_buffer = None
+
+    def __len__(self):
+        return len(self.num_nodes)
+
+    def _get_edge_representation_buffer(self):
+        if self._edge_representation_buffer is None:
+            with open(os.path.join(self.path, EDGE_REPRESENTATION_FILENAME), "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    self._edge_representation_buffer = b""
+                else:
+                    self._edge_representation_buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._edge_representation_buffer
+
+    def get_edge_representation(self, row):
+        """ Returns the edge representation stored for the given row or None if no representation was stored. """
+        serialized_edge_representation = self.get_serialized_edge_representation(row)
+        if serialized_edge_representation is None:
+            return None
+        return pickle.loads(serialized_edge_representation)
+
+    def get_serialized_edge_representation(self, row):
+        """ Returns the pickled edge representation stored for the given row or None. """
+        offset = int(self.edge_representation_offset[row])
+        if offset < 0:
+            return None
+        length = int(self.edge_representation_length[row])
+        return self._get_edge_representation_buffer()[offset:offset + length]
+
+    def get_treewidth(self, row):
+        treewidth = int(self.treewidth[row])
+        return None if treewidth == MISSING_TREEWIDTH else treewidth
+
+    def get_optional_float(self, name, row):
+        column = getattr(self, name)
+        if column is None or np.isnan(column[row]):
+            return None
+        return float(column[row])
+
+    def get_optional_int(self, name, row):
+        column = getattr(self, name)
+        if column is None or int(column[row]) == OPTIONAL_COLUMN_MISSING_VALUES[name]:
+            return None
+        return int(column[row])
+
+    def get_phase_timings(self, row):
+        """ Returns the PhaseTimings of the given row or None if no timings were recorded. """
+        times = {}
+        for name, clock, _ in PHASE_TIMING_COLUMNS:
+            column = getattr(self, name)
+            if column is None or np.isnan(column[row]):
+                return None
+            times.setdefault(clock, []).append(float(column[row]))
+        return phase_timing.PhaseTimings(times["wall"], times["cpu"])
+
+    def get_category(self, name, row):
+        column = getattr(self, name)
+        return self._categories[name][0 if column is None else int(column[row])]
+
+    def get_cell_boundaries(self):
+        """ Returns a dict mapping each (number of nodes, edge probability) combination to the (start, end) row range
+            containing its results.
+        """
+        num_nodes = np.asarray(self.num_nodes)
+        edge_probability = np.asarray(self.edge_probability)
+        if len(num_nodes) == 0:
+            return {}
+        is_cell_start = np.ones(len(num_nodes), dtype=bool)
+        is_cell_start[1:] = (num_nodes[1:] != num_nodes[:-1]) | (edge_probability[1:] != edge_probability[:-1])
+        starts = np.flatnonzero(is_cell_start)
+        ends = np.append(starts[1:], len(num_nodes))
+        return {
+            (int(num_nodes[start]), float(edge_probability[start])): (int(start), int(end))
+            for start, end in zip(starts, ends)
+        }
+
+    def get_width_column(self, use_treewidth_upper_bound=False):
+        """ Returns the treewidth column or, if use_treewidth_upper_bound is set, the treewidth column in which missing
+            treewidths are replaced by the treewidth upper bounds (i.e. the widths of the decompositions).
+        """
+        if not use_treewidth_upper_bound or self.treewidth_upper_bound is None:
+            return self.treewidth
+        treewidth = np.asarray(self.treewidth)
+        return np.where(treewidth != MISSING_TREEWIDTH, treewidth, np.asarray(self.treewidth_upper_bound))
+
+    def select_rows(self, min_treewidth=None, max_treewidth=None, min_nodes=None, max_nodes=None,
+                    min_edge_probability=None, max_edge_probability=None, require_edge_representation=False,
+                    use_treewidth_upper_bound=False, row_range=None):
+        """ Returns the indices of the rows satisfying all given bounds (inclusive). Rows without treewidth are only
+            selected if no treewidth bound is given. If use_treewidth_upper_bound is set, the treewidth bounds are
+            applied to the treewidth upper bound of rows without treewidth (see get_width_column). If a row range
+            (start, end) is given, only its rows are considered (e.g. the rows of a cell, see get_cell_boundaries).
+        """
+        start, end = (0, len(self)) if row_range is None else row_range
+        width = self.get_width_column(use_treewidth_upper_bound)[start:end]
+        selected = np.ones(end - start, dtype=bool)
+        if min_treewidth is not None or max_treewidth is not None:
+            selected &= width != MISSING_TREEWIDTH
+        for column, lower_bound, upper_bound in [(width, min_treewidth, max_treewidth),
+                                                 (self.num_nodes[start:end], min_nodes, max_nodes),
+                                                 (self.edge_probability[start:end], min_edge_probability,
+                                                  max_edge_probability)]:
+            if lower_bound is not None:
+                selected &= column >= lower_bound
+            if upper_bound is not None:
+                selected &= column <= upper_bound
+        if require_edge_representation:
+            selected &= self.edge_representation_offset[start:end] >= 0
+        return np.flatnonzero(selected) + start
+
+    def as_result_dict(self):
+        """ Returns a view of the results in the layout of the aggregated results pickle, i.e. a dict mapping the number
+            of nodes to a dict mapping the edge probability to the sequence of results. The results are materialized
+            as ColumnarResultRecord objects only when accessed.
+        """
+        result_dict = {}
+        for (num_nodes, edge_probability), (start, end) in self.get_cell_boundaries().items():
+            result_dict.setdefault(num_nodes, {})[edge_probability] = ColumnarResultCell(self, start, end)
+        return result_dict
+
+    def iter_results(self):
+        for row in range(len(self)):
+            yield ColumnarResultRecord(self, row)
+
+
+class ColumnarResultCell(object):
+    """ Sequence of the results of a single (number of nodes, edge probability) combination. """
+
+    def __init__(self, columnar_results, start, end):
+        self.columnar_results = columnar_results
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __iter__(self):
+        for row in range(self.start, self.end):
+            yield ColumnarResultRecord(self.columnar_results, row)
+
+    def __getitem__(self, item):
+        rows = range(self.start, self.end)[item]
+        if isinstance(item, slice):
+            return [ColumnarResultRecord(self.columnar_results, row) for row in rows]
+        return ColumnarResultRecord(self.columnar_results, rows)
+
+
+class ColumnarResultRecord(object):
+    """ Offers the attributes of a TreeDecompositionAlgorithmResult for a single row of columnar results. The edge
+        representation is only deserialized when accessed.
+    """
+    __slots__ = ("columnar_results", "row")
+
+    def __init__(self, columnar_results, row):
+        self.columnar_results = columnar_results
+        self.row = row
+
+    @property
+    def num_nodes(self):
+        return int(self.columnar_results.num_nodes[self.row])
+
+    @property
+    def edge_probability(self):
+        return float(self.columnar_results.edge_probability[self.row])
+
+    @property
+    def repetition_index(self):
+        return int(self.columnar_results.repetition_index[self.row])
+
+    @property
+    def treewidth(self):
+        return self.columnar_results.get_treewidth(self.row)
+
+    @property
+    def runtime_treewidth_computation(self):
+        return float(self.columnar_results.runtime_treewidth_computation[self.row])
+
+    @property
+    def runtime_verification(self):
+        return self.columnar_results.get_optional_float("runtime_verification", self.row)
+
+    @property
+    def child_cpu_time_user(self):
+        return self.columnar_results.get_optional_float("child_cpu_time_user", self.row)
+
+    @property
+    def child_cpu_time_system(self):
+        return self.columnar_results.get_optional_float("child_cpu_time_system", self.row)
+
+    @property
+    def child_peak_rss(self):
+        return self.columnar_results.get_optional_int("child_peak_rss", self.row)
+
+    @property
+    def phase_timings(self):
+        return self.columnar_results.get_phase_timings(self.row)
+
+    @property
+    def cache_hit(self):
+        return self.columnar_results.cache_hit is not None and bool(self.columnar_results.cache_hit[self.row])
+
+    @property
+    def decomposition_method(self):
+        return self.columnar_results.get_category("decomposition_method", self.row)
+
+    @property
+    def decomposition_backend(self):
+        return self.columnar_results.get_category("decomposition_backend", self.row)
+
+    @property
+    def treewidth_lower_bound(self):
+        if self.columnar_results.treewidth_lower_bound is None:
+            return self.treewidth
+        return self.columnar_results.get_optional_int("treewidth_lower_bound", self.row)
+
+    @property
+    def treewidth_upper_bound(self):
+        if self.columnar_results.treewidth_upper_bound is None:
+            return self.treewidth
+        return self.columnar_results.get_optional_int("treewidth_upper_bound", self.row)
+
+    @property
+    def is_optimal(self):
+        return self.treewidth is not None
+
+    @property
+    def undirected_graph_edge_representation(self):
+        return self.columnar_results.get_edge_representation(self.row)
+
+    def get_serialized_edge_representation(self):
+        return self.columnar_results.get_serialized_edge_representation(self.row)
+
+
+def load_aggregated_results(path):
+    """ Loads aggregated results given either as pickle file or as directory in the columnar format. In the latter
+        case, a memory-mapped view in the layout of the aggregated results pickle is returned.
+    """
+    if is_columnar_results_path(path):
+        logger.info("Memory-mapping columnar results at {}".format(path))
+        return ColumnarResults(path).as_result_dict()
+    logger.info("Reading aggregated results pickle {}".format(path))
+    with open(path, "rb") as f:
+        return pickle.load(f)
@@ -0,0 +1,125 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import logging
+
+import vnep_approx.treewidth_model as twm
+
+from . import exact_treewidth, treewidth_bounds
+
+logger = logging.getLogger(__name__)
+
+""" This module provides interchangeable backends computing tree decompositions of undirected graphs:
+    - "tamaki":     Tamaki's exact algorithm (via vnep_approx.treewidth_model), which is launched as external process.
+    - "exact_dp":   the in-process exact dynamic program of exact_treewidth, which is only suited for small graphs and
+                    fails for graphs with more than max_nodes (by default exact_treewidth.DEFAULT_MAX_NODES) nodes.
+    - "min_fill":   the decomposition induced by the min-fill elimination ordering.
+    - "min_degree": the decomposition induced by the min-degree elimination ordering.
+    The heuristic backends run in (low) polynomial time but their decompositions are not necessarily optimal, which
+    suffices e.g. for the separation LP, which only requires some valid decomposition of small width."""
+
+BACKENDS = ["tamaki", "exact_dp", "min_fill", "min_degree"]
+DEFAULT_BACKEND = "tamaki"
+# the backends compared by default; the exact dynamic program is omitted, as it fails for most graphs of a study
+DEFAULT_BENCHMARK_BACKENDS = ["tamaki", "min_fill", "min_degree"]
+
+
+class TreeDecompositionBackend(object):
+    ''' Base class of the backends. Subclasses set name, is_exact (whether the decompositions are optimal), and
+        spawns_child_processes (whether the resource usage of child processes is to be accounted for) and implement
+        compute_tree_decomposition, which returns a tree decomposition or None upon failure.
+    '''
+    name = None
+    is_exact = False
+    spawns_child_processes = False
+
+    def compute_tree_decomposition(self, graph):
+        raise NotImplementedError()
+
+
+class TamakiBackend(TreeDecompositionBackend):
+    name = "tamaki"
+    is_exact = True
+    spawns_child_processes = True
+
+    def __init__(self, timeout=None, logger=None):
+        self.timeout = timeout
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+
+    def compute_tree_decomposition(self, graph):
+        return twm.compute_tree_decomposition(graph, logger=self.logger, timeout=self.timeout)
+
+
+class ExactDynamicProgrammingBackend(TreeDecompositionBackend):
+    name = "exact_dp"
+    is_exact = True
+    max_nodes = exact_treewidth.DEFAULT_MAX_NODES
+
+    def __init__(self, max_nodes=exact_treewidth.DEFAULT_MAX_NODES):
+        self.max_nodes = max_nodes
+
+    def compute_tree_decomposition(self, graph):
+        # the dynamic program is exponential in the number of nodes and cannot be interrupted by a timeout
+        if len(graph.nodes) > self.max_nodes:
+            return None
+        return exact_treewidth.compute_exact_tree_decomposition(graph)
+
+
+class EliminationHeuristicBackend(TreeDecompositionBackend):
+    is_exact = False
+
+    def __init__(self, heuristic):
+        if heuristic not in treewidth_bounds.ELIMINATION_HEURISTICS:
+            raise ValueError("Unknown elimination heuristic {}; must be one of {}".format(
+                heuristic, treewidth_bounds.ELIMINATION_HEURISTICS))
+        self.name = heuristic
+        self.heuristic = heuristic
+
+    def compute_tree_decomposition(self, graph):
+        bitset_graph = treewidth_bounds.BitsetGraph.from_undirected_graph(graph)
+        ordering, _ = treewidth_bounds.compute_elimination_ordering(bitset_graph, self.heuristic)
+        return treewidth_bounds.tree_decomposition_from_elimination_ordering(bitset_graph, ordering)
+
+
+def create_backend(name, timeout=None, logger=None):
+    ''' Returns the backend of the given name (see BACKENDS). The timeout only applies to Tamaki's algorithm, while the
+        exact dynamic program fails for graphs with more than exact_treewidth.DEFAULT_MAX_NODES nodes.
+    '''
+    if name == "tamaki":
+        return TamakiBackend(timeout=timeout, logger=logger)
+    if name == "exact_dp":
+        return ExactDynamicProgrammingBackend()
+    if name in treewidth_bounds.ELIMINATION_HEURISTICS:
+        return EliminationHeuristicBackend(name)
+    raise ValueError("Unknown tree decomposition backend {}; must be one of {}".format(name, BACKENDS))
+
+
+def parse_backends(backends_string):
+    ''' Parses a comma-separated list of backend names. '''
+    backend_names = [name.strip() for name in backends_string.split(",") if name.strip()]
+    for name in backend_names:
+        if name not in BACKENDS:
+            raise ValueError("Unknown tree decomposition backend {}; must be one of {}".format(name, BACKENDS))
+    if not backend_names:
+        raise ValueError("No tree decomposition backend given")
+    return backend_names
@@ -0,0 +1,113 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import logging
+
+from . import treewidth_bounds
+
+logger = logging.getLogger(__name__)
+
+""" This module computes the treewidth of small graphs exactly by dynamic programming over the sets of nodes eliminated
+    first (cf. Bodlaender et al., "On exact algorithms for treewidth").
+
+    For a set S of nodes and a node v outside of S, let Q(S, v) be the set of nodes outside of S and v which are reachable
+    from v via paths whose inner nodes lie in S, i.e. the neighbors of v after eliminating the nodes of S. Then
+    TW(S + v) = min over v of max(TW(S), |Q(S, v)|), where TW(S) is the minimal width of eliminating the nodes of S
+    first, and TW(V) is the treewidth. The sets are processed by increasing size and sets whose value reaches the upper
+    bound given by the elimination heuristics (see treewidth_bounds) are pruned, such that only a small fraction of the
+    2^n sets is considered for most graphs. The running time is nevertheless exponential, so the solver should only be
+    used for graphs with at most DEFAULT_MAX_NODES nodes or so."""
+
+DEFAULT_MAX_NODES = 16
+
+
+def _get_components(adjacency, node_set):
+    ''' Returns the connected components of the subgraph induced by node_set as pairs of bitsets (component, neighbors
+        of the component).
+    '''
+    components = []
+    remaining = node_set
+    while remaining:
+        component = remaining & -remaining
+        frontier = component
+        neighbors = 0
+        while frontier:
+            reached = 0
+            for u in treewidth_bounds.iterate_bits(frontier):
+                reached |= adjacency[u]
+            neighbors |= reached
+            frontier = reached & node_set & ~component
+            component |= frontier
+        components.append((component, neighbors & ~component))
+        remaining &= ~component
+    return components
+
+
+def compute_exact_elimination_ordering(bitset_graph):
+    ''' Returns an elimination ordering of minimal width (the treewidth) together with its width. '''
+    bounds = treewidth_bounds.compute_treewidth_bounds(bitset_graph)
+    if bounds.is_tight():
+        return bounds.elimination_ordering, bounds.upper_bound
+
+    adjacency = bitset_graph.adjacency
+    number_of_nodes = len(bitset_graph)
+    all_nodes = (1 << number_of_nodes) - 1
+    upper_bound = bounds.upper_bound
+    # the width of eliminating the set first and the preceding set together with the node eliminated last
+    layer = {0: 0}
+    predecessors = {}
+    for _ in range(number_of_nodes):
+        next_layer = {}
+        for node_set, width in layer.items():
+            components = _get_components(adjacency, node_set)
+            for v in treewidth_bounds.iterate_bits(all_nodes & ~node_set):
+                neighbors = adjacency[v]
+                for component, component_neighbors in components:
+                    if neighbors & component:
+                        neighbors |= component_neighbors
+                new_width = max(width, treewidth_bounds.popcount(neighbors & ~node_set & ~(1 << v)))
+                if new_width >= upper_bound:
+                    continue
+                new_node_set = node_set | (1 << v)
+                if new_node_set not in next_layer or new_width < next_layer[new_node_set]:
+                    next_layer[new_node_set] = new_width
+                    predecessors[new_node_set] = (node_set, v)
+        layer = next_layer
+        if not layer:
+            # no elimination ordering beats the upper bound
+            return bounds.elimination_ordering, upper_bound
+
+    ordering = []
+    node_set = all_nodes
+    while node_set:
+        node_set, v = predecessors[node_set]
+        ordering.append(v)
+    ordering.reverse()
+    return ordering, layer[all_nodes]
+
+
+def compute_exact_tree_decomposition(graph):
+    ''' Returns a tree decomposition of minimal width of the graph. '''
+    bitset_graph = treewidth_bounds.BitsetGraph.from_undirected_graph(graph)
+    ordering, _ = compute_exact_elimination_ordering(bitset_graph)
+    return treewidth_bounds.tree_decomposition_from_elimination_ordering(bitset_graph, ordering)
@@ -0,0 +1,286 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import glob
+import logging
+import multiprocessing as mp
+import os
+
+from alib import datamodel
+
+from . import canonical_labeling, columnar_results, graph_store, result_files
+
+try:
+    import pickle as pickle
+except ImportError:
+    import pickle
+
+logger = logging.getLogger(__name__)
+
+""" This module extracts the graphs of a treewidth computation experiment into an undirected graph storage.
+
+    The results are streamed from their source and filtered by their number of nodes, edge probability, and treewidth
+    before any edge representation is deserialized, such that the memory usage is bounded by the size of the extracted
+    graphs instead of the size of the study:
+
+    - From columnar results, the cells (i.e. the (number of nodes, probability) combinations) outside the given ranges
+      are skipped and the rows of the remaining cells are selected on the memory-mapped columns.
+    - From per-process result files, the results are read frame by frame. As the edge representations of results are
+      pickled separately (see TreeDecompositionAlgorithmResult.get_serialized_edge_representation), they are only
+      deserialized for matching results.
+    - An aggregated results pickle can only be loaded as a whole, but (unless written by earlier versions) its edge
+      representations are only deserialized for matching results as well.
+
+    The cells respectively result files are processed in parallel by a pool of processes, which only pass the
+    serialized edge representations of the matching results back. The graphs are added to the storage in the order of
+    their number of nodes, probability, and repetition index.
+
+    Instead of an UndirectedGraphStorage, the graphs can be written as graph store (see graph_store.py), which is
+    indexed by treewidth and number of nodes and can be memory-mapped by the processes generating requests.
+
+    When writing a graph store, isomorphic graphs of the same treewidth can be deduplicated: the graphs are
+    canonicalized (see canonical_labeling) in parallel and only the first graph of each isomorphism class is stored,
+    with the size of the class as multiplicity of its representative. As an UndirectedGraphStorage cannot hold
+    multiplicities, deduplicating its graphs would change the distribution of the requests drawn from it."""
+
+
+class ResultFilter(object):
+    ''' The (inclusive) ranges of the number of nodes, edge probability, and treewidth of the extracted results. If
+        use_treewidth_upper_bound is set, results without treewidth are classified by their treewidth upper bound.
+    '''
+
+    def __init__(self, min_treewidth, max_treewidth, min_nodes, max_nodes, min_edge_probability, max_edge_probability,
+                 use_treewidth_upper_bound=False):
+        self.min_treewidth = min_treewidth
+        self.max_treewidth = max_treewidth
+        self.min_nodes = min_nodes
+        self.max_nodes = max_nodes
+        self.min_edge_probability = min_edge_probability
+        self.max_edge_probability = max_edge_probability
+        self.use_treewidth_upper_bound = use_treewidth_upper_bound
+
+    def matches_cell(self, num_nodes, edge_probability):
+        return self.min_nodes <= num_nodes <= self.max_nodes and \
+            self.min_edge_probability <= edge_probability <= self.max_edge_probability
+
+    def get_width(self, result):
+        ''' Returns the width by which the result is classified or None if the result does not match the filter. '''
+        if not self.matches_cell(result.num_nodes, result.edge_probability):
+            return None
+        width = result.treewidth
+        if width is None and self.use_treewidth_upper_bound:
+            width = result.treewidth_upper_bound
+        if width is None or width < self.min_treewidth or width > self.max_treewidth:
+            return None
+        return width
+
+
+def find_result_files(input_path):
+    ''' Returns the per-process result files given by input_path, which is either a glob pattern (matching result
+        files in the framed or the legacy format), a directory (whose result files in the framed format are used), or a
+        single result file in the framed format. Returns None if input_path is not of this kind (e.g. an aggregated
+        results pickle).
+    '''
+    if any(character in input_path for character in "*?["):
+        return sorted(glob.glob(input_path))
+    if os.path.isdir(input_path):
+        filenames = [os.path.join(input_path, filename) for filename in sorted(os.listdir(input_path))]
+        return [filename for filename in filenames
+                if os.path.isfile(filename) and result_files.is_framed_result_file(filename)]
+    if os.path.isfile(input_path) and result_files.is_framed_result_file(input_path):
+        return [input_path]
+    return None
+
+
+def _get_matches(results, result_filter):
+    matches = []
+    for result in results:
+        width = result_filter.get_width(result)
+        if width is None:
+            continue
+        serialized_edge_representation = result.get_serialized_edge_representation()
+        if serialized_edge_representation is None:
+            continue
+        matches.append((result.num_nodes, result.edge_probability, result.repetition_index, width,
+                        bytes(serialized_edge_representation)))
+    return matches
+
+
+def _extract_from_result_file(task):
+    filename, result_filter = task
+    return _get_matches(result_files.read_results_from_process_file(filename), result_filter)
+
+
+def _extract_from_columnar_cell(task):
+    path, row_range, result_filter = task
+    results = columnar_results.ColumnarResults(path)
+    rows = results.select_rows(min_treewidth=result_filter.min_treewidth, max_treewidth=result_filter.max_treewidth,
+                               require_edge_representation=True,
+                               use_treewidth_upper_bound=result_filter.use_treewidth_upper_bound,
+                               row_range=row_range)
+    width = results.get_width_column(result_filter.use_treewidth_upper_bound)
+    return [(int(results.num_nodes[row]), float(results.edge_probability[row]), int(results.repetition_index[row]),
+             int(width[row]), bytes(results.get_serialized_edge_representation(row)))
+            for row in rows]
+
+
+def _map(function, tasks, threads):
+    if threads <= 1 or len(tasks) <= 1:
+        return [function(task) for task in tasks]
+    pool = mp.Pool(min(threads, len(tasks)))
+    try:
+        return pool.map(function, tasks, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def extract_matching_graphs(input_path, result_filter, threads=1):
+    ''' Returns the list of (num_nodes, edge_probability, repetition_index, width, serialized edge representation)
+        tuples of the results matching the filter, which are read from columnar results, per-process result files (see
+        find_result_files; a single file in the legacy format is recognized by its first result), or an aggregated
+        results pickle.
+    '''
+    if columnar_results.is_columnar_results_path(input_path):
+        cell_boundaries = columnar_results.ColumnarResults(input_path).get_cell_boundaries()
+        tasks = [(input_path, row_range, result_filter)
+                 for (num_nodes, edge_probability), row_range in sorted(cell_boundaries.items())
+                 if result_filter.matches_cell(num_nodes, edge_probability)]
+        logger.info("Extracting graphs from {} of {} cells of the columnar results {}".format(
+            len(tasks), len(cell_boundaries), input_path))
+        matches_per_task = _map(_extract_from_columnar_cell, tasks, threads)
+    else:
+        filenames = find_result_files(input_path)
+        if filenames is not None:
+            logger.info("Extracting graphs from {} result files".format(len(filenames)))
+            matches_per_task = _map(_extract_from_result_file, [(filename, result_filter) for filename in filenames],
+                                    threads)
+        else:
+            logger.info("Reading aggregated results pickle {} (use the per-process result files or columnar results "
+                        "to stream the results instead)".format(input_path))
+            with open(input_path, "rb") as f:
+                # only reads the first result of a per-process result file in the legacy format
+                result_dict = pickle.load(f)
+            if isinstance(result_dict, dict):
+                matches_per_task = [_get_matches(results, result_filter)
+                                    for num_nodes, results_by_probability in result_dict.items()
+                                    for edge_probability, results in results_by_probability.items()
+                                    if result_filter.matches_cell(num_nodes, edge_probability)]
+            elif hasattr(result_dict, "num_nodes"):
+                logger.info("Reading {} as per-process result file in the legacy format".format(input_path))
+                matches_per_task = [_extract_from_result_file((input_path, result_filter))]
+            else:
+                raise ValueError("{} is neither an aggregated results pickle nor a per-process result file; pass "
+                                 "columnar results, a glob pattern or a directory of result files instead".format(
+                                     input_path))
+            del result_dict
+    matches = [match for matches in matches_per_task for match in matches]
+    matches.sort(key=lambda match: match[:3])
+    return matches
+
+
+def _compute_canonical_forms(task):
+    serialized_edge_representations, max_leaves = task
+    canonical_forms = []
+    for serialized_edge_representation in serialized_edge_representations:
+        edge_representation = pickle.loads(serialized_edge_representation)
+        nodes = sorted(set(node for edge in edge_representation for node in edge))
+        canonical_form = canonical_labeling.compute_canonical_form(nodes, edge_representation, max_leaves)
+        canonical_forms.append(None if canonical_form is None else canonical_form[0])
+    return canonical_forms
+
+
+def deduplicate_isomorphic_graphs(matches, threads=1, max_leaves=canonical_labeling.DEFAULT_MAX_LEAVES):
+    ''' Returns the list of (width, serialized edge representation, multiplicity) tuples of the first graph of each
+        isomorphism class among the graphs of the matches (see extract_matching_graphs) of equal width, where the
+        multiplicity is the number of graphs of the class. Graphs whose canonical form cannot be computed within
+        max_leaves leaves are kept with multiplicity 1.
+    '''
+    batch_size = max(1, -(-len(matches) // (4 * threads)))
+    tasks = [([match[4] for match in matches[start:start + batch_size]], max_leaves)
+             for start in range(0, len(matches), batch_size)]
+    canonical_forms = [canonical_form for canonical_forms in _map(_compute_canonical_forms, tasks, threads)
+                       for canonical_form in canonical_forms]
+
+    graphs = []
+    graph_index_of_class = {}
+    number_of_graphs_by_width = {}
+    for match, canonical_form in zip(matches, canonical_forms):
+        width, serialized_edge_representation = match[3], match[4]
+        number_of_graphs_by_width[width] = number_of_graphs_by_width.get(width, 0) + 1
+        if canonical_form is not None and (width, canonical_form) in graph_index_of_class:
+            graph_index = graph_index_of_class[(width, canonical_form)]
+            graphs[graph_index] = (width, graphs[graph_index][1], graphs[graph_index][2] + 1)
+            continue
+        if canonical_form is not None:
+            graph_index_of_class[(width, canonical_form)] = len(graphs)
+        graphs.append((width, serialized_edge_representation, 1))
+
+    number_of_classes_by_width = {}
+    for width, _, _ in graphs:
+        number_of_classes_by_width[width] = number_of_classes_by_width.get(width, 0) + 1
+    for width in sorted(number_of_graphs_by_width):
+        logger.info("Treewidth {}: {} graphs in {} isomorphism classes".format(
+            width, number_of_graphs_by_width[width], number_of_classes_by_width[width]))
+    logger.info("Deduplicated {} graphs into {} isomorphism classes (ratio {:.2f}, {} graphs not canonicalized)".format(
+        len(matches), len(graphs), len(matches) / float(len(graphs)) if graphs else 1.0,
+        sum(1 for canonical_form in canonical_forms if canonical_form is None)))
+    return graphs
+
+
+def _extract_graphs(input_path, result_filter, threads, deduplicate):
+    ''' Returns the list of (width, serialized edge representation, multiplicity) tuples of the graphs to store. '''
+    matches = extract_matching_graphs(input_path, result_filter, threads=threads)
+    logger.info("Extracting {} graphs".format(len(matches)))
+    if deduplicate:
+        return deduplicate_isomorphic_graphs(matches, threads=threads)
+    return [(match[3], match[4], 1) for match in matches]
+
+
+def extract_undirected_graph_storage(input_path, result_filter, threads=1):
+    ''' Returns the UndirectedGraphStorage (with parameter treewidth) of the graphs of the results matching the filter
+        (see extract_matching_graphs).
+    '''
+    graph_storage = datamodel.UndirectedGraphStorage(parameter_name="treewidth")
+    graphs = _extract_graphs(input_path, result_filter, threads, False)
+    graphs.reverse()
+    while graphs:
+        # the serialized edge representations are released as soon as they are deserialized
+        width, serialized_edge_representation, _ = graphs.pop()
+        graph_storage.add_graph_as_edge_representation(width, pickle.loads(serialized_edge_representation))
+    return graph_storage
+
+
+def extract_graph_store(input_path, result_filter, output_path, threads=1, deduplicate=False):
+    ''' Writes the graphs of the results matching the filter (see extract_matching_graphs) as graph store with
+        parameter treewidth to output_path and returns the number of stored graphs. If deduplicate is set, each
+        isomorphism class is stored once with its size as multiplicity.
+    '''
+    graphs = _extract_graphs(input_path, result_filter, threads, deduplicate)
+    number_of_graphs = len(graphs)
+    graphs.reverse()
+    with graph_store.GraphStoreWriter(output_path, parameter_name="treewidth") as writer:
+        while graphs:
+            width, serialized_edge_representation, multiplicity = graphs.pop()
+            writer.add_graph_as_edge_representation(width, pickle.loads(serialized_edge_representation),
+                                                    multiplicity=multiplicity)
+    return number_of_graphs
@@ -0,0 +1,209 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+import os
+import random
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+""" This module contains a compact binary store of undirected graphs, which is an alternative to the pickled
+    UndirectedGraphStorage of alib for sampling the graphs of requests.
+
+    The graphs are grouped into buckets by their parameter (e.g. the treewidth) and their number of nodes. The store is
+    a directory containing the following numpy arrays, all of which are memory-mapped when reading, such that several
+    processes share the same pages and only the sampled graphs are actually read:
+
+    - index.npy: one row (parameter, number of nodes, index of the first graph, number of graphs) per bucket, sorted by
+      parameter and number of nodes; the graphs of a bucket are stored consecutively.
+    - graph_offsets.npy: the offset of the first edge of each graph in edges.npy (plus the total number of edges).
+    - edges.npy: the edges of all graphs as pairs of node ids (of the smallest unsigned integer type sufficient).
+    - multiplicity_offsets.npy: the cumulative multiplicities of the graphs, i.e. the multiplicity of the i-th graph is
+      the difference of the (i+1)-th and the i-th entry. A graph stored once for several isomorphic graphs (see
+      graph_storage_extraction.deduplicate_isomorphic_graphs) has the number of these graphs as multiplicity. Stores
+      written without this file contain each graph with multiplicity 1.
+
+    The number of nodes of a graph is the number of nodes contained in its edges, i.e. the number of nodes of a request
+    built from its edge representation. Nodes named by decimal numbers (like the nodes of the generated random graphs)
+    keep their numbers, while graphs with other node names are relabeled to 1, ..., n in the order of the names.
+
+    Graphs can either be sampled according to their multiplicities, which yields the distribution of the graphs before
+    deduplication, or uniformly among the stored graphs (i.e. the isomorphism classes of a deduplicated store)."""
+
+FORMAT_VERSION = 1
+
+FORMAT_VERSION_FILENAME = "format_version.txt"
+PARAMETER_NAME_FILENAME = "parameter_name.txt"
+INDEX_FILENAME = "index.npy"
+GRAPH_OFFSETS_FILENAME = "graph_offsets.npy"
+EDGES_FILENAME = "edges.npy"
+MULTIPLICITY_OFFSETS_FILENAME = "multiplicity_offsets.npy"
+
+
+def is_graph_store_path(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, FORMAT_VERSION_FILENAME)) and \
+        os.path.exists(os.path.join(path, EDGES_FILENAME))
+
+
+def pack_edge_representation(edge_representation):
+    ''' Returns the edges of the edge representation as array of shape (number of edges, 2) and the number of nodes. '''
+    node_names = sorted(set(node for edge in edge_representation for node in edge))
+    if all(isinstance(name, str) and name.isdigit() for name in node_names):
+        node_ids = {name: int(name) for name in node_names}
+    else:
+        node_ids = {name: node_id for node_id, name in enumerate(node_names, 1)}
+    edges = np.array([(node_ids[i], node_ids[j]) for i, j in edge_representation], dtype=np.int64).reshape(-1, 2)
+    return edges, len(node_names)
+
+
+def unpack_edge_representation(edges):
+    ''' Returns the edge representation (list of pairs of node names) of the given array of edges. '''
+    return [(str(i), str(j)) for i, j in edges.tolist()]
+
+
+class GraphStoreWriter(object):
+    ''' Collects graphs given as edge representations and writes them as graph store upon close(). '''
+
+    def __init__(self, path, parameter_name="treewidth"):
+        self.path = path
+        self.parameter_name = parameter_name
+        # maps (parameter, number of nodes) to the list of (edge array, multiplicity) pairs of the bucket
+        self._buckets = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+
+    def add_graph_as_edge_representation(self, parameter, edge_representation, multiplicity=1):
+        edges, number_of_nodes = pack_edge_representation(edge_representation)
+        self._buckets.setdefault((int(parameter), number_of_nodes), []).append((edges, multiplicity))
+
+    def close(self):
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        index = np.zeros((len(self._buckets), 4), dtype=np.int64)
+        graph_edges = []
+        multiplicities = []
+        for bucket_index, (key, bucket_graphs) in enumerate(sorted(self._buckets.items())):
+            index[bucket_index] = (key[0], key[1], len(graph_edges), len(bucket_graphs))
+            for edges, multiplicity in bucket_graphs:
+                graph_edges.append(edges)
+                multiplicities.append(multiplicity)
+        graph_offsets = np.zeros(len(graph_edges) + 1, dtype=np.int64)
+        graph_offsets[1:] = np.cumsum([len(edges) for edges in graph_edges])
+        multiplicity_offsets = np.zeros(len(graph_edges) + 1, dtype=np.int64)
+        multiplicity_offsets[1:] = np.cumsum(multiplicities)
+        edges = np.concatenate(graph_edges) if graph_edges else np.zeros((0, 2), dtype=np.int64)
+        max_node_id = int(edges.max()) if len(edges) else 0
+        edge_dtype = np.uint16 if max_node_id <= np.iinfo(np.uint16).max else np.uint32
+        logger.info("Writing graph store of {} graphs in {} buckets to {}".format(len(graph_edges), len(index),
+                                                                                  self.path))
+        np.save(os.path.join(self.path, INDEX_FILENAME), index)
+        np.save(os.path.join(self.path, GRAPH_OFFSETS_FILENAME), graph_offsets)
+        np.save(os.path.join(self.path, EDGES_FILENAME), edges.astype(edge_dtype))
+        np.save(os.path.join(self.path, MULTIPLICITY_OFFSETS_FILENAME), multiplicity_offsets)
+        with open(os.path.join(self.path, PARAMETER_NAME_FILENAME), "w") as f:
+            f.write(self.parameter_name)
+        # written last, such that incomplete stores are not recognized
+        with open(os.path.join(self.path, FORMAT_VERSION_FILENAME), "w") as f:
+            f.write(str(FORMAT_VERSION))
+        self._buckets = {}
+
+
+class GraphStore(object):
+    ''' Read access to a graph store, whose arrays are memory-mapped if mmap_mode is given. '''
+
+    def __init__(self, path, mmap_mode="r"):
+        self.path = path
+        with open(os.path.join(self.path, FORMAT_VERSION_FILENAME), "r") as f:
+            format_version = int(f.read().strip())
+        if format_version != FORMAT_VERSION:
+            raise ValueError("Graph store at {} has format version {}, but version {} is supported.".format(
+                path, format_version, FORMAT_VERSION))
+        with open(os.path.join(self.path, PARAMETER_NAME_FILENAME), "r") as f:
+            self.parameter_name = f.read().strip()
+        self.index = np.load(os.path.join(self.path, INDEX_FILENAME))
+        self.graph_offsets = np.load(os.path.join(self.path, GRAPH_OFFSETS_FILENAME), mmap_mode=mmap_mode)
+        self.edges = np.load(os.path.join(self.path, EDGES_FILENAME), mmap_mode=mmap_mode)
+        multiplicity_offsets_filename = os.path.join(self.path, MULTIPLICITY_OFFSETS_FILENAME)
+        if os.path.exists(multiplicity_offsets_filename):
+            self.multiplicity_offsets = np.load(multiplicity_offsets_filename, mmap_mode=mmap_mode)
+        else:
+            self.multiplicity_offsets = np.arange(len(self.graph_offsets), dtype=np.int64)
+        # maps (parameter, number of nodes) to (index of the first graph, number of graphs)
+        self._buckets = {(int(parameter), int(number_of_nodes)): (int(first_graph), int(number_of_graphs))
+                         for parameter, number_of_nodes, first_graph, number_of_graphs in self.index}
+
+    def __len__(self):
+        return len(self.graph_offsets) - 1
+
+    def get_buckets(self):
+        ''' Returns the sorted list of (parameter, number of nodes) combinations containing graphs. '''
+        return sorted(self._buckets)
+
+    def get_number_of_graphs(self, parameter, number_of_nodes):
+        return self._buckets.get((parameter, number_of_nodes), (0, 0))[1]
+
+    def get_total_multiplicity(self, parameter, number_of_nodes):
+        ''' Returns the number of graphs of the bucket counted with their multiplicities. '''
+        first_graph, number_of_graphs = self._buckets.get((parameter, number_of_nodes), (0, 0))
+        return int(self.multiplicity_offsets[first_graph + number_of_graphs] - self.multiplicity_offsets[first_graph])
+
+    def get_multiplicity(self, graph_index):
+        return int(self.multiplicity_offsets[graph_index + 1] - self.multiplicity_offsets[graph_index])
+
+    def get_graph_indices(self, parameter, number_of_nodes):
+        first_graph, number_of_graphs = self._buckets.get((parameter, number_of_nodes), (0, 0))
+        return range(first_graph, first_graph + number_of_graphs)
+
+    def get_edges(self, graph_index):
+        ''' Returns the edges of the graph as (memory-mapped) array of shape (number of edges, 2). '''
+        return self.edges[self.graph_offsets[graph_index]:self.graph_offsets[graph_index + 1]]
+
+    def get_edge_representation(self, graph_index):
+        return unpack_edge_representation(self.get_edges(graph_index))
+
+    def sample_graph_index(self, parameter, number_of_nodes, random_instance=random, respect_multiplicities=True):
+        ''' Returns the index of a graph drawn at random from the bucket. If respect_multiplicities is set, each graph is
+            drawn with probability proportional to its multiplicity (in logarithmic time), otherwise uniformly (in
+            constant time).
+        '''
+        first_graph, number_of_graphs = self._buckets.get((parameter, number_of_nodes), (0, 0))
+        if number_of_graphs == 0:
+            raise KeyError("No graphs with {} {} and {} nodes are stored".format(self.parameter_name, parameter,
+                                                                                 number_of_nodes))
+        if not respect_multiplicities:
+            return first_graph + random_instance.randrange(number_of_graphs)
+        bucket_multiplicity_offsets = self.multiplicity_offsets[first_graph:first_graph + number_of_graphs + 1]
+        position = random_instance.randrange(int(bucket_multiplicity_offsets[0]), int(bucket_multiplicity_offsets[-1]))
+        return first_graph + int(np.searchsorted(bucket_multiplicity_offsets, position, side="right")) - 1
+
+    def sample_edge_representation(self, parameter, number_of_nodes, random_instance=random,
+                                   respect_multiplicities=True):
+        ''' Returns the edge representation of a graph drawn at random from the bucket (see sample_graph_index). '''
+        return self.get_edge_representation(self.sample_graph_index(parameter, number_of_nodes, random_instance,
+                                                                    respect_multiplicities))
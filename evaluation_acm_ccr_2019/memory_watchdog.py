@@ -0,0 +1,170 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+import time
+
+from . import child_resource_usage
+
+logger = logging.getLogger(__name__)
+
+""" This module watches the memory used by the worker processes of an experiment and applies backpressure when it
+    approaches a memory budget.
+
+    The resident set size of each worker process and of all its (transitive) child processes, e.g. the JVMs running the
+    solver, is sampled from /proc. While a worker processes a chunk, its samples are attributed to the task class of the
+    chunk, i.e. its number of nodes and probability (for coupled chunks, the largest probability), yielding the peak
+    memory usage per task class. The usage of a busy worker is assumed to be at least the peak usage of its task class,
+    as the usage of a chunk may only grow after it has been sampled.
+
+    Before a chunk is handed out, the watchdog decides whether to admit it: below soft_limit (as fraction of the
+    budget), all chunks are admitted. Above it, busy workers do not prefetch further chunks and a chunk is only admitted
+    if its predicted peak usage (the peak observed for its task class or, for unobserved classes, the largest peak
+    observed for any class with at least as many nodes and at least the same probability) fits into the remaining
+    budget. Hence, large tasks are paused first, while small tasks may still be handed out; once the budget is
+    exhausted, no chunks are handed out and the number of busy workers decreases as they finish their chunks. A chunk is
+    always admitted if no worker is busy, such that the experiment cannot stall."""
+
+# fraction of the memory budget above which chunks are only admitted if their predicted usage fits into the budget
+DEFAULT_SOFT_LIMIT = 0.85
+
+# interval in seconds in which the memory usage is sampled
+DEFAULT_SAMPLE_INTERVAL = 1.0
+
+
+def _get_rss(pid):
+    ''' Returns the current resident set size of the process in bytes or None. '''
+    try:
+        with open("/proc/{}/status".format(pid), "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def get_process_tree_rss(pid):
+    ''' Returns the total resident set size in bytes of the process and all its (transitive) child processes. '''
+    return sum(_get_rss(process_pid) or 0
+               for process_pid in [pid] + child_resource_usage.get_descendant_pids(pid))
+
+
+def get_task_class(chunk):
+    ''' Returns the (number of nodes, probability) of a chunk; for coupled chunks, the largest probability is used. '''
+    if isinstance(chunk[2], tuple):
+        return chunk[1], max(chunk[2])
+    return chunk[1], chunk[2]
+
+
+def _format_bytes(number_of_bytes):
+    return "{:.1f} MiB".format(number_of_bytes / 2.0 ** 20)
+
+
+class MemoryWatchdog(object):
+    ''' Samples the memory usage of the worker processes (see sample) and decides whether chunks are handed out (see
+        admits) such that the total usage stays within memory_budget bytes.
+    '''
+
+    def __init__(self, memory_budget, soft_limit=DEFAULT_SOFT_LIMIT, sample_interval=DEFAULT_SAMPLE_INTERVAL):
+        if memory_budget <= 0:
+            raise ValueError("The memory budget must be positive, but is {}.".format(memory_budget))
+        if not 0 < soft_limit <= 1:
+            raise ValueError("The soft limit must be in (0, 1], but is {}.".format(soft_limit))
+        self.memory_budget = memory_budget
+        self.soft_limit = soft_limit
+        self.sample_interval = sample_interval
+        # the usage assumed when admitting chunks, where the usage of each busy worker is at least the predicted usage of
+        # its current chunk (as the usage may grow later), plus the predicted usage of the chunks admitted since
+        self.current_usage = 0
+        # the maximal sampled usage
+        self.peak_usage = 0
+        # maps each task class to [number of samples, peak usage of the worker process tree]
+        self.task_class_profile = {}
+        self._time_of_last_sample = None
+        self._is_throttling = False
+
+    def sample(self, processes, assigned_chunks, force=False):
+        ''' Samples the usage of the given worker processes (if forced or the sample interval has passed).
+            assigned_chunks[i] are the chunks assigned to processes[i], the first of which is being processed.
+        '''
+        now = time.time()
+        if not force and self._time_of_last_sample is not None and \
+                now - self._time_of_last_sample < self.sample_interval:
+            return
+        self._time_of_last_sample = now
+        total_usage = 0
+        assumed_usage = 0
+        for process, chunks in zip(processes, assigned_chunks):
+            if process is None or process.pid is None:
+                continue
+            usage = get_process_tree_rss(process.pid)
+            total_usage += usage
+            if chunks:
+                assumed_usage += max(usage, self.predict_usage(chunks[0]))
+                profile = self.task_class_profile.setdefault(get_task_class(chunks[0]), [0, 0])
+                profile[0] += 1
+                profile[1] = max(profile[1], usage)
+            else:
+                assumed_usage += usage
+        self.current_usage = assumed_usage
+        self.peak_usage = max(self.peak_usage, total_usage)
+
+    def predict_usage(self, chunk):
+        ''' Returns the predicted peak usage of a worker processing the chunk in bytes (0 if no prediction is possible). '''
+        task_class = get_task_class(chunk)
+        if task_class in self.task_class_profile:
+            return self.task_class_profile[task_class][1]
+        num_nodes, probability = task_class
+        return max([peak_usage for (other_num_nodes, other_probability), (_, peak_usage)
+                    in self.task_class_profile.items()
+                    if other_num_nodes >= num_nodes and other_probability >= probability] or [0])
+
+    def admits(self, chunk, number_of_busy_workers, prefetch=False):
+        ''' Returns whether the chunk may be handed out given the assumed usage. Chunks prefetched by busy workers
+            (i.e., queued behind the chunk they are processing) are only admitted below the soft limit, as their usage
+            cannot be controlled anymore once the worker has finished its current chunk.
+        '''
+        predicted_usage = self.predict_usage(chunk)
+        if number_of_busy_workers == 0 or self.current_usage < self.soft_limit * self.memory_budget or \
+                (not prefetch and self.current_usage + predicted_usage < self.memory_budget):
+            if not prefetch:
+                # reserved until the next sample, such that further chunks are admitted against the reduced budget
+                self.current_usage += predicted_usage
+            if self._is_throttling and self.current_usage < self.soft_limit * self.memory_budget:
+                logger.info("Memory usage {} of budget {}: handing out all chunks again".format(
+                    _format_bytes(self.current_usage), _format_bytes(self.memory_budget)))
+                self._is_throttling = False
+            return True
+        if not self._is_throttling:
+            logger.warning("Memory usage {} of budget {} with {} busy workers: pausing chunks like {} (predicted usage "
+                           "{})".format(_format_bytes(self.current_usage), _format_bytes(self.memory_budget),
+                                        number_of_busy_workers, get_task_class(chunk), _format_bytes(predicted_usage)))
+            self._is_throttling = True
+        return False
+
+    def log_profile(self):
+        logger.info("Peak memory usage of the workers: {} of budget {}".format(_format_bytes(self.peak_usage),
+                                                                                _format_bytes(self.memory_budget)))
+        for (num_nodes, probability), (number_of_samples, peak_usage) in sorted(self.task_class_profile.items()):
+            logger.info("Memory profile of {} nodes, probability {}: peak {} per worker ({} samples)".format(
+                num_nodes, probability, _format_bytes(peak_usage), number_of_samples))
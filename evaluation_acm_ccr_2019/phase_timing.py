@@ -0,0 +1,92 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import contextlib
+import time
+
+""" This module measures the time spent by the treewidth workers in the phases of processing a graph.
+
+    For each phase (see PHASES), both the wall time (time.perf_counter) and the CPU time of the worker process
+    (time.process_time) are accumulated by a PhaseTimer. Note that the CPU time includes all threads of the worker
+    process (e.g. when decomposing components concurrently), but not the CPU time of external solver processes. The
+    timings of a graph are stored compactly as PhaseTimings, i.e. as two tuples of floats ordered like PHASES."""
+
+# generating the random graph, computing its tree decomposition (including cache lookups, bounds, and solver calls),
+# verifying the decomposition, extracting the edge representation of stored graphs and checking their connectivity,
+# and buffering and writing the results to the result file
+PHASES = ["generation", "decomposition", "verification", "edge_representation", "connectivity_check",
+          "result_writing"]
+
+
+class PhaseTimings(object):
+    ''' The wall and CPU times per phase of a single graph, given as tuples ordered like PHASES. '''
+    __slots__ = ("wall_times", "cpu_times")
+
+    def __init__(self, wall_times, cpu_times):
+        self.wall_times = tuple(wall_times)
+        self.cpu_times = tuple(cpu_times)
+
+    def __getstate__(self):
+        return self.wall_times, self.cpu_times
+
+    def __setstate__(self, state):
+        self.wall_times, self.cpu_times = state
+
+    def get_wall_time(self, phase):
+        return self.wall_times[PHASES.index(phase)]
+
+    def get_cpu_time(self, phase):
+        return self.cpu_times[PHASES.index(phase)]
+
+    def get_total_wall_time(self):
+        return sum(self.wall_times)
+
+    def __str__(self):
+        return ", ".join("{}: {:.4f}s ({:.4f}s CPU)".format(phase, wall_time, cpu_time)
+                         for phase, wall_time, cpu_time in zip(PHASES, self.wall_times, self.cpu_times))
+
+
+class PhaseTimer(object):
+    ''' Accumulates the wall and CPU times of the phases measured via measure(phase). '''
+
+    def __init__(self):
+        self.wall_times = [0.0] * len(PHASES)
+        self.cpu_times = [0.0] * len(PHASES)
+
+    @contextlib.contextmanager
+    def measure(self, phase):
+        phase_index = PHASES.index(phase)
+        wall_time_start = time.perf_counter()
+        cpu_time_start = time.process_time()
+        try:
+            yield
+        finally:
+            self.wall_times[phase_index] += time.perf_counter() - wall_time_start
+            self.cpu_times[phase_index] += time.process_time() - cpu_time_start
+
+    def add_time(self, phase, wall_time, cpu_time):
+        phase_index = PHASES.index(phase)
+        self.wall_times[phase_index] += wall_time
+        self.cpu_times[phase_index] += cpu_time
+
+    def get_timings(self):
+        return PhaseTimings(self.wall_times, self.cpu_times)
@@ -0,0 +1,286 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+""" This module provides live telemetry of the throughput and the expected remaining time of an experiment.
+
+    Each worker process accumulates metrics per (number of nodes, probability) combination, i.e. the number of graphs,
+    the solver time, the total wall time spent per graph, and the number of graphs which could not be decomposed at all
+    (e.g. due to the timeout), and periodically publishes them to its metrics file (see WorkerMetricsPublisher). The
+    metrics files are small json files which are replaced atomically, such that they can be read at any time.
+
+    The ProgressMonitor of the parent process aggregates the metrics files in regular intervals, logs the overall
+    progress, the number of chunks not yet handed out to the workers, and an ETA, and optionally writes a snapshot in
+    the textfile format of the Prometheus node exporter. The ETA is based on the expected wall time of the remaining
+    graphs per combination, which is estimated by the mean wall time per graph observed for the combination during the
+    run or, for combinations without observations, by the runtime model (see runtime_model.RuntimeModel) scaled by the
+    observed ratio of wall time to solver time."""
+
+# interval in seconds in which the workers publish their metrics (in addition to the end of each chunk)
+DEFAULT_PUBLISH_INTERVAL = 10.0
+
+# interval in seconds in which the parent process reports the progress
+DEFAULT_REPORT_INTERVAL = 60.0
+
+# the fields of the metrics per combination
+_CELL_FIELDS = ["graphs", "solver_time", "wall_time", "timeouts"]
+
+
+def _write_atomically(path, content):
+    temporary_path = "{}.{}.tmp".format(path, os.getpid())
+    with open(temporary_path, "w") as f:
+        f.write(content)
+    os.replace(temporary_path, path)
+
+
+def read_worker_metrics(path):
+    ''' Returns the metrics published to the given file as dict or None if the file does not exist (yet). '''
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def _add_to_cells(cells, key, values):
+    cell = cells.setdefault(key, [0, 0.0, 0.0, 0])
+    for field_index, value in enumerate(values):
+        cell[field_index] += value
+
+
+def _serialize_cells(cells):
+    return [dict(zip(["num_nodes", "probability"] + _CELL_FIELDS, list(key) + list(values)))
+            for key, values in sorted(cells.items())]
+
+
+def _deserialize_cells(entries, cells):
+    for entry in entries:
+        _add_to_cells(cells, (entry["num_nodes"], entry["probability"]), [entry[field] for field in _CELL_FIELDS])
+
+
+class WorkerMetricsPublisher(object):
+    ''' Accumulates the metrics of a worker process and publishes them to its metrics file.
+
+        The metrics of graphs whose results were written to the result file of the worker are committed (see commit),
+        the others are published separately. If the metrics file exists (i.e., the worker replaces a terminated worker
+        of the same index), only its committed metrics are continued: the results of the uncommitted graphs were lost
+        and the graphs are processed again.
+    '''
+
+    def __init__(self, metrics_file, publish_interval=DEFAULT_PUBLISH_INTERVAL):
+        self.metrics_file = metrics_file
+        self.publish_interval = publish_interval
+        # maps (num_nodes, probability) to [graphs, solver_time, wall_time, timeouts]
+        self.cells = {}
+        # the (num_nodes, probability) and the metrics of each uncommitted graph in the order of their results
+        self.uncommitted_graphs = []
+        self._time_of_last_publication = time.time()
+        existing_metrics = read_worker_metrics(metrics_file)
+        if existing_metrics is not None:
+            _deserialize_cells(existing_metrics["cells"], self.cells)
+
+    def add_graph(self, num_nodes, probability, solver_time, wall_time, timed_out):
+        self.uncommitted_graphs.append(((num_nodes, probability),
+                                        [1, solver_time or 0.0, wall_time, 1 if timed_out else 0]))
+
+    def commit(self, number_of_unwritten_results=0):
+        ''' Commits the metrics of the graphs added so far except for the last number_of_unwritten_results ones, whose
+            results are still buffered by the result writer.
+        '''
+        number_of_written_results = len(self.uncommitted_graphs) - number_of_unwritten_results
+        for key, values in self.uncommitted_graphs[:number_of_written_results]:
+            _add_to_cells(self.cells, key, values)
+        del self.uncommitted_graphs[:number_of_written_results]
+
+    def publish(self, force=False):
+        ''' Writes the metrics to the metrics file if forced or if the publish interval has passed. '''
+        if not force and time.time() - self._time_of_last_publication < self.publish_interval:
+            return
+        uncommitted_cells = {}
+        for key, values in self.uncommitted_graphs:
+            _add_to_cells(uncommitted_cells, key, values)
+        metrics = dict(
+            pid=os.getpid(),
+            time=time.time(),
+            cells=_serialize_cells(self.cells),
+            uncommitted_cells=_serialize_cells(uncommitted_cells),
+        )
+        _write_atomically(self.metrics_file, json.dumps(metrics))
+        self._time_of_last_publication = time.time()
+
+
+class ProgressMonitor(object):
+    ''' Aggregates the metrics files of the workers in a background thread and reports the progress every
+        report_interval seconds.
+
+        expected_tasks maps each (num_nodes, probability) combination to the number of graphs to process in this run,
+        completed_tasks to the number of its graphs completed by earlier executions (when resuming). If expected_tasks
+        is None (e.g. for adaptive sampling), the progress is reported without ETA. get_number_of_waiting_chunks()
+        returns the number of chunks not yet handed out to the workers or None if unknown (see
+        worker_supervision.WorkerSupervisor.get_number_of_waiting_chunks).
+    '''
+
+    def __init__(self, metrics_files, expected_tasks, number_of_workers, runtime_model, completed_tasks=None,
+                 report_interval=DEFAULT_REPORT_INTERVAL, prometheus_textfile=None,
+                 get_number_of_waiting_chunks=None):
+        self.metrics_files = metrics_files
+        self.expected_tasks = expected_tasks
+        self.number_of_workers = number_of_workers
+        self.runtime_model = runtime_model
+        self.completed_tasks = completed_tasks or {}
+        self.report_interval = report_interval
+        self.prometheus_textfile = prometheus_textfile
+        self.get_number_of_waiting_chunks = get_number_of_waiting_chunks
+        self._start_time = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._start_time = time.time()
+        self._thread = threading.Thread(target=self._run, name="progress_monitor")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        ''' Stops the background thread and reports the final progress. '''
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.report()
+
+    def _run(self):
+        while not self._stop_event.wait(self.report_interval):
+            try:
+                self.report()
+            except Exception:
+                logger.exception("Could not report the progress")
+
+    def aggregate(self):
+        ''' Returns the metrics summed over all workers as dict, which maps each combination to the list
+            [graphs, solver_time, wall_time, timeouts].
+        '''
+        cells = {}
+        for metrics_file in self.metrics_files:
+            metrics = read_worker_metrics(metrics_file)
+            if metrics is None:
+                continue
+            _deserialize_cells(metrics["cells"], cells)
+            _deserialize_cells(metrics["uncommitted_cells"], cells)
+        return cells
+
+    def estimate_remaining_time(self, cells):
+        ''' Returns the expected wall time in seconds until all expected graphs are processed by the workers. '''
+        total_solver_time = sum(cell[1] for cell in cells.values())
+        total_wall_time = sum(cell[2] for cell in cells.values())
+        wall_time_per_solver_time = 1.0
+        if total_solver_time > 0 and total_wall_time > 0:
+            wall_time_per_solver_time = total_wall_time / total_solver_time
+        remaining_time = 0.0
+        for (num_nodes, probability), number_of_tasks in self.expected_tasks.items():
+            graphs, _, wall_time, _ = cells.get((num_nodes, probability), [0, 0.0, 0.0, 0])
+            number_of_remaining_tasks = max(0, number_of_tasks - graphs)
+            if number_of_remaining_tasks == 0:
+                continue
+            if graphs > 0:
+                time_per_graph = wall_time / graphs
+            else:
+                time_per_graph = self.runtime_model.predict(num_nodes, probability) * wall_time_per_solver_time
+            remaining_time += number_of_remaining_tasks * time_per_graph
+        return remaining_time / self.number_of_workers
+
+    def report(self):
+        cells = self.aggregate()
+        number_of_waiting_chunks = None
+        if self.get_number_of_waiting_chunks is not None:
+            number_of_waiting_chunks = self.get_number_of_waiting_chunks()
+        waiting_chunks = "unknown" if number_of_waiting_chunks is None else number_of_waiting_chunks
+        elapsed_time = time.time() - self._start_time
+        number_of_graphs = sum(cell[0] for cell in cells.values())
+        number_of_timeouts = sum(cell[3] for cell in cells.values())
+        graphs_per_second = number_of_graphs / elapsed_time if elapsed_time > 0 else 0.0
+        eta = None
+        if self.expected_tasks is not None:
+            eta = self.estimate_remaining_time(cells)
+            number_of_expected_tasks = sum(self.expected_tasks.values())
+            logger.info("Progress: {}/{} graphs ({:.1%}), {:.2f} graphs/s, {} timeouts, {} waiting chunks, "
+                        "ETA {}".format(number_of_graphs, number_of_expected_tasks,
+                                        number_of_graphs / float(max(1, number_of_expected_tasks)), graphs_per_second,
+                                        number_of_timeouts, waiting_chunks,
+                                        datetime.timedelta(seconds=int(round(eta)))))
+        else:
+            logger.info("Progress: {} graphs, {:.2f} graphs/s, {} timeouts, {} waiting chunks".format(
+                number_of_graphs, graphs_per_second, number_of_timeouts, waiting_chunks))
+        if self.prometheus_textfile is not None:
+            self.write_prometheus_textfile(cells, number_of_waiting_chunks, graphs_per_second, eta)
+
+    def write_prometheus_textfile(self, cells, number_of_waiting_chunks, graphs_per_second, eta):
+        ''' Writes the metrics in the textfile format of the Prometheus node exporter (replacing the file atomically). '''
+        lines = []
+
+        def add_metric(name, metric_type, description, samples):
+            lines.append("# HELP treewidth_experiment_{} {}".format(name, description))
+            lines.append("# TYPE treewidth_experiment_{} {}".format(name, metric_type))
+            for labels, value in samples:
+                label_string = ",".join('{}="{}"'.format(label, label_value) for label, label_value in labels)
+                lines.append("treewidth_experiment_{}{} {}".format(name, "{" + label_string + "}" if labels else "",
+                                                                   repr(float(value))))
+
+        cell_keys = sorted(set(cells) | set(self.expected_tasks or {}))
+
+        def cell_samples(get_value):
+            return [((("num_nodes", num_nodes), ("probability", probability)),
+                     get_value((num_nodes, probability), cells.get((num_nodes, probability), [0, 0.0, 0.0, 0])))
+                    for num_nodes, probability in cell_keys]
+
+        add_metric("graphs_total", "counter", "Number of graphs processed in this run.",
+                   cell_samples(lambda key, cell: cell[0]))
+        add_metric("solver_seconds_total", "counter", "Solver time spent in this run.",
+                   cell_samples(lambda key, cell: cell[1]))
+        add_metric("wall_seconds_total", "counter", "Wall time spent by the workers on the graphs of this run.",
+                   cell_samples(lambda key, cell: cell[2]))
+        add_metric("timeouts_total", "counter", "Number of graphs for which no tree decomposition was obtained.",
+                   cell_samples(lambda key, cell: cell[3]))
+        if self.expected_tasks is not None:
+            add_metric("cell_completion_ratio", "gauge", "Fraction of the graphs of the combination completed.",
+                       cell_samples(lambda key, cell: self._get_completion_ratio(key, cell[0])))
+        add_metric("graphs_per_second", "gauge", "Mean throughput of this run.", [((), graphs_per_second)])
+        if number_of_waiting_chunks is not None:
+            add_metric("waiting_chunks", "gauge", "Number of chunks not yet handed out to the workers.",
+                       [((), number_of_waiting_chunks)])
+        if eta is not None:
+            add_metric("eta_seconds", "gauge", "Expected remaining time of this run.", [((), eta)])
+        _write_atomically(self.prometheus_textfile, "\n".join(lines) + "\n")
+
+    def _get_completion_ratio(self, key, number_of_graphs):
+        number_of_completed_tasks = self.completed_tasks.get(key, 0)
+        number_of_tasks = number_of_completed_tasks + self.expected_tasks.get(key, 0)
+        if number_of_tasks == 0:
+            return 1.0
+        return min(1.0, (number_of_completed_tasks + number_of_graphs) / float(number_of_tasks))
@@ -0,0 +1,238 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import io
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import pickle as pickle
+except ImportError:
+    import pickle
+
+logger = logging.getLogger(__name__)
+
+""" This module contains the per-process result files of treewidth computation experiments.
+
+    Results are written in batches: each batch is pickled as a list and stored as a frame consisting of the length and
+    the CRC32 checksum of the pickle, followed by the pickle itself. Files in this format start with FILE_MAGIC. As each
+    frame is written by a single call, a crash can only leave an incomplete or corrupt frame at the end of a file, which
+    is detected by its length or checksum and discarded (or truncated upon resumption).
+
+    Files written by earlier versions, which consist of one pickle per result, can still be read and are appended to in
+    their own format."""
+
+FILE_MAGIC = b"TWRF0001"
+FRAME_HEADER = struct.Struct("<II")
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 10.0
+
+# number of results per batch when reading legacy files concurrently
+LEGACY_BATCH_SIZE = 1000
+
+
+def is_framed_result_file(filename):
+    with open(filename, "rb") as f:
+        return f.read(len(FILE_MAGIC)) == FILE_MAGIC
+
+
+class FramedResultWriter(object):
+    ''' Buffers results and appends them as frames to a per-process result file whenever batch_size results are
+        buffered, flush_interval seconds passed since the last write, or flush() is called.
+    '''
+
+    def __init__(self, filename, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.filename = filename
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.legacy_format = os.path.exists(filename) and os.path.getsize(filename) > 0 and \
+            not is_framed_result_file(filename)
+        if self.legacy_format:
+            logger.info("Appending to {} in the legacy format".format(filename))
+        self._file = open(filename, "ab")
+        if self._file.tell() == 0:
+            self._file.write(FILE_MAGIC)
+            self._file.flush()
+        self._buffered_results = []
+        self._time_of_last_write = time.time()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_result(self, result):
+        self._buffered_results.append(result)
+        if len(self._buffered_results) >= self.batch_size or \
+                time.time() - self._time_of_last_write >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self._buffered_results:
+            if self.legacy_format:
+                buffer = io.BytesIO()
+                for result in self._buffered_results:
+                    pickle.dump(result, buffer)
+                data = buffer.getvalue()
+            else:
+                payload = pickle.dumps(self._buffered_results, protocol=pickle.HIGHEST_PROTOCOL)
+                data = FRAME_HEADER.pack(len(payload), zlib.crc32(payload) & 0xffffffff) + payload
+            self._file.write(data)
+            self._file.flush()
+            self._buffered_results = []
+        self._time_of_last_write = time.time()
+
+    def get_number_of_buffered_results(self):
+        return len(self._buffered_results)
+
+    def close(self):
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+
+def _iterate_frames(f, filename):
+    ''' Yields the tuples (payload, end offset) of all complete and intact frames following the current position. '''
+    end_of_last_complete_frame = f.tell()
+    while True:
+        header = f.read(FRAME_HEADER.size)
+        if not header:
+            return
+        payload = None
+        if len(header) == FRAME_HEADER.size:
+            length, checksum = FRAME_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) != length or zlib.crc32(payload) & 0xffffffff != checksum:
+                payload = None
+        if payload is None:
+            logger.warning("File {} ends with an incomplete frame after byte {}".format(filename,
+                                                                                        end_of_last_complete_frame))
+            return
+        end_of_last_complete_frame = f.tell()
+        yield payload, end_of_last_complete_frame
+
+
+def _iterate_legacy_results(f, filename):
+    ''' Yields the tuples (result, end offset) of all complete results stored as consecutive pickles. '''
+    end_of_last_complete_result = f.tell()
+    while True:
+        try:
+            result = pickle.load(f)
+        except EOFError:
+            return
+        except (pickle.UnpicklingError, ValueError):
+            logger.warning("File {} ends with an incomplete result after byte {}".format(filename,
+                                                                                         end_of_last_complete_result))
+            return
+        end_of_last_complete_result = f.tell()
+        yield result, end_of_last_complete_result
+
+
+def read_results_from_process_file(filename, repair_incomplete_tail=False):
+    """ Generator yielding the TreeDecompositionAlgorithmResult objects stored in a per-process result file (in the
+        framed or in the legacy format).
+
+        If the process was killed while writing, the file ends with an incomplete frame (or pickle). Reading stops there
+        and, if repair_incomplete_tail is set, the file is truncated to the last complete frame, such that further
+        results can be appended.
+    """
+    with open(filename, "rb+" if repair_incomplete_tail else "rb") as f:
+        if f.read(len(FILE_MAGIC)) == FILE_MAGIC:
+            end_of_last_complete_entry = len(FILE_MAGIC)
+            for payload, end_of_last_complete_entry in _iterate_frames(f, filename):
+                for result in pickle.loads(payload):
+                    yield result
+        else:
+            f.seek(0)
+            end_of_last_complete_entry = 0
+            for result, end_of_last_complete_entry in _iterate_legacy_results(f, filename):
+                yield result
+        if repair_incomplete_tail and os.fstat(f.fileno()).st_size != end_of_last_complete_entry:
+            logger.info("Truncating {} to its last complete result".format(filename))
+            f.truncate(end_of_last_complete_entry)
+
+
+def read_results_from_process_files_concurrently(filenames, threads, max_buffered_batches=64):
+    """ Generator yielding the results stored in the given per-process result files. The files are read and the frames
+        are verified by up to threads threads concurrently, while the frames are unpickled by the calling thread. The
+        order of the results is unspecified.
+    """
+    batches = queue.Queue(maxsize=max_buffered_batches)
+    filenames = list(filenames)
+    file_queue = queue.Queue()
+    for filename in filenames:
+        file_queue.put(filename)
+
+    def read_files():
+        try:
+            while True:
+                try:
+                    filename = file_queue.get_nowait()
+                except queue.Empty:
+                    return
+                with open(filename, "rb") as f:
+                    if f.read(len(FILE_MAGIC)) == FILE_MAGIC:
+                        for payload, _ in _iterate_frames(f, filename):
+                            batches.put(("frame", payload))
+                    else:
+                        f.seek(0)
+                        legacy_batch = []
+                        for result, _ in _iterate_legacy_results(f, filename):
+                            legacy_batch.append(result)
+                            if len(legacy_batch) >= LEGACY_BATCH_SIZE:
+                                batches.put(("results", legacy_batch))
+                                legacy_batch = []
+                        batches.put(("results", legacy_batch))
+        except Exception as e:
+            batches.put(("error", e))
+        finally:
+            batches.put(("done", None))
+
+    readers = [threading.Thread(target=read_files, name="result_file_reader_{}".format(index), daemon=True)
+               for index in range(max(1, min(threads, len(filenames))))]
+    for reader in readers:
+        reader.start()
+
+    number_of_running_readers = len(readers)
+    while number_of_running_readers > 0:
+        kind, content = batches.get()
+        if kind == "done":
+            number_of_running_readers -= 1
+        elif kind == "error":
+            raise content
+        elif kind == "frame":
+            for result in pickle.loads(content):
+                yield result
+        else:
+            for result in content:
+                yield result
+    for reader in readers:
+        reader.join()
@@ -0,0 +1,119 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+import os
+
+import yaml
+
+from . import columnar_results
+
+logger = logging.getLogger(__name__)
+
+""" This module contains a simple model of the runtime of treewidth computations, keyed by the number of nodes and the
+    edge probability of the random graphs. It is used to hand out the most expensive chunks first (longest processing
+    time first), such that the worker processes finish at about the same time.
+
+    The model stores the mean runtime per (number of nodes, probability) combination and is saved as yaml file next to
+    the results of a study. Runtimes of combinations not contained in the model are predicted by the nearest contained
+    combination; if the model is empty, a heuristic cost growing with the number of nodes and peaking at probability
+    0.5 is used."""
+
+
+class RuntimeModel(object):
+    ''' Mean runtimes of treewidth computations per (number of nodes, probability) combination. '''
+
+    def __init__(self):
+        # maps (num_nodes, probability) to [number of observations, total runtime]
+        self.cells = {}
+        self._prediction_cache = {}
+
+    def add_runtime(self, num_nodes, probability, runtime, count=1):
+        ''' Adds count observations whose runtimes sum up to runtime. '''
+        cell = self.cells.setdefault((num_nodes, probability), [0, 0.0])
+        cell[0] += count
+        cell[1] += runtime
+        self._prediction_cache = {}
+
+    def add_results(self, results):
+        for result in results:
+            if result.runtime_treewidth_computation is not None:
+                self.add_runtime(result.num_nodes, result.edge_probability, result.runtime_treewidth_computation)
+
+    def merge(self, other_model):
+        for (num_nodes, probability), (count, total_runtime) in other_model.cells.items():
+            self.add_runtime(num_nodes, probability, total_runtime, count)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def get_mean_runtime(self, num_nodes, probability):
+        count, total_runtime = self.cells[(num_nodes, probability)]
+        return total_runtime / count
+
+    def predict(self, num_nodes, probability):
+        ''' Returns the predicted runtime of a single repetition. '''
+        key = (num_nodes, probability)
+        if key in self.cells:
+            return self.get_mean_runtime(num_nodes, probability)
+        if key not in self._prediction_cache:
+            self._prediction_cache[key] = self._predict_from_nearest_cell(num_nodes, probability)
+        return self._prediction_cache[key]
+
+    def _predict_from_nearest_cell(self, num_nodes, probability):
+        if not self.cells:
+            return float(num_nodes) ** 3 * probability * (1.0 - probability)
+        node_span = max(1, max(n for n, _ in self.cells) - min(n for n, _ in self.cells))
+        probability_span = max(0.01, max(p for _, p in self.cells) - min(p for _, p in self.cells))
+        nearest_num_nodes, nearest_probability = min(
+            self.cells,
+            key=lambda cell: ((cell[0] - num_nodes) / float(node_span)) ** 2 +
+                             ((cell[1] - probability) / probability_span) ** 2)
+        return self.get_mean_runtime(nearest_num_nodes, nearest_probability)
+
+    def save(self, path):
+        entries = [
+            dict(num_nodes=num_nodes, probability=probability, count=count, mean_runtime=total_runtime / count)
+            for (num_nodes, probability), (count, total_runtime) in sorted(self.cells.items())
+        ]
+        logger.info("Writing runtime model of {} combinations to {}".format(len(entries), path))
+        with open(path, "w") as f:
+            yaml.safe_dump(entries, f, default_flow_style=False)
+
+    @staticmethod
+    def load(path):
+        ''' Loads a runtime model saved by save() or builds it from aggregated results (given as pickle or in the
+            columnar format).
+        '''
+        model = RuntimeModel()
+        if columnar_results.is_columnar_results_path(path) or os.path.splitext(path)[1] == ".pickle":
+            logger.info("Building runtime model from the results {}".format(path))
+            for results_by_probability in columnar_results.load_aggregated_results(path).values():
+                for results in results_by_probability.values():
+                    model.add_results(results)
+            return model
+        with open(path, "r") as f:
+            entries = yaml.safe_load(f) or []
+        for entry in entries:
+            model.add_runtime(entry["num_nodes"], entry["probability"], entry["mean_runtime"] * entry["count"],
+                              entry["count"])
+        return model
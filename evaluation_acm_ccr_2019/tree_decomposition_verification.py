@@ -0,0 +1,169 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+import random
+import time
+
+from . import treewidth_bounds
+
+logger = logging.getLogger(__name__)
+
+""" This module verifies tree decompositions of undirected graphs.
+
+    A tree decomposition is valid if its bags form a tree, each node of the graph is contained in some bag (vertex
+    coverage), both end points of each edge are contained in a common bag (edge coverage), and the bags containing a
+    node induce a connected subtree (bag connectivity). The check operates on integer bitsets over the node indices of
+    the graph (see treewidth_bounds.BitsetGraph): as the bags containing a node induce a subforest of the tree, they are
+    connected iff their number exceeds the number of tree edges between them by exactly one.
+
+    As verifying every decomposition is costly for large dense graphs, the TreeDecompositionVerifier applies a
+    verification policy: all decompositions are verified (full), only a random fraction of them (sampled), or none
+    (off). Unlike an assert, the check is not removed when running python with -O."""
+
+VERIFICATION_POLICIES = ["full", "sampled", "off"]
+DEFAULT_VERIFICATION_POLICY = "full"
+DEFAULT_SAMPLE_RATE = 0.1
+
+
+class InvalidTreeDecompositionError(Exception):
+    ''' Raised if a tree decomposition is not valid for its graph. '''
+    pass
+
+
+def find_tree_decomposition_violation(bitset_graph, tree_decomposition):
+    ''' Returns the description of the first violated property of the tree decomposition with respect to the graph
+        given as BitsetGraph or None if the tree decomposition is valid. Among several nodes or edges violating the
+        same property, the smallest one is reported, such that the description does not depend on the node indices.
+    '''
+    node_index = {node: index for index, node in enumerate(bitset_graph.nodes)}
+    bag_index = {bag_node: index for index, bag_node in enumerate(tree_decomposition.node_bag_dict)}
+    bags = []
+    for bag_node, bag in tree_decomposition.node_bag_dict.items():
+        bitset = 0
+        for node in bag:
+            if node not in node_index:
+                return "bag {} contains node {}, which is not contained in the graph".format(bag_node, node)
+            bitset |= 1 << node_index[node]
+        bags.append(bitset)
+
+    # the bags must form a tree: the decomposition is connected and has one edge less than bags
+    tree_edges = []
+    for edge in tree_decomposition.edges:
+        bag_node_1, bag_node_2 = tuple(edge)
+        if bag_node_1 not in bag_index or bag_node_2 not in bag_index:
+            return "edge ({}, {}) of the decomposition connects unknown bags".format(bag_node_1, bag_node_2)
+        tree_edges.append((bag_index[bag_node_1], bag_index[bag_node_2]))
+    if bags and len(tree_edges) != len(bags) - 1:
+        return "the decomposition has {} bags but {} edges".format(len(bags), len(tree_edges))
+    parent = list(range(len(bags)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    for i, j in tree_edges:
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j:
+            return "the decomposition contains a cycle"
+        parent[root_i] = root_j
+
+    # vertex coverage
+    covered_nodes = 0
+    for bitset in bags:
+        covered_nodes |= bitset
+    uncovered_nodes = ((1 << len(bitset_graph)) - 1) & ~covered_nodes
+    if uncovered_nodes:
+        node = min(bitset_graph.nodes[v] for v in treewidth_bounds.iterate_bits(uncovered_nodes))
+        return "node {} is not contained in any bag".format(node)
+
+    # edge coverage: the neighbors of each node must be contained in the union of the bags containing it
+    covered_neighbors = [0] * len(bitset_graph)
+    number_of_bags = [0] * len(bitset_graph)
+    for bitset in bags:
+        for v in treewidth_bounds.iterate_bits(bitset):
+            covered_neighbors[v] |= bitset
+            number_of_bags[v] += 1
+    uncovered_edges = [tuple(sorted((bitset_graph.nodes[v], bitset_graph.nodes[u])))
+                       for v, neighbors in enumerate(bitset_graph.adjacency)
+                       for u in treewidth_bounds.iterate_bits(neighbors & ~covered_neighbors[v])]
+    if uncovered_edges:
+        return "edge ({}, {}) is not contained in any bag".format(*min(uncovered_edges))
+
+    # bag connectivity
+    number_of_tree_edges = [0] * len(bitset_graph)
+    for i, j in tree_edges:
+        for v in treewidth_bounds.iterate_bits(bags[i] & bags[j]):
+            number_of_tree_edges[v] += 1
+    disconnected_nodes = [bitset_graph.nodes[v] for v in range(len(bitset_graph))
+                          if number_of_bags[v] - number_of_tree_edges[v] != 1]
+    if disconnected_nodes:
+        return "the bags containing node {} are not connected".format(min(disconnected_nodes))
+    return None
+
+
+def verify_tree_decomposition(graph, tree_decomposition):
+    ''' Raises an InvalidTreeDecompositionError if the tree decomposition is not valid for the undirected graph. '''
+    violation = find_tree_decomposition_violation(treewidth_bounds.BitsetGraph.from_undirected_graph(graph),
+                                                  tree_decomposition)
+    if violation is not None:
+        raise InvalidTreeDecompositionError("Invalid tree decomposition of graph {}: {}".format(graph.name, violation))
+
+
+class TreeDecompositionVerifier(object):
+    ''' Verifies tree decompositions according to the verification policy (see VERIFICATION_POLICIES). When sampling,
+        each decomposition is verified with probability sample_rate, drawn from a random number generator seeded by
+        random_seed.
+    '''
+
+    def __init__(self, policy=DEFAULT_VERIFICATION_POLICY, sample_rate=DEFAULT_SAMPLE_RATE, random_seed=None):
+        if policy not in VERIFICATION_POLICIES:
+            raise ValueError("Unknown verification policy {}; must be one of {}".format(policy, VERIFICATION_POLICIES))
+        if not 0.0 < sample_rate <= 1.0:
+            raise ValueError("The verification sample rate must lie in (0, 1], but is {}.".format(sample_rate))
+        self.policy = policy
+        self.sample_rate = sample_rate
+        self.random = random.Random(random_seed)
+        self.number_of_verifications = 0
+        self.total_verification_time = 0.0
+
+    def should_verify(self):
+        if self.policy == "full":
+            return True
+        if self.policy == "sampled":
+            return self.random.random() < self.sample_rate
+        return False
+
+    def verify(self, graph, tree_decomposition):
+        ''' Verifies the tree decomposition if required by the policy and returns the time spent on verification, or
+            None if the decomposition was not verified.
+        '''
+        if tree_decomposition is None or not self.should_verify():
+            return None
+        verification_time_start = time.perf_counter()
+        verify_tree_decomposition(graph, tree_decomposition)
+        verification_time = time.perf_counter() - verification_time_start
+        self.number_of_verifications += 1
+        self.total_verification_time += verification_time
+        return verification_time
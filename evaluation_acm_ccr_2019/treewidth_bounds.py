@@ -0,0 +1,214 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+
+import vnep_approx.treewidth_model as twm
+
+logger = logging.getLogger(__name__)
+
+""" This module contains fast lower and upper bounds on the treewidth of (small) undirected graphs.
+
+    Lower bounds are given by the degeneracy and by the minor-min-width of the graph, while upper bounds are obtained by
+    eliminating the nodes according to the min-degree and min-fill heuristics. If the best lower bound equals the best
+    upper bound, the tree decomposition induced by the elimination ordering is optimal and computing the treewidth
+    exactly is unnecessary. This is frequently the case for forests, cycles, complete graphs, and very sparse or dense
+    random graphs.
+
+    Internally, the neighborhood of each node is stored as an integer bitset over the node indices."""
+
+ELIMINATION_HEURISTICS = ["min_degree", "min_fill"]
+
+
+def popcount(bitset):
+    ''' Returns the number of nodes in the bitset. '''
+    return bin(bitset).count("1")
+
+
+def iterate_bits(bitset):
+    ''' Yields the indices of the nodes in the bitset in increasing order. '''
+    while bitset:
+        lowest_bit = bitset & -bitset
+        yield lowest_bit.bit_length() - 1
+        bitset ^= lowest_bit
+
+
+class BitsetGraph(object):
+    ''' Undirected graph whose nodes are indexed by 0, ..., n-1 and whose neighborhoods are stored as bitsets. '''
+
+    def __init__(self, nodes, edges):
+        self.nodes = list(nodes)
+        node_index = {node: index for index, node in enumerate(self.nodes)}
+        self.adjacency = [0] * len(self.nodes)
+        for edge in edges:
+            i, j = [node_index[node] for node in edge]
+            self.adjacency[i] |= 1 << j
+            self.adjacency[j] |= 1 << i
+
+    @staticmethod
+    def from_undirected_graph(graph):
+        # the nodes are indexed in sorted order (rather than in the order of the node set, which depends on the hash
+        # seed), such that ties in the heuristics are broken reproducibly
+        return BitsetGraph(sorted(graph.nodes), graph.edges)
+
+    def __len__(self):
+        return len(self.nodes)
+
+
+def degeneracy_lower_bound(bitset_graph):
+    ''' Returns the degeneracy of the graph, i.e. the maximum over the minimum degrees observed when repeatedly removing
+        a node of minimum degree.
+    '''
+    adjacency = list(bitset_graph.adjacency)
+    remaining = set(range(len(adjacency)))
+    lower_bound = 0
+    while remaining:
+        v = min(remaining, key=lambda u: popcount(adjacency[u]))
+        lower_bound = max(lower_bound, popcount(adjacency[v]))
+        remaining.remove(v)
+        for u in iterate_bits(adjacency[v]):
+            adjacency[u] &= ~(1 << v)
+    return lower_bound
+
+
+def minor_min_width_lower_bound(bitset_graph):
+    ''' Returns the minor-min-width of the graph: a node of minimum degree is repeatedly contracted into its neighbor of
+        minimum degree (or removed if isolated), and the maximum over the observed minimum degrees is a lower bound on
+        the treewidth, as the treewidth of a minor never exceeds the treewidth of the graph.
+    '''
+    adjacency = list(bitset_graph.adjacency)
+    remaining = set(range(len(adjacency)))
+    lower_bound = 0
+    while remaining:
+        v = min(remaining, key=lambda u: popcount(adjacency[u]))
+        lower_bound = max(lower_bound, popcount(adjacency[v]))
+        remaining.remove(v)
+        neighbors = adjacency[v]
+        if neighbors:
+            u = min(iterate_bits(neighbors), key=lambda w: popcount(adjacency[w]))
+            # contract v into u: u inherits the neighbors of v
+            for w in iterate_bits(neighbors & ~(1 << u)):
+                adjacency[w] = (adjacency[w] & ~(1 << v)) | (1 << u)
+            adjacency[u] = (adjacency[u] | neighbors) & ~((1 << u) | (1 << v))
+        adjacency[v] = 0
+    return lower_bound
+
+
+def _fill_in(adjacency, v):
+    ''' Returns the number of edges to be added among the neighbors of v when eliminating v. '''
+    neighbors = adjacency[v]
+    missing_edges = 0
+    for u in iterate_bits(neighbors):
+        missing_edges += popcount(neighbors & ~adjacency[u] & ~(1 << u))
+    return missing_edges // 2
+
+
+def compute_elimination_ordering(bitset_graph, heuristic="min_degree"):
+    ''' Returns the tuple (elimination ordering, width) obtained by greedily eliminating nodes according to the given
+        heuristic (see ELIMINATION_HEURISTICS). Ties are broken by the node index.
+    '''
+    if heuristic == "min_degree":
+        priority = lambda adjacency, v: popcount(adjacency[v])
+    elif heuristic == "min_fill":
+        priority = lambda adjacency, v: (_fill_in(adjacency, v), popcount(adjacency[v]))
+    else:
+        raise ValueError("Unknown elimination heuristic {}; must be one of {}".format(heuristic, ELIMINATION_HEURISTICS))
+
+    adjacency = list(bitset_graph.adjacency)
+    remaining = set(range(len(adjacency)))
+    ordering = []
+    width = 0
+    while remaining:
+        v = min(remaining, key=lambda u: (priority(adjacency, u), u))
+        neighbors = adjacency[v]
+        width = max(width, popcount(neighbors))
+        # make the neighborhood of v a clique and remove v
+        for u in iterate_bits(neighbors):
+            adjacency[u] = (adjacency[u] | neighbors) & ~((1 << u) | (1 << v))
+        adjacency[v] = 0
+        remaining.remove(v)
+        ordering.append(v)
+    return ordering, width
+
+
+def tree_decomposition_from_elimination_ordering(bitset_graph, ordering):
+    ''' Returns the tree decomposition induced by the elimination ordering: the bag of each node consists of the node
+        and its neighbors at the time of its elimination and is attached to the bag of the first eliminated of these
+        neighbors. The bags of the (otherwise disconnected) components are attached to the last bag.
+    '''
+    adjacency = list(bitset_graph.adjacency)
+    position = {v: index for index, v in enumerate(ordering)}
+    later_neighbors = {}
+    for v in ordering:
+        neighbors = adjacency[v]
+        later_neighbors[v] = neighbors
+        for u in iterate_bits(neighbors):
+            adjacency[u] = (adjacency[u] | neighbors) & ~((1 << u) | (1 << v))
+        adjacency[v] = 0
+
+    tree_decomposition = twm.TreeDecomposition("elimination_ordering_decomposition")
+    bag_names = {v: "bag_{}".format(index) for index, v in enumerate(ordering)}
+    for v in ordering:
+        bag = [bitset_graph.nodes[u] for u in iterate_bits(later_neighbors[v] | (1 << v))]
+        tree_decomposition.add_node(bag_names[v], node_bag=frozenset(bag))
+    for v in ordering[:-1]:
+        if later_neighbors[v]:
+            parent = min(iterate_bits(later_neighbors[v]), key=lambda u: position[u])
+        else:
+            parent = ordering[-1]
+        tree_decomposition.add_edge(bag_names[v], bag_names[parent])
+    return tree_decomposition
+
+
+class TreewidthBounds(object):
+    ''' Lower and upper bound on the treewidth of a graph together with the elimination ordering attaining the upper
+        bound.
+    '''
+
+    def __init__(self, lower_bound, upper_bound, elimination_ordering, heuristic):
+        self.lower_bound = lower_bound
+        self.upper_bound = upper_bound
+        self.elimination_ordering = elimination_ordering
+        self.heuristic = heuristic
+
+    def is_tight(self):
+        return self.lower_bound == self.upper_bound
+
+
+def compute_treewidth_bounds(bitset_graph):
+    ''' Computes the degeneracy and the minor-min-width lower bounds and the min-degree and min-fill upper bounds. The
+        more expensive bounds are skipped once the bounds match.
+    '''
+    lower_bound = degeneracy_lower_bound(bitset_graph)
+    ordering, upper_bound = compute_elimination_ordering(bitset_graph, "min_degree")
+    bounds = TreewidthBounds(lower_bound, upper_bound, ordering, "min_degree")
+    if bounds.is_tight():
+        return bounds
+    bounds.lower_bound = max(bounds.lower_bound, minor_min_width_lower_bound(bitset_graph))
+    if bounds.is_tight():
+        return bounds
+    ordering, upper_bound = compute_elimination_ordering(bitset_graph, "min_fill")
+    if upper_bound < bounds.upper_bound:
+        bounds.upper_bound = upper_bound
+        bounds.elimination_ordering = ordering
+        bounds.heuristic = "min_fill"
+    return bounds
@@ -0,0 +1,120 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import logging
+import sqlite3
+
+import vnep_approx.treewidth_model as twm
+
+from . import canonical_labeling
+
+try:
+    import pickle as pickle
+except ImportError:
+    import pickle
+
+logger = logging.getLogger(__name__)
+
+""" This module contains an on-disk cache of tree decompositions, which is keyed by the canonical form of the decomposed
+    graph (see canonical_labeling) and can be shared by several processes.
+
+    The tree decompositions are stored in terms of the canonical node indices and are translated to the nodes of the
+    graph at hand upon a cache hit."""
+
+# only graphs with at most this number of nodes are looked up in the cache by default
+DEFAULT_MAX_NODES = 12
+
+# seconds to wait for a lock on the cache held by another process
+SQLITE_TIMEOUT = 60.0
+
+
+class CanonicalGraph(object):
+    ''' A graph together with its canonical form and the mapping of its nodes to their canonical indices. '''
+
+    def __init__(self, graph, canonical_form, labeling):
+        self.graph = graph
+        self.canonical_form = canonical_form
+        self.labeling = labeling
+
+
+class TreewidthCache(object):
+    ''' Cache mapping canonical forms of graphs to their tree decompositions, stored in a sqlite database. Lookups and
+        hits are counted to report the hit rate.
+    '''
+
+    def __init__(self, path, max_nodes=DEFAULT_MAX_NODES, max_leaves=canonical_labeling.DEFAULT_MAX_LEAVES):
+        self.path = path
+        self.max_nodes = max_nodes
+        self.max_leaves = max_leaves
+        self.number_of_lookups = 0
+        self.number_of_hits = 0
+        self._connection = sqlite3.connect(path, timeout=SQLITE_TIMEOUT)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS tree_decompositions ("
+                                 "canonical_form TEXT PRIMARY KEY, "
+                                 "treewidth INTEGER NOT NULL, "
+                                 "tree_decomposition BLOB NOT NULL)")
+        self._connection.commit()
+
+    def canonicalize(self, graph):
+        ''' Returns the CanonicalGraph of the given graph or None if the graph is too large to be cached. '''
+        if len(graph.nodes) > self.max_nodes:
+            return None
+        canonical_form = canonical_labeling.compute_canonical_form(graph.nodes, graph.edges, self.max_leaves)
+        if canonical_form is None:
+            return None
+        return CanonicalGraph(graph, *canonical_form)
+
+    def lookup(self, canonical_graph):
+        ''' Returns the cached tree decomposition of the graph (in terms of its nodes) or None upon a cache miss. '''
+        self.number_of_lookups += 1
+        row = self._connection.execute("SELECT tree_decomposition FROM tree_decompositions WHERE canonical_form = ?",
+                                       (canonical_graph.canonical_form,)).fetchone()
+        if row is None:
+            return None
+        self.number_of_hits += 1
+        bags, tree_edges = pickle.loads(row[0])
+        node_of_label = {label: node for node, label in canonical_graph.labeling.items()}
+        tree_decomposition = twm.TreeDecomposition("cached_decomposition_{}".format(canonical_graph.graph.name))
+        for bag_node, bag in bags:
+            tree_decomposition.add_node(bag_node, node_bag=frozenset(node_of_label[label] for label in bag))
+        for bag_node_1, bag_node_2 in tree_edges:
+            tree_decomposition.add_edge(bag_node_1, bag_node_2)
+        return tree_decomposition
+
+    def store(self, canonical_graph, tree_decomposition):
+        bags = [(bag_node, sorted(canonical_graph.labeling[node] for node in bag))
+                for bag_node, bag in tree_decomposition.node_bag_dict.items()]
+        tree_edges = [tuple(edge) for edge in tree_decomposition.edges]
+        serialized_tree_decomposition = pickle.dumps((bags, tree_edges), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connection:
+            self._connection.execute("INSERT OR IGNORE INTO tree_decompositions VALUES (?, ?, ?)",
+                                     (canonical_graph.canonical_form, tree_decomposition.width,
+                                      sqlite3.Binary(serialized_tree_decomposition)))
+
+    def get_hit_rate(self):
+        if self.number_of_lookups == 0:
+            return 0.0
+        return float(self.number_of_hits) / self.number_of_lookups
+
+    def close(self):
+        self._connection.close()
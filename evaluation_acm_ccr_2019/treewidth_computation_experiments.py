@@ -20,6 +20,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import collections
+import glob
 import itertools
 import multiprocessing as mp
 import os
@@ -27,11 +29,15 @@ import random
 import time
 import logging
 
-import vnep_approx.treewidth_model as twm
+import numpy as np
 import yaml
 
 from alib import datamodel, util
 
+from . import adaptive_sampling, child_resource_usage, columnar_results, decomposition_backends, exact_treewidth, \
+    memory_watchdog, phase_timing, progress_telemetry, result_files, runtime_model, \
+    tree_decomposition_verification, treewidth_bounds, treewidth_cache, treewidth_preprocessing, worker_supervision
+
 try:
     import pickle as pickle
 except ImportError:
@@ -48,25 +54,628 @@ logger = logging.getLogger(__name__)
     - the number of repetitions."""
 
 
-def run_experiment_from_yaml(parameter_file, output_file_base_name, threads, timeout,remove_intermediate_solutions):
-    param_space = yaml.load(parameter_file)
-    sg = SimpleTreeDecompositionExperiment(threads, output_file_base_name, timeout, remove_intermediate_solutions)
+DEFAULT_CHUNK_SIZE = 10
+
+# formats in which the aggregated results can be written (see columnar_results for the columnar format)
+AGGREGATED_RESULT_FORMATS = ["pickle", "columnar", "both"]
+
+# orders in which the chunks are handed out: by descending predicted runtime (longest processing time first) or in the
+# order of itertools.product
+TASK_ORDERS = ["lpt", "product"]
+
+# how the tree decomposition of a result was obtained: by the solver, from the treewidth cache, by matching bounds,
+# from the decomposition of a coupled graph of a larger probability and equal treewidth, by safe reductions alone, or by
+# the in-process exact solver for small graphs. In anytime mode, graphs which the solver failed to decompose are
+# decomposed heuristically (method "heuristic"), in which case the decomposition is not necessarily optimal.
+DECOMPOSITION_METHODS = ["solver", "cache", "bounds", "coupling", "reduction", "exact", "heuristic"]
+
+# connection probabilities are converted to integers with this resolution when deriving the seed of a task
+PROBABILITY_SEED_RESOLUTION = 10 ** 6
+
+# maximal number of random numbers skipped at once when fast-forwarding the legacy random stream (see
+# LegacyGraphSequence), which bounds the size of the integers drawn to 32 KiB
+LEGACY_SKIP_STEP = 2 ** 12
+
+
+def run_experiment_from_yaml(parameter_file, output_file_base_name, threads, timeout, remove_intermediate_solutions,
+                             chunk_size=DEFAULT_CHUNK_SIZE, resume=False, shard=None, aggregated_format="pickle",
+                             use_treewidth_cache=False,
+                             treewidth_cache_max_nodes=treewidth_cache.DEFAULT_MAX_NODES, use_treewidth_bounds=False,
+                             use_preprocessing=False, component_threads=1, exact_solver_max_nodes=0, anytime=False,
+                             backend=decomposition_backends.DEFAULT_BACKEND,
+                             verification_policy=tree_decomposition_verification.DEFAULT_VERIFICATION_POLICY,
+                             verification_sample_rate=tree_decomposition_verification.DEFAULT_SAMPLE_RATE,
+                             task_order="lpt", runtime_model_file=None,
+                             max_chunk_attempts=worker_supervision.DEFAULT_MAX_CHUNK_ATTEMPTS,
+                             progress_interval=progress_telemetry.DEFAULT_REPORT_INTERVAL, prometheus_textfile=None,
+                             memory_budget=None, memory_soft_limit=memory_watchdog.DEFAULT_SOFT_LIMIT):
+    param_space = yaml.safe_load(parameter_file)
+    sg = SimpleTreeDecompositionExperiment(threads, output_file_base_name, timeout, remove_intermediate_solutions,
+                                           chunk_size=chunk_size, resume=resume, shard=shard,
+                                           aggregated_format=aggregated_format,
+                                           use_treewidth_cache=use_treewidth_cache,
+                                           treewidth_cache_max_nodes=treewidth_cache_max_nodes,
+                                           use_treewidth_bounds=use_treewidth_bounds,
+                                           use_preprocessing=use_preprocessing,
+                                           component_threads=component_threads,
+                                           exact_solver_max_nodes=exact_solver_max_nodes,
+                                           anytime=anytime,
+                                           backend=backend,
+                                           verification_policy=verification_policy,
+                                           verification_sample_rate=verification_sample_rate,
+                                           task_order=task_order,
+                                           runtime_model_file=runtime_model_file,
+                                           max_chunk_attempts=max_chunk_attempts,
+                                           progress_interval=progress_interval,
+                                           prometheus_textfile=prometheus_textfile,
+                                           memory_budget=memory_budget,
+                                           memory_soft_limit=memory_soft_limit)
     sg.start_experiments(param_space)
 
 
+def parse_shard(shard_string):
+    """ Parses a shard specification of the form "i/N" (with 0 <= i < N) and returns the tuple (i, N). """
+    try:
+        shard_index, number_of_shards = [int(part) for part in shard_string.split("/")]
+    except ValueError:
+        raise ValueError("Invalid shard specification {}; expected the form i/N.".format(shard_string))
+    if number_of_shards < 1 or not 0 <= shard_index < number_of_shards:
+        raise ValueError("Invalid shard specification {}; expected 0 <= i < N.".format(shard_string))
+    return shard_index, number_of_shards
+
+
+def derive_task_seed(random_seed_base, num_nodes, probability, repetition_index):
+    """ Derives the seed of the random graph of a single task from the random_seed_base and the task's coordinates.
+        Hence, the generated graphs neither depend on the number of processes nor on the partitioning of the tasks.
+    """
+    seed_sequence = np.random.SeedSequence([random_seed_base,
+                                            num_nodes,
+                                            int(round(probability * PROBABILITY_SEED_RESOLUTION)),
+                                            repetition_index])
+    return int(seed_sequence.generate_state(1, dtype=np.uint64)[0])
+
+
+def derive_coupled_seed(random_seed_base, num_nodes, repetition_index):
+    """ Derives the seed of the coupled random graphs of all probabilities of a single repetition (see
+        SimpleRandomGraphGenerator.generate_coupled_edge_arrays). The seeds differ from those of derive_task_seed.
+    """
+    seed_sequence = np.random.SeedSequence([random_seed_base, num_nodes, repetition_index], spawn_key=(1,))
+    return int(seed_sequence.generate_state(1, dtype=np.uint64)[0])
+
+
+def _count_congruent_integers(start, end, remainder, modulus):
+    """ Returns the number of integers x with start <= x < end and x % modulus == remainder. """
+    return (end - remainder - 1) // modulus - (start - remainder - 1) // modulus
+
+
+def _skip_random_numbers(count):
+    """ Advances the state of python's random module as if random.random() was called count times. Each call of
+        random.random() consumes two 32-bit outputs of the Mersenne Twister, as does each 64 bits of random.getrandbits.
+    """
+    while count > 0:
+        step = min(count, LEGACY_SKIP_STEP)
+        random.getrandbits(64 * step)
+        count -= step
+
+
+class LegacyGraphSequence(object):
+    """ Reproduces the graphs of studies executed before the random number generator was seeded per task (using the legacy
+        graph generation engine). In these studies, each of the number_of_processes processes seeded python's random
+        module with random_seed_base + process_index and generated, in this order, the graphs of the tasks whose index in
+        itertools.product(num_nodes_list, connection_probabilities_list, range(repetitions)) is congruent to the process
+        index modulo the number of processes. Generating a graph consumes one random number per node pair.
+
+        The random state of a task is obtained by fast-forwarding the random stream of its original process over the
+        random numbers drawn for the preceding tasks of that process. The last state reached in each stream is kept,
+        such that tasks processed in the order of the parameter space only fast-forward over the tasks in between.
+    """
+
+    def __init__(self, num_nodes_list, connection_probabilities_list, repetitions, random_seed_base,
+                 number_of_processes):
+        if number_of_processes < 1:
+            raise ValueError("The number of processes of the legacy study must be positive, but is {}.".format(
+                number_of_processes))
+        self.num_nodes_list = list(num_nodes_list)
+        self.connection_probabilities_list = list(connection_probabilities_list)
+        self.repetitions = repetitions
+        self.random_seed_base = random_seed_base
+        self.number_of_processes = number_of_processes
+        # maps the original process index to (number of random numbers drawn, state of the random module)
+        self._streams = {}
+
+    def get_task_index(self, num_nodes, prob, repetition_index):
+        if not 0 <= repetition_index < self.repetitions:
+            raise ValueError("Repetition {} is not part of the legacy study of {} repetitions".format(
+                repetition_index, self.repetitions))
+        return ((self.num_nodes_list.index(num_nodes) * len(self.connection_probabilities_list) +
+                 self.connection_probabilities_list.index(prob)) * self.repetitions + repetition_index)
+
+    def get_number_of_preceding_random_numbers(self, task_index):
+        """ Returns the number of random numbers drawn by the original process of the task before generating it. """
+        process_index = task_index % self.number_of_processes
+        tasks_per_num_nodes = len(self.connection_probabilities_list) * self.repetitions
+        number_of_random_numbers = 0
+        for num_nodes_index, num_nodes in enumerate(self.num_nodes_list):
+            start = num_nodes_index * tasks_per_num_nodes
+            end = min(start + tasks_per_num_nodes, task_index)
+            if end <= start:
+                break
+            number_of_tasks = _count_congruent_integers(start, end, process_index, self.number_of_processes)
+            number_of_random_numbers += number_of_tasks * (num_nodes * (num_nodes - 1) // 2)
+        return number_of_random_numbers
+
+    def generate_graph(self, graph_generator, num_nodes, prob, repetition_index):
+        """ Returns the graph of the task as generated by the legacy study using the given (legacy) graph generator. """
+        task_index = self.get_task_index(num_nodes, prob, repetition_index)
+        process_index = task_index % self.number_of_processes
+        position = self.get_number_of_preceding_random_numbers(task_index)
+        stream_position, state = self._streams.get(process_index, (None, None))
+        if stream_position is None or stream_position > position:
+            random.seed(self.random_seed_base + process_index)
+            stream_position = 0
+        else:
+            random.setstate(state)
+        _skip_random_numbers(position - stream_position)
+        graph = graph_generator.generate_graph(num_nodes, prob)
+        self._streams[process_index] = (position + num_nodes * (num_nodes - 1) // 2, random.getstate())
+        return graph
+
+
+def create_legacy_graph_sequence(param_space, number_of_processes=1):
+    """ Returns the LegacyGraphSequence of the parameter space if it uses the legacy graph generation engine and None
+        otherwise. The number of processes of the legacy study is given by legacy_number_of_processes and defaults to
+        number_of_processes.
+    """
+    if param_space.get('graph_generation_engine') != "legacy":
+        return None
+    return LegacyGraphSequence(param_space["number_of_nodes"],
+                               param_space["probability"],
+                               param_space.get('scenario_repetition', 1),
+                               param_space.get('random_seed_base', 0),
+                               param_space.get('legacy_number_of_processes', number_of_processes))
+
+
+def generate_work_chunks(num_nodes_list, connection_probabilities_list, repetitions, chunk_size, shard=None,
+                         completed_tasks=None):
+    """ Splits the parameter space into chunks of at most chunk_size repetitions of a single (number of nodes, probability)
+        combination. Chunks are enumerated in the order of itertools.product and each chunk is given by the tuple
+        (chunk_index, num_nodes, probability, repetition_indices).
+
+        If a shard (i, N) is given, only the tasks whose index in the order of itertools.product is congruent to i
+        modulo N are considered. Tasks contained in completed_tasks (a set or dict) are omitted.
+    """
+    if chunk_size < 1:
+        raise ValueError("The chunk size must be positive, but is {}.".format(chunk_size))
+    shard_index, number_of_shards = shard if shard is not None else (0, 1)
+    if completed_tasks is None:
+        completed_tasks = set()
+    chunk_index = 0
+    for cell_index, (num_nodes, prob) in enumerate(itertools.product(num_nodes_list, connection_probabilities_list)):
+        first_task_index = cell_index * repetitions
+        repetition_indices = [
+            repetition_index for repetition_index in range(repetitions)
+            if (first_task_index + repetition_index) % number_of_shards == shard_index
+            and (num_nodes, prob, repetition_index) not in completed_tasks
+        ]
+        for chunk_start in range(0, len(repetition_indices), chunk_size):
+            yield chunk_index, num_nodes, prob, tuple(repetition_indices[chunk_start:chunk_start + chunk_size])
+            chunk_index += 1
+
+
+def generate_coupled_work_chunks(num_nodes_list, connection_probabilities_list, repetitions, chunk_size, shard=None,
+                                 completed_tasks=None):
+    """ Splits the parameter space into chunks of at most chunk_size repetitions of a single number of nodes, where each
+        repetition comprises the coupled graphs of all probabilities. Each chunk is given by the tuple
+        (chunk_index, num_nodes, probabilities, repetition_indices, completed_tasks), where completed_tasks is the set of
+        (probability, repetition_index) tuples of the chunk which must not be recorded again.
+
+        If a shard (i, N) is given, only the repetitions whose index in the order of itertools.product (over the numbers
+        of nodes and the repetitions) is congruent to i modulo N are considered. Repetitions whose tasks are all
+        contained in completed_tasks are omitted.
+    """
+    if chunk_size < 1:
+        raise ValueError("The chunk size must be positive, but is {}.".format(chunk_size))
+    shard_index, number_of_shards = shard if shard is not None else (0, 1)
+    if completed_tasks is None:
+        completed_tasks = set()
+    probabilities = tuple(connection_probabilities_list)
+    chunk_index = 0
+    for num_nodes_index, num_nodes in enumerate(num_nodes_list):
+        first_task_index = num_nodes_index * repetitions
+        repetition_indices = []
+        completed_tasks_of_repetitions = set()
+        for repetition_index in range(repetitions):
+            if (first_task_index + repetition_index) % number_of_shards != shard_index:
+                continue
+            completed_probabilities = [prob for prob in probabilities
+                                       if (num_nodes, prob, repetition_index) in completed_tasks]
+            if len(completed_probabilities) == len(probabilities):
+                continue
+            repetition_indices.append(repetition_index)
+            completed_tasks_of_repetitions.update((prob, repetition_index) for prob in completed_probabilities)
+        for chunk_start in range(0, len(repetition_indices), chunk_size):
+            chunk_repetition_indices = tuple(repetition_indices[chunk_start:chunk_start + chunk_size])
+            chunk_completed_tasks = frozenset(task for task in completed_tasks_of_repetitions
+                                              if task[1] in chunk_repetition_indices)
+            yield chunk_index, num_nodes, probabilities, chunk_repetition_indices, chunk_completed_tasks
+            chunk_index += 1
+
+
+def merge_aggregated_results(list_of_result_dicts):
+    """ Merges several aggregated result dicts (mapping number of nodes to probability to list of results), e.g. the
+        results of the different shards of a study. The results of each (number of nodes, probability) combination are
+        sorted by their repetition index, such that the merged results do not depend on the partitioning of the tasks.
+    """
+    merged_result_dict = {}
+    for result_dict in list_of_result_dicts:
+        for num_nodes, results_by_probability in result_dict.items():
+            merged_results_by_probability = merged_result_dict.setdefault(num_nodes, {})
+            for prob, list_of_results in results_by_probability.items():
+                merged_results_by_probability.setdefault(prob, []).extend(list_of_results)
+
+    for results_by_probability in merged_result_dict.values():
+        for prob, list_of_results in results_by_probability.items():
+            list_of_results.sort(key=lambda result: result.repetition_index)
+            repetition_indices = [result.repetition_index for result in list_of_results]
+            if len(set(repetition_indices)) != len(repetition_indices):
+                logger.warning("Found duplicate repetitions for {} nodes and probability {}".format(
+                    list_of_results[0].num_nodes, prob))
+    return merged_result_dict
+
+
+def combine_aggregated_result_pickles(input_pickle_files, output_pickle_file):
+    """ Merges the aggregated result pickles of several shards into a single aggregated result pickle. If all inputs
+        are given in the columnar format, the output is written in the columnar format as well.
+    """
+    if all(columnar_results.is_columnar_results_path(input_file) for input_file in input_pickle_files):
+        with columnar_results.ColumnarResultsWriter(output_pickle_file) as writer:
+            for input_file in input_pickle_files:
+                logger.info("Reading columnar results from {}".format(input_file))
+                for result in columnar_results.ColumnarResults(input_file).iter_results():
+                    writer.add_result(result)
+        return
+
+    list_of_result_dicts = []
+    for input_pickle_file in input_pickle_files:
+        logger.info("Reading aggregated results from {}".format(input_pickle_file))
+        with open(input_pickle_file, "rb") as f:
+            list_of_result_dicts.append(pickle.load(f))
+    merged_result_dict = merge_aggregated_results(list_of_result_dicts)
+    logger.info("Writing combined Pickle to {}".format(output_pickle_file))
+    with open(output_pickle_file, "wb") as f:
+        pickle.dump(merged_result_dict, f)
+
+
+def split_chunk_by_completed_tasks(chunk, completed_tasks):
+    """ Returns the (num_nodes, prob, repetition_index, treewidth, runtime) tuples of the tasks of the chunk (generated by
+        generate_work_chunks or generate_coupled_work_chunks) contained in completed_tasks, a dict mapping tasks to their
+        (treewidth, runtime), and the chunk consisting of the remaining tasks (None if all tasks are completed).
+    """
+    if len(chunk) == 4:
+        chunk_index, num_nodes, prob, repetition_indices = chunk
+        chunk_results = [(num_nodes, prob, repetition_index) + tuple(completed_tasks[(num_nodes, prob, repetition_index)])
+                         for repetition_index in repetition_indices
+                         if (num_nodes, prob, repetition_index) in completed_tasks]
+        remaining_repetition_indices = tuple(repetition_index for repetition_index in repetition_indices
+                                             if (num_nodes, prob, repetition_index) not in completed_tasks)
+        if not remaining_repetition_indices:
+            return chunk_results, None
+        return chunk_results, (chunk_index, num_nodes, prob, remaining_repetition_indices)
+
+    chunk_index, num_nodes, probabilities, repetition_indices, chunk_completed_tasks = chunk
+    chunk_results = []
+    for repetition_index in repetition_indices:
+        for prob in probabilities:
+            task = (num_nodes, prob, repetition_index)
+            if task in completed_tasks and (prob, repetition_index) not in chunk_completed_tasks:
+                chunk_results.append(task + tuple(completed_tasks[task]))
+    chunk_completed_tasks = chunk_completed_tasks | frozenset(
+        (prob, repetition_index) for _, prob, repetition_index, _, _ in chunk_results)
+    remaining_repetition_indices = tuple(
+        repetition_index for repetition_index in repetition_indices
+        if any((prob, repetition_index) not in chunk_completed_tasks for prob in probabilities))
+    if not remaining_repetition_indices:
+        return chunk_results, None
+    return chunk_results, (chunk_index, num_nodes, probabilities, remaining_repetition_indices, chunk_completed_tasks)
+
+
+def regenerate_graph(graph_generator, random_seed_base, num_nodes, prob, repetition_index, coupled_sampling=False,
+                     legacy_graph_sequence=None):
+    """ Returns the random graph of the given task as generated during the study (see derive_task_seed,
+        derive_coupled_seed, and LegacyGraphSequence). As the coupled graph of a probability only depends on the shared
+        random numbers, it can be regenerated without the other probabilities.
+    """
+    if legacy_graph_sequence is not None:
+        return legacy_graph_sequence.generate_graph(graph_generator, num_nodes, prob, repetition_index)
+    if coupled_sampling:
+        graph_generator.seed(derive_coupled_seed(random_seed_base, num_nodes, repetition_index))
+        return graph_generator.generate_coupled_graphs(num_nodes, [prob])[0]
+    graph_generator.seed(derive_task_seed(random_seed_base, num_nodes, prob, repetition_index))
+    return graph_generator.generate_graph(num_nodes, prob)
+
+
+def validate_exact_solver(parameter_file, aggregated_results_path, max_nodes=exact_treewidth.DEFAULT_MAX_NODES,
+                          max_graphs=None):
+    """ Regenerates the graphs of a study with at most max_nodes nodes whose treewidth was computed by the external solver,
+        recomputes their treewidth using the exact solver (see exact_treewidth), and compares the treewidths. At most
+        max_graphs graphs are validated (if given). Returns the list of (num_nodes, probability, repetition_index, solver
+        treewidth, exact treewidth) tuples of the mismatching graphs.
+    """
+    param_space = yaml.safe_load(parameter_file)
+    random_seed_base = param_space.get('random_seed_base', 0)
+    coupled_sampling = param_space.get('coupled_sampling', False)
+    graph_generator = SimpleRandomGraphGenerator(engine=param_space.get('graph_generation_engine'))
+    legacy_graph_sequence = create_legacy_graph_sequence(param_space)
+    result_dict = columnar_results.load_aggregated_results(aggregated_results_path)
+
+    mismatches = []
+    number_of_validated_graphs = 0
+    total_runtime_solver = 0.0
+    total_runtime_exact = 0.0
+    for num_nodes in sorted(result_dict):
+        if num_nodes > max_nodes:
+            continue
+        for prob in sorted(result_dict[num_nodes]):
+            for result in result_dict[num_nodes][prob]:
+                if max_graphs is not None and number_of_validated_graphs >= max_graphs:
+                    break
+                if result.treewidth is None or result.decomposition_method != "solver":
+                    continue
+                graph = regenerate_graph(graph_generator, random_seed_base, num_nodes, prob, result.repetition_index,
+                                         coupled_sampling=coupled_sampling,
+                                         legacy_graph_sequence=legacy_graph_sequence)
+                stored_edge_representation = result.undirected_graph_edge_representation
+                if stored_edge_representation is not None and \
+                        sorted(graph.get_edge_representation()) != sorted(stored_edge_representation):
+                    logger.warning("Could not regenerate the graph of {} nodes and probability {}, rep {}; "
+                                   "skipping it".format(num_nodes, prob, result.repetition_index))
+                    continue
+                algorithm_time_start = time.perf_counter()
+                tree_decomp = exact_treewidth.compute_exact_tree_decomposition(graph)
+                total_runtime_exact += time.perf_counter() - algorithm_time_start
+                total_runtime_solver += result.runtime_treewidth_computation
+                number_of_validated_graphs += 1
+                if tree_decomp.width != result.treewidth:
+                    logger.error("Treewidth mismatch for {} nodes and probability {}, rep {}: solver {}, exact {}".format(
+                        num_nodes, prob, result.repetition_index, result.treewidth, tree_decomp.width))
+                    mismatches.append((num_nodes, prob, result.repetition_index, result.treewidth, tree_decomp.width))
+
+    logger.info("Validated {} graphs: {} mismatches".format(number_of_validated_graphs, len(mismatches)))
+    if number_of_validated_graphs > 0:
+        logger.info("Average runtime: solver {:.4f} s, exact solver {:.4f} s".format(
+            total_runtime_solver / number_of_validated_graphs, total_runtime_exact / number_of_validated_graphs))
+    return mismatches
+
+
+def run_backend_benchmark_from_yaml(parameter_file, output_file, backend_names, repetitions=None, timeout=None):
+    """ Decomposes the graphs of the parameter space (regenerated from their seeds, see regenerate_graph) using each of
+        the given backends and writes the statistics per (number of nodes, probability, backend) to output_file (see
+        benchmark_backends). By default, the number of repetitions of the parameter space is used.
+    """
+    param_space = yaml.safe_load(parameter_file)
+    if repetitions is None:
+        repetitions = param_space.get('scenario_repetition', 1)
+    statistics = benchmark_backends(param_space["number_of_nodes"],
+                                    param_space["probability"],
+                                    repetitions,
+                                    backend_names,
+                                    random_seed_base=param_space.get('random_seed_base', 0),
+                                    graph_generation_engine=param_space.get('graph_generation_engine'),
+                                    coupled_sampling=param_space.get('coupled_sampling', False),
+                                    timeout=timeout,
+                                    legacy_graph_sequence=create_legacy_graph_sequence(param_space))
+    logger.info("Writing backend benchmark of {} entries to {}".format(len(statistics), output_file))
+    with open(output_file, "w") as f:
+        yaml.safe_dump(statistics, f, default_flow_style=False)
+
+
+def benchmark_backends(num_nodes_list, connection_probabilities_list, repetitions, backend_names, random_seed_base=0,
+                       graph_generation_engine=None, coupled_sampling=False, timeout=None, legacy_graph_sequence=None):
+    """ Decomposes the same graphs using each of the given backends (see decomposition_backends) and returns a list of
+        dicts holding, per (number of nodes, probability, backend), the number of graphs, the number of failures, the
+        mean runtime, the mean width, and the mean and maximal gap between the width and the reference width, as well as
+        the fraction of graphs decomposed with the reference width. The reference width of a graph is the treewidth
+        computed by an exact backend or, if no exact backend succeeded, the smallest width of all backends.
+    """
+    graph_generator = SimpleRandomGraphGenerator(engine=graph_generation_engine)
+    backends = [decomposition_backends.create_backend(name, timeout=timeout) for name in backend_names]
+    statistics = []
+    for num_nodes, prob in itertools.product(num_nodes_list, connection_probabilities_list):
+        runtimes = {backend.name: [] for backend in backends}
+        width_gaps = {backend.name: [] for backend in backends}
+        widths = {backend.name: [] for backend in backends}
+        number_of_failures = {backend.name: 0 for backend in backends}
+        for repetition_index in range(repetitions):
+            graph = regenerate_graph(graph_generator, random_seed_base, num_nodes, prob, repetition_index,
+                                     coupled_sampling=coupled_sampling, legacy_graph_sequence=legacy_graph_sequence)
+            widths_of_graph = {}
+            for backend in backends:
+                algorithm_time_start = time.perf_counter()
+                tree_decomp = backend.compute_tree_decomposition(graph)
+                runtimes[backend.name].append(time.perf_counter() - algorithm_time_start)
+                if tree_decomp is None:
+                    number_of_failures[backend.name] += 1
+                    continue
+                tree_decomposition_verification.verify_tree_decomposition(graph, tree_decomp)
+                widths_of_graph[backend.name] = tree_decomp.width
+            exact_widths = [widths_of_graph[backend.name] for backend in backends
+                            if backend.is_exact and backend.name in widths_of_graph]
+            if not widths_of_graph:
+                continue
+            reference_width = min(exact_widths) if exact_widths else min(widths_of_graph.values())
+            for name, width in widths_of_graph.items():
+                widths[name].append(width)
+                width_gaps[name].append(width - reference_width)
+
+        for backend in backends:
+            gaps = width_gaps[backend.name]
+            entry = dict(
+                num_nodes=num_nodes,
+                probability=prob,
+                backend=backend.name,
+                count=repetitions,
+                failures=number_of_failures[backend.name],
+                mean_runtime=float(np.mean(runtimes[backend.name])) if runtimes[backend.name] else None,
+                mean_width=float(np.mean(widths[backend.name])) if gaps else None,
+                mean_width_gap=float(np.mean(gaps)) if gaps else None,
+                max_width_gap=int(max(gaps)) if gaps else None,
+                fraction_reference_width=float(np.mean([gap == 0 for gap in gaps])) if gaps else None,
+            )
+            logger.info("{} nodes, probability {}, backend {}: mean runtime {}, mean width gap {}, max width gap {}, "
+                        "{} failures".format(num_nodes, prob, backend.name, entry["mean_runtime"],
+                                             entry["mean_width_gap"], entry["max_width_gap"], entry["failures"]))
+            statistics.append(entry)
+    return statistics
+
+
 class SimpleTreeDecompositionExperiment(object):
     """ Generates the full parameter space and executes the experiments given the number of threads passed to the constructor.
-    Mostly copied from alib.scenariogeneration, but uses the build_scenario_simple function defined below instead."""
+    Mostly copied from alib.scenariogeneration, but uses the build_scenario_simple function defined below instead.
+
+    The parameter space is split into chunks of chunk_size repetitions (see generate_work_chunks) which are handed out
+    to the worker processes on demand (see worker_supervision.WorkerSupervisor). As the random number generator is seeded per task (see
+    derive_task_seed), the generated graphs do not depend on the number of threads or on which worker processes which
+    chunk. The legacy graph generation engine instead reproduces the graphs of studies executed with
+    legacy_number_of_processes (by default, threads) processes (see LegacyGraphSequence).
+
+    If a shard (i, N) is given, only the i-th of N disjoint parts of the parameter space is processed, such that a study
+    can be split among several machines (see merge_aggregated_results).
+
+    If resume is set, the results of a previous (interrupted) execution are read from the existing per-process result
+    files and all tasks contained therein are skipped.
+
+    The aggregated results are written as pickle of a nested dict and/or in the columnar format, depending on the
+    aggregated_format (see AGGREGATED_RESULT_FORMATS).
+
+    If use_treewidth_cache is set, the tree decompositions of graphs with at most treewidth_cache_max_nodes nodes are
+    cached by the canonical forms of the graphs in an sqlite database shared by all worker processes (see
+    treewidth_cache). The solver is not invoked for graphs isomorphic to an already decomposed graph; the results of
+    such graphs are flagged as cache hits.
 
-    def __init__(self, threads, output_file_base, timeout=None, remove_process_pickles=False):
+    If use_treewidth_bounds is set, lower and upper bounds on the treewidth are computed before invoking the solver (see
+    treewidth_bounds). If these match, the tree decomposition induced by the elimination ordering is optimal and the
+    solver is not invoked. Each result records the method by which its decomposition was obtained (see
+    DECOMPOSITION_METHODS).
+
+    If use_preprocessing is set, safe reduction rules are applied before invoking the solver and the connected
+    components of the reduced graph are decomposed independently, using up to component_threads concurrent solver calls
+    (see treewidth_preprocessing).
+
+    Graphs (or, when preprocessing, components) with at most exact_solver_max_nodes nodes are decomposed in-process by
+    an exact dynamic program instead of the external solver (see exact_treewidth).
+
+    If anytime is set, graphs which the solver fails to decompose (e.g. due to the timeout) are decomposed according to
+    the best elimination ordering found by the heuristics of treewidth_bounds. Such results record the width of this
+    decomposition as upper bound and a lower bound on the treewidth, while their treewidth remains None unless the
+    bounds match (see TreeDecompositionAlgorithmResult.is_optimal).
+
+    The solver invoked for the graphs is given by the backend (see decomposition_backends). Results of heuristic backends
+    only record the width of their decomposition as upper bound on the treewidth.
+
+    The decompositions are verified according to the verification_policy, i.e. all of them, a random fraction of
+    verification_sample_rate of them, or none (see tree_decomposition_verification). The time spent on verification is
+    recorded separately from the runtime of the decomposition.
+
+    If the parameter space contains adaptive_sampling parameters, the number of repetitions per (number of nodes,
+    probability) combination is chosen adaptively based on the confidence intervals of the results obtained so far (see
+    adaptive_sampling.AdaptiveSamplingController). In this case, the chunks are chosen one by one based on the results
+    of each chunk reported back by the worker processes.
+
+    If the parameter space sets coupled_sampling, the graphs of all probabilities of a repetition are generated from the
+    same random numbers, such that they are nested (see SimpleRandomGraphGenerator.generate_coupled_edge_arrays). As the
+    treewidth is monotone in the probability, the solver is then only invoked for the graphs between whose neighbours
+    the treewidth changes (see generate_coupled_work_chunks). Note that the results of the different probabilities of
+    a number of nodes are correlated in this case.
+
+    By default, the chunks are handed out in descending order of their runtime predicted by a runtime model (see
+    runtime_model.RuntimeModel), which is loaded from runtime_model_file (if given) and extended by the results of
+    resumed executions. Afterwards, the runtime model extended by all results is saved next to the aggregated results.
+
+    The worker processes are supervised (see worker_supervision.WorkerSupervisor): if a worker terminates abnormally,
+    the unfinished tasks of its chunk are handed out again and the worker is respawned. A chunk which killed its worker
+    max_chunk_attempts times is given up. In this case, the failed tasks are written to a summary file and the
+    experiment fails without aggregating the results, which can be completed using resume.
+
+    The workers publish their throughput to metrics files, which are aggregated every progress_interval seconds to
+    report the progress and an ETA and, if prometheus_textfile is given, written to this file in the textfile format of
+    the Prometheus node exporter (see progress_telemetry).
+
+    If a memory_budget (in bytes) is given, the memory used by the worker processes and their solver processes is
+    watched and, once it exceeds the fraction memory_soft_limit of the budget, chunks whose predicted memory usage does
+    not fit into the budget are deferred (see memory_watchdog)."""
+
+    def __init__(self, threads, output_file_base, timeout=None, remove_process_pickles=False, chunk_size=DEFAULT_CHUNK_SIZE,
+                 resume=False, shard=None, aggregated_format="pickle",
+                 use_treewidth_cache=False, treewidth_cache_max_nodes=treewidth_cache.DEFAULT_MAX_NODES,
+                 use_treewidth_bounds=False, use_preprocessing=False, component_threads=1, exact_solver_max_nodes=0,
+                 anytime=False, backend=decomposition_backends.DEFAULT_BACKEND,
+                 verification_policy=tree_decomposition_verification.DEFAULT_VERIFICATION_POLICY,
+                 verification_sample_rate=tree_decomposition_verification.DEFAULT_SAMPLE_RATE, task_order="lpt",
+                 runtime_model_file=None, max_chunk_attempts=worker_supervision.DEFAULT_MAX_CHUNK_ATTEMPTS,
+                 progress_interval=progress_telemetry.DEFAULT_REPORT_INTERVAL, prometheus_textfile=None,
+                 memory_budget=None, memory_soft_limit=memory_watchdog.DEFAULT_SOFT_LIMIT):
+        if aggregated_format not in AGGREGATED_RESULT_FORMATS:
+            raise ValueError("Unknown aggregated result format {}; must be one of {}".format(aggregated_format,
+                                                                                          AGGREGATED_RESULT_FORMATS))
+        if task_order not in TASK_ORDERS:
+            raise ValueError("Unknown task order {}; must be one of {}".format(task_order, TASK_ORDERS))
+        if component_threads < 1:
+            raise ValueError("The number of component threads must be positive, but is {}.".format(component_threads))
+        if backend not in decomposition_backends.BACKENDS:
+            raise ValueError("Unknown tree decomposition backend {}; must be one of {}".format(
+                backend, decomposition_backends.BACKENDS))
+        # fail early on invalid verification parameters instead of in the worker processes
+        tree_decomposition_verification.TreeDecompositionVerifier(verification_policy, verification_sample_rate)
         self.threads = threads
+        self.aggregated_format = aggregated_format
+        self.chunk_size = chunk_size
+        self.resume = resume
+        self.shard = shard
         self.output_file_base_name = output_file_base
         self.output_filenames = [
             self.output_file_base_name.format(process_index=process_index)
             for process_index in range(self.threads)
         ]
+        self.metrics_filenames = [
+            os.path.splitext(self.output_file_base_name.format(process_index="metrics_{}".format(process_index)))[0] +
+            ".json"
+            for process_index in range(self.threads)
+        ]
+        self.progress_interval = progress_interval
+        self.prometheus_textfile = prometheus_textfile
+        self.memory_budget = memory_budget
+        self.memory_soft_limit = memory_soft_limit
+        if memory_budget is not None:
+            # fail early on invalid memory parameters
+            memory_watchdog.MemoryWatchdog(memory_budget, memory_soft_limit)
         self.timeout = timeout
         self.remove_process_pickles = remove_process_pickles
+        self.treewidth_cache_file = None
+        if use_treewidth_cache:
+            self.treewidth_cache_file = os.path.splitext(
+                self.output_file_base_name.format(process_index="treewidth_cache"))[0] + ".sqlite"
+        self.treewidth_cache_max_nodes = treewidth_cache_max_nodes
+        self.use_treewidth_bounds = use_treewidth_bounds
+        self.use_preprocessing = use_preprocessing
+        self.component_threads = component_threads
+        self.exact_solver_max_nodes = exact_solver_max_nodes
+        self.anytime = anytime
+        self.backend = backend
+        self.verification_policy = verification_policy
+        self.verification_sample_rate = verification_sample_rate
+        self.task_order = task_order
+        self.max_chunk_attempts = max_chunk_attempts
+        # the model used for ordering the chunks: the runtime model of earlier studies, which is extended by the
+        # runtimes of resumed executions
+        self.runtime_model = runtime_model.RuntimeModel()
+        if runtime_model_file is not None:
+            self.runtime_model = runtime_model.RuntimeModel.load(runtime_model_file)
+        self.runtime_model_file = os.path.splitext(self.output_file_base_name.format(process_index="runtime_model"))[0] + \
+            ".yml"
+        self.resource_usage_file = os.path.splitext(
+            self.output_file_base_name.format(process_index="resource_usage"))[0] + ".yml"
+        self.failed_tasks_file = os.path.splitext(
+            self.output_file_base_name.format(process_index="failed_tasks"))[0] + ".yml"
 
     def start_experiments(self, scenario_parameter_space):
         number_of_repetitions = 1
@@ -87,133 +696,811 @@ class SimpleTreeDecompositionExperiment(object):
         if 'store_only_connected_graphs' in scenario_parameter_space:
             store_only_connected_graphs = scenario_parameter_space['store_only_connected_graphs']
 
-        processes = [mp.Process(
-            target=execute_single_experiment,
-            name="worker_{}".format(process_index),
-            args=(
-                process_index,
-                self.threads,
-                scenario_parameter_space,
-                random_seed_base + process_index,
+        adaptive_sampling_parameters = None
+        if 'adaptive_sampling' in scenario_parameter_space:
+            adaptive_sampling_parameters = scenario_parameter_space['adaptive_sampling']
+            if self.shard is not None:
+                raise ValueError("Adaptive sampling requires all results and cannot be combined with sharding")
+
+        coupled_sampling = scenario_parameter_space.get('coupled_sampling', False)
+        if coupled_sampling and adaptive_sampling_parameters is not None:
+            raise ValueError("Coupled sampling cannot be combined with adaptive sampling")
+
+        graph_generation_engine = SimpleRandomGraphGenerator.DEFAULT_ENGINE
+        if 'graph_generation_engine' in scenario_parameter_space:
+            graph_generation_engine = scenario_parameter_space['graph_generation_engine']
+        if graph_generation_engine not in SimpleRandomGraphGenerator.ENGINES:
+            raise ValueError("Unknown graph generation engine {}; must be one of {}".format(graph_generation_engine,
+                                                                                        SimpleRandomGraphGenerator.ENGINES))
+        if coupled_sampling and graph_generation_engine == "legacy":
+            raise ValueError("Coupled sampling cannot be combined with the legacy graph generation engine")
+
+        legacy_graph_sequence = None
+        if graph_generation_engine == "legacy":
+            if adaptive_sampling_parameters is not None:
+                raise ValueError("Adaptive sampling cannot be combined with the legacy graph generation engine")
+            if self.task_order != "product":
+                # fast-forwarding the random number sequences is only linear in the order of the parameter space
+                logger.info("Using the task order product instead of {} for the legacy graph generation "
+                            "engine".format(self.task_order))
+                self.task_order = "product"
+            legacy_graph_sequence = LegacyGraphSequence(
+                scenario_parameter_space["number_of_nodes"],
+                scenario_parameter_space["probability"],
                 number_of_repetitions,
-                self.output_filenames[process_index],
-                self.timeout,
-                store_graphs_of_treewidth,
-                store_only_connected_graphs,
-            )) for process_index in range(self.threads)]
+                random_seed_base,
+                scenario_parameter_space.get('legacy_number_of_processes', self.threads))
+
+        completed_tasks = {}
+        if self.resume:
+            completed_tasks = self.collect_completed_tasks()
+            for (num_nodes, prob, _), (_, runtime) in completed_tasks.items():
+                if runtime is not None:
+                    self.runtime_model.add_runtime(num_nodes, prob, runtime)
+        if self.task_order == "lpt":
+            logger.info("Ordering chunks by runtime model of {} combinations".format(len(self.runtime_model)))
 
-        for p in processes:
-            logger.info("Starting process {}".format(p))
-            p.start()
+        chunks = None
+        if coupled_sampling:
+            chunks = list(generate_coupled_work_chunks(scenario_parameter_space["number_of_nodes"],
+                                                       scenario_parameter_space["probability"],
+                                                       number_of_repetitions,
+                                                       self.chunk_size,
+                                                       shard=self.shard,
+                                                       completed_tasks=completed_tasks))
+            if self.task_order == "lpt":
+                # upper estimate, as the solver is not invoked for all probabilities
+                chunks.sort(key=lambda chunk: -sum(self.runtime_model.predict(chunk[1], prob) for prob in chunk[2]) *
+                                              len(chunk[3]))
+        elif adaptive_sampling_parameters is None:
+            chunks = list(generate_work_chunks(scenario_parameter_space["number_of_nodes"],
+                                               scenario_parameter_space["probability"],
+                                               number_of_repetitions,
+                                               self.chunk_size,
+                                               shard=self.shard,
+                                               completed_tasks=completed_tasks))
+            if self.task_order == "lpt":
+                # the sort is stable, i.e. chunks of equal predicted runtime remain in the order of itertools.product
+                chunks.sort(key=lambda chunk: -self.runtime_model.predict(chunk[1], chunk[2]) * len(chunk[3]))
 
-        for p in processes:
-            p.join()
+        expected_tasks = None
+        if adaptive_sampling_parameters is None:
+            expected_tasks = collections.Counter()
+            for chunk in chunks:
+                if coupled_sampling:
+                    for repetition_index in chunk[3]:
+                        for prob in chunk[2]:
+                            if (prob, repetition_index) not in chunk[4]:
+                                expected_tasks[(chunk[1], prob)] += 1
+                else:
+                    expected_tasks[(chunk[1], chunk[2])] += len(chunk[3])
+        number_of_completed_tasks_per_cell = collections.Counter(
+            (num_nodes, prob) for num_nodes, prob, _ in completed_tasks)
+
+        # metrics of earlier executions are not continued
+        for metrics_file in self.metrics_filenames:
+            if os.path.exists(metrics_file):
+                os.remove(metrics_file)
+
+        worker_options = WorkerOptions(
+            random_seed_base,
+            self.timeout,
+            store_graphs_of_treewidth,
+            store_only_connected_graphs,
+            graph_generation_engine=graph_generation_engine,
+            treewidth_cache_file=self.treewidth_cache_file,
+            treewidth_cache_max_nodes=self.treewidth_cache_max_nodes,
+            use_treewidth_bounds=self.use_treewidth_bounds,
+            use_preprocessing=self.use_preprocessing,
+            component_threads=self.component_threads,
+            exact_solver_max_nodes=self.exact_solver_max_nodes,
+            anytime=self.anytime,
+            backend=self.backend,
+            verification_policy=self.verification_policy,
+            verification_sample_rate=self.verification_sample_rate,
+            coupled_sampling=coupled_sampling,
+            legacy_graph_sequence=legacy_graph_sequence)
+
+        def start_worker(process_index, task_queue, status_queue):
+            process = mp.Process(
+                target=execute_single_experiment,
+                name="worker_{}".format(process_index),
+                args=(
+                    process_index,
+                    task_queue,
+                    self.output_filenames[process_index],
+                    worker_options,
+                    status_queue,
+                    self.metrics_filenames[process_index],
+                ))
+            logger.info("Starting process {}".format(process))
+            process.start()
+            return process
+
+        watchdog = None
+        if self.memory_budget is not None:
+            watchdog = memory_watchdog.MemoryWatchdog(self.memory_budget, self.memory_soft_limit)
+        supervisor = worker_supervision.WorkerSupervisor(self.threads, start_worker, self.recover_chunk,
+                                                         max_chunk_attempts=self.max_chunk_attempts,
+                                                         memory_watchdog=watchdog)
+        progress_monitor = progress_telemetry.ProgressMonitor(
+            self.metrics_filenames, expected_tasks, self.threads, self.runtime_model,
+            completed_tasks=number_of_completed_tasks_per_cell,
+            report_interval=self.progress_interval,
+            prometheus_textfile=self.prometheus_textfile,
+            get_number_of_waiting_chunks=supervisor.get_number_of_waiting_chunks)
+        progress_monitor.start()
+        try:
+            failed_chunks = self.distribute_chunks(supervisor, chunks, adaptive_sampling_parameters,
+                                                   scenario_parameter_space, number_of_repetitions, completed_tasks)
+        finally:
+            progress_monitor.stop()
+
+        if failed_chunks:
+            self.write_failed_tasks(failed_chunks)
+            raise RuntimeError("{} chunks could not be processed (see {}); the results were not aggregated".format(
+                len(failed_chunks), self.failed_tasks_file))
 
         self.combine_results_to_overall_pickle()
 
+    def distribute_chunks(self, supervisor, chunks, adaptive_sampling_parameters, scenario_parameter_space,
+                          number_of_repetitions, completed_tasks):
+        """ Hands out the given chunks or, if adaptive sampling parameters are given, the chunks chosen adaptively via
+            the supervisor. Returns the list of failed chunks (see worker_supervision.FailedChunk).
+        """
+        if adaptive_sampling_parameters is None:
+            logger.info("Distributing {} chunks of at most {} repetitions among {} processes".format(len(chunks),
+                                                                                                     self.chunk_size,
+                                                                                                     self.threads))
+            remaining_chunks = iter(chunks)
+            return supervisor.run(lambda: next(remaining_chunks, None), lambda chunk_results: None,
+                                  number_of_chunks=len(chunks))
+
+        cells = list(itertools.product(scenario_parameter_space["number_of_nodes"],
+                                       scenario_parameter_space["probability"]))
+        if self.task_order == "lpt":
+            # the minimum number of repetitions is handed out in the order of the cells
+            cells.sort(key=lambda cell: -self.runtime_model.predict(*cell))
+        controller = adaptive_sampling.AdaptiveSamplingController.from_parameters(
+            adaptive_sampling_parameters,
+            cells,
+            self.chunk_size,
+            number_of_repetitions)
+        for (num_nodes, prob, repetition_index), (treewidth, runtime) in completed_tasks.items():
+            if (num_nodes, prob) in controller.cells:
+                controller.add_completed_task(num_nodes, prob, repetition_index, treewidth, runtime)
+        return self.distribute_chunks_adaptively(controller, supervisor)
+
+    def distribute_chunks_adaptively(self, controller, supervisor):
+        """ Hands out the chunks chosen by the controller via the supervisor, which assigns at most two chunks to each
+            worker process, and passes the results reported by the worker processes to the controller. Returns the list
+            of failed chunks (see worker_supervision.FailedChunk).
+        """
+        number_of_chunks = [0]
+
+        def next_chunk():
+            chunk = controller.next_chunk()
+            if chunk is None:
+                return None
+            number_of_chunks[0] += 1
+            return (number_of_chunks[0] - 1,) + chunk
+
+        def add_chunk_results(chunk_results):
+            for num_nodes, prob, repetition_index, treewidth, runtime in chunk_results:
+                controller.add_result(num_nodes, prob, treewidth, runtime)
+
+        failed_chunks = supervisor.run(next_chunk, add_chunk_results)
+        logger.info("Distributed {} chunks adaptively".format(number_of_chunks[0]))
+        controller.log_summary()
+        return failed_chunks
+
+    def recover_chunk(self, process_index, chunk):
+        """ Returns the results of the tasks of the chunk written by the terminated worker process (whose result file
+            is repaired, such that the respawned worker can append to it) and the chunk of the remaining tasks (see
+            split_chunk_by_completed_tasks).
+        """
+        fname = self.output_filenames[process_index]
+        completed_tasks = {}
+        if os.path.exists(fname):
+            for result in result_files.read_results_from_process_file(fname, repair_incomplete_tail=True):
+                completed_tasks[(result.num_nodes, result.edge_probability, result.repetition_index)] = \
+                    (result.treewidth, result.runtime_treewidth_computation)
+        chunk_results, remaining_chunk = split_chunk_by_completed_tasks(chunk, completed_tasks)
+        logger.info("Recovered {} results of chunk {} from {}".format(len(chunk_results), chunk[0], fname))
+        return chunk_results, remaining_chunk
+
+    def write_failed_tasks(self, failed_chunks):
+        """ Writes the remaining tasks of the failed chunks, their attempts and exit codes to the failed tasks file. """
+        entries = []
+        for failed_chunk in failed_chunks:
+            chunk = failed_chunk.chunk
+            entry = dict(chunk_index=chunk[0], num_nodes=chunk[1], repetition_indices=list(chunk[3]),
+                         attempts=failed_chunk.attempts, exit_codes=list(failed_chunk.exit_codes))
+            if len(chunk) == 4:
+                entry["probability"] = chunk[2]
+            else:
+                entry["probabilities"] = list(chunk[2])
+            entries.append(entry)
+        logger.error("Writing {} failed chunks to {}".format(len(entries), self.failed_tasks_file))
+        with open(self.failed_tasks_file, "w") as f:
+            yaml.safe_dump(entries, f, default_flow_style=False)
+
+    def collect_completed_tasks(self):
+        """ Scans all existing per-process result files (regardless of the number of threads used to create them) and
+            returns a dict mapping the completed (num_nodes, edge_probability, repetition_index) tasks to their
+            (treewidth, runtime). Incomplete results at the end of the files are removed.
+        """
+        aggregated_file = self.output_file_base_name.format(process_index="aggregated_results")
+        existing_files = sorted(fname for fname in glob.glob(self.output_file_base_name.format(process_index="*"))
+                                if fname != aggregated_file)
+
+        completed_tasks = {}
+        for fname in existing_files:
+            logger.info("Reading completed tasks from {}".format(fname))
+            for result in result_files.read_results_from_process_file(fname, repair_incomplete_tail=True):
+                completed_tasks[(result.num_nodes, result.edge_probability, result.repetition_index)] = \
+                    (result.treewidth, result.runtime_treewidth_computation)
+            # results of processes not existing in this execution must be combined as well
+            if fname not in self.output_filenames:
+                self.output_filenames.append(fname)
+
+        logger.info("Found {} completed tasks in {} result files".format(len(completed_tasks), len(existing_files)))
+        return completed_tasks
+
     def combine_results_to_overall_pickle(self):
         logger.info("Combining results")
-        result_dict = {}
+        write_pickle = self.aggregated_format in ["pickle", "both"]
+        pickle_file = self.output_file_base_name.format(process_index="aggregated_results")
+
+        columnar_writer = None
+        if self.aggregated_format in ["columnar", "both"]:
+            columnar_path = columnar_results.get_columnar_results_path(pickle_file)
+            logger.info("Writing columnar results to {}".format(columnar_path))
+            columnar_writer = columnar_results.ColumnarResultsWriter(columnar_path)
+
+        existing_filenames = []
         for fname in self.output_filenames:
-            with open(fname, "rb") as f:
-                try:
-                    while True:
-                        result = pickle.load(f)
-                        if result.num_nodes not in result_dict:
-                            result_dict[result.num_nodes] = {}
-                        if result.edge_probability not in result_dict[result.num_nodes]:
-                            result_dict[result.num_nodes][result.edge_probability] = []
-                        result_dict[result.num_nodes][result.edge_probability].append(result)
-                except EOFError:
-                    pass
+            if os.path.exists(fname):
+                existing_filenames.append(fname)
+            else:
+                # the process did not obtain any chunk
+                logger.info("Skipping non-existing result file {}".format(fname))
 
-        pickle_file = self.output_file_base_name.format(process_index="aggregated_results")
-        logger.info("Writing combined Pickle to {}".format(pickle_file))
-        with open(pickle_file, "wb") as f:
-            pickle.dump(result_dict, f)
+        result_dict = {}
+        number_of_results = 0
+        number_of_cache_hits = 0
+        number_of_results_per_method = {method: 0 for method in DECOMPOSITION_METHODS}
+        study_runtime_model = runtime_model.RuntimeModel()
+        resource_usage_summary = child_resource_usage.ResourceUsageSummary()
+        for result in result_files.read_results_from_process_files_concurrently(existing_filenames, self.threads):
+            number_of_results += 1
+            if result.cache_hit:
+                number_of_cache_hits += 1
+            number_of_results_per_method[result.decomposition_method] += 1
+            study_runtime_model.add_results([result])
+            resource_usage_summary.add_results([result])
+            if columnar_writer is not None:
+                columnar_writer.add_result(result)
+            if not write_pickle:
+                continue
+            if result.num_nodes not in result_dict:
+                result_dict[result.num_nodes] = {}
+            if result.edge_probability not in result_dict[result.num_nodes]:
+                result_dict[result.num_nodes][result.edge_probability] = []
+            result_dict[result.num_nodes][result.edge_probability].append(result)
+
+        if columnar_writer is not None:
+            columnar_writer.close()
+
+        if self.treewidth_cache_file is not None and number_of_results > 0:
+            logger.info("Treewidth cache hits: {} of {} results ({:.1%})".format(
+                number_of_cache_hits, number_of_results, float(number_of_cache_hits) / number_of_results))
+        logger.info("Decomposition methods: {}".format(
+            ", ".join("{}: {}".format(method, number_of_results_per_method[method]) for method in DECOMPOSITION_METHODS)))
+
+        if write_pickle:
+            # the order in which results are written depends on the scheduling of the chunks
+            result_dict = merge_aggregated_results([result_dict])
+
+            logger.info("Writing combined Pickle to {}".format(pickle_file))
+            with open(pickle_file, "wb") as f:
+                pickle.dump(result_dict, f)
+
+        # only the runtimes observed in this study are saved, such that the observations of the loaded model are not
+        # counted again when the saved model is used by a later execution
+        study_runtime_model.save(self.runtime_model_file)
+
+        if len(resource_usage_summary) > 0:
+            resource_usage_summary.save(self.resource_usage_file)
+            logger.info("Maximal peak RSS of the solver processes: {:.1f} MiB".format(
+                resource_usage_summary.get_max_peak_rss() / 2.0 ** 20))
 
         if self.remove_process_pickles:
             for fname in self.output_filenames:
                 if os.path.exists(fname):
                     logger.info("Removing intermediate process result file {}".format(fname))
                     os.remove(fname)
+            for fname in self.metrics_filenames:
+                if os.path.exists(fname):
+                    os.remove(fname)
 
 
-def execute_single_experiment(process_index,
-                              num_processes,
-                              parameter_space,
-                              random_seed,
-                              repetitions,
-                              out_file,
-                              timeout,
-                              store_graphs_of_treewidth,
-                              store_only_connected_graphs):
-    ''' Main function for computing the treewidths of random graphs. This function is called in its own process (see above).
-        Each process generates and stores only the results lying in its range.
+class WorkerOptions(object):
+    ''' The configuration shared by the worker processes of a treewidth computation experiment (see
+        execute_single_experiment). The options correspond to the parameters of SimpleTreeDecompositionExperiment
+        respectively of the parameter space.
     '''
-    random.seed(random_seed)
-    num_nodes_list = parameter_space["number_of_nodes"]
-    connection_probabilities_list = parameter_space["probability"]
 
-    graph_generator = SimpleRandomGraphGenerator()
+    def __init__(self,
+                 random_seed_base,
+                 timeout,
+                 store_graphs_of_treewidth,
+                 store_only_connected_graphs,
+                 graph_generation_engine=None,
+                 treewidth_cache_file=None,
+                 treewidth_cache_max_nodes=treewidth_cache.DEFAULT_MAX_NODES,
+                 use_treewidth_bounds=False,
+                 use_preprocessing=False,
+                 component_threads=1,
+                 exact_solver_max_nodes=0,
+                 anytime=False,
+                 backend=decomposition_backends.DEFAULT_BACKEND,
+                 verification_policy=tree_decomposition_verification.DEFAULT_VERIFICATION_POLICY,
+                 verification_sample_rate=tree_decomposition_verification.DEFAULT_SAMPLE_RATE,
+                 coupled_sampling=False,
+                 legacy_graph_sequence=None):
+        self.random_seed_base = random_seed_base
+        self.timeout = timeout
+        self.store_graphs_of_treewidth = store_graphs_of_treewidth
+        self.store_only_connected_graphs = store_only_connected_graphs
+        self.graph_generation_engine = graph_generation_engine
+        self.treewidth_cache_file = treewidth_cache_file
+        self.treewidth_cache_max_nodes = treewidth_cache_max_nodes
+        self.use_treewidth_bounds = use_treewidth_bounds
+        self.use_preprocessing = use_preprocessing
+        self.component_threads = component_threads
+        self.exact_solver_max_nodes = exact_solver_max_nodes
+        self.anytime = anytime
+        self.backend = backend
+        self.verification_policy = verification_policy
+        self.verification_sample_rate = verification_sample_rate
+        self.coupled_sampling = coupled_sampling
+        self.legacy_graph_sequence = legacy_graph_sequence
+
+
+def execute_single_experiment(process_index, task_queue, out_file, options, result_queue=None, metrics_file=None):
+    ''' Main function for computing the treewidths of random graphs. This function is called in its own process (see above)
+        with the WorkerOptions shared by all processes.
+        Each process fetches chunks from the task queue until it receives the sentinel None. The random number generator
+        is re-seeded for each task using the seed derived from the random_seed_base and the task's coordinates (or, if a
+        legacy graph sequence is given, set to the state of the legacy study, see LegacyGraphSequence).
+        If a result queue is given, the tuple (process_index, chunk_index, chunk_results) is put into it after each
+        processed chunk, where chunk_results is the list of (num_nodes, prob, repetition_index, treewidth, runtime)
+        tuples of the chunk (see worker_supervision.WorkerSupervisor). If coupled_sampling is set, the chunks contain all probabilities of a repetition
+        (see generate_coupled_work_chunks). When sampling the decompositions to verify, the samples depend on the
+        random_seed_base and the process index. If a metrics file is given, the throughput of the process is published
+        to it (see progress_telemetry.WorkerMetricsPublisher).
+    '''
+    graph_generator = SimpleRandomGraphGenerator(engine=options.graph_generation_engine)
 
     logger = util.get_logger("worker_{}_pid_{}".format(process_index, os.getpid()), propagate=False, make_file=True)
 
-    for repetition_index, params in enumerate(itertools.product(
-            num_nodes_list,
-            connection_probabilities_list,
-            list(range(repetitions))
-    )):
-        if repetition_index % num_processes == process_index:
-            num_nodes, prob, repetition_index = params
-            logger.info("Processing graph with {} nodes and {} prob, rep {} (timeout for computation: {})".format(num_nodes, prob, repetition_index, timeout))
-            gen_time_start = time.time()
-            graph = graph_generator.generate_graph(num_nodes, prob)
-            gen_time = time.time() - gen_time_start
+    cache = None
+    if options.treewidth_cache_file is not None:
+        cache = treewidth_cache.TreewidthCache(options.treewidth_cache_file,
+                                               max_nodes=options.treewidth_cache_max_nodes)
 
-            algorithm_time_start = time.time()
-            tree_decomp = twm.compute_tree_decomposition(graph, logger=logger, timeout=timeout)
-            algorithm_time = time.time() - algorithm_time_start
+    verifier = tree_decomposition_verification.TreeDecompositionVerifier(
+        options.verification_policy, options.verification_sample_rate,
+        random_seed="{}_{}".format(options.random_seed_base, process_index))
 
+    pipeline = TreeDecompositionPipeline(options.timeout, options.store_graphs_of_treewidth,
+                                         options.store_only_connected_graphs, logger,
+                                         cache=cache, use_treewidth_bounds=options.use_treewidth_bounds,
+                                         use_preprocessing=options.use_preprocessing,
+                                         component_threads=options.component_threads,
+                                         exact_solver_max_nodes=options.exact_solver_max_nodes, anytime=options.anytime,
+                                         backend=decomposition_backends.create_backend(options.backend,
+                                                                                       timeout=options.timeout,
+                                                                                       logger=logger),
+                                         verifier=verifier)
+    result_writer = result_files.FramedResultWriter(out_file)
 
-            treewidth = None
+    metrics_publisher = None
+    if metrics_file is not None:
+        metrics_publisher = progress_telemetry.WorkerMetricsPublisher(metrics_file)
 
-            if tree_decomp is not None:
-                assert tree_decomp.is_tree_decomposition(graph)
-                treewidth = tree_decomp.width
+    try:
+        while True:
+            chunk = task_queue.get()
+            if chunk is None:
+                break
+            if options.coupled_sampling:
+                chunk_results = _process_coupled_chunk(chunk, graph_generator, options.random_seed_base, pipeline,
+                                                       result_writer, logger, metrics_publisher)
+            else:
+                chunk_results = _process_chunk(chunk, graph_generator, options.random_seed_base, pipeline,
+                                               result_writer, logger, metrics_publisher, options.legacy_graph_sequence)
+            with pipeline.measure_result_writing():
+                result_writer.flush()
+            if metrics_publisher is not None:
+                metrics_publisher.commit()
+                metrics_publisher.publish(force=True)
+            if result_queue is not None:
+                result_queue.put((process_index, chunk[0], chunk_results))
+    finally:
+        result_writer.close()
+        logger.info("Verified {} tree decompositions in {:.3f} seconds".format(verifier.number_of_verifications,
+                                                                               verifier.total_verification_time))
+        if cache is not None:
+            logger.info("Treewidth cache: {} hits in {} lookups (hit rate {:.1%})".format(
+                cache.number_of_hits, cache.number_of_lookups, cache.get_hit_rate()))
+            cache.close()
 
-            graph_edge_representation = None
 
-            if treewidth is not None and treewidth in store_graphs_of_treewidth:
-                #generally interesting graph: compute edge_representation
-                graph_edge_representation = graph.get_edge_representation()
-                if store_only_connected_graphs:
-                    #if we are only interested in connected graphs, then we only store the representation if it is connected
-                    if not datamodel.is_connected_undirected_edge_representation(graph_edge_representation):
-                        graph_edge_representation = None
+def _write_result(result, outcome, pipeline, result_writer, logger, metrics_publisher):
+    ''' Logs the result, passes it to the result writer, and publishes its metrics (which are committed once the
+        result is written to the result file).
+    '''
+    logger.debug("Graph with {} nodes and {} prob, rep {}: treewidth {} (bounds [{}, {}]), runtime {}, method {}".format(
+        result.num_nodes, result.edge_probability, result.repetition_index, result.treewidth,
+        result.treewidth_lower_bound, result.treewidth_upper_bound, result.runtime_treewidth_computation,
+        result.decomposition_method))
+    if metrics_publisher is not None:
+        metrics_publisher.add_graph(result.num_nodes, result.edge_probability, outcome.runtime,
+                                    result.phase_timings.get_total_wall_time(),
+                                    outcome.tree_decomposition is None)
+    with pipeline.measure_result_writing():
+        result_writer.add_result(result)
+    if metrics_publisher is not None:
+        metrics_publisher.commit(result_writer.get_number_of_buffered_results())
+        metrics_publisher.publish()
 
-            if graph_edge_representation is not None:
-                logger.debug("Storing graph of treewidth {} and number of nodes {}.".format(treewidth, num_nodes))
 
+def _process_chunk(chunk, graph_generator, random_seed_base, pipeline, result_writer, logger, metrics_publisher=None,
+                   legacy_graph_sequence=None):
+    ''' Computes the tree decompositions of the graphs of a chunk and passes the results to the result writer (and
+        their metrics to the metrics publisher, if given). Returns the list of (num_nodes, prob, repetition_index,
+        treewidth, runtime) tuples of the chunk.
+    '''
+    chunk_index, num_nodes, prob, repetition_indices = chunk
+    logger.info("Processing chunk {}: {} repetitions of graphs with {} nodes and {} prob (timeout for computation: "
+                "{})".format(chunk_index, len(repetition_indices), num_nodes, prob, pipeline.timeout))
 
-            result = TreeDecompositionAlgorithmResult(
-                num_nodes=num_nodes,
-                edge_probability=prob,
-                repetition_index=repetition_index,
-                undirected_graph_edge_representation=graph_edge_representation,
-                treewidth=treewidth,
-                runtime_treewidth_computation=algorithm_time,
-            )
-            logger.info("Result: {}".format(result.short_representation()))
+    chunk_results = []
+    for repetition_index in repetition_indices:
+        phase_timer = pipeline.start_phase_timer()
+        with phase_timer.measure("generation"):
+            graph = regenerate_graph(graph_generator, random_seed_base, num_nodes, prob, repetition_index,
+                                     legacy_graph_sequence=legacy_graph_sequence)
+
+        outcome = pipeline.decompose(graph, phase_timer)
+        result = pipeline.create_result(graph, num_nodes, prob, repetition_index, outcome, phase_timer)
+        _write_result(result, outcome, pipeline, result_writer, logger, metrics_publisher)
+        chunk_results.append((num_nodes, prob, repetition_index, result.treewidth, outcome.runtime))
+
+        del graph
+        del outcome
+    return chunk_results
 
-            with open(out_file, "ab") as f:
-                pickle.dump(result, f)
 
-            del graph
-            if tree_decomp is not None:
-                del tree_decomp
-            if graph_edge_representation is not None:
-                del graph_edge_representation
+def _process_coupled_chunk(chunk, graph_generator, random_seed_base, pipeline, result_writer, logger,
+                           metrics_publisher=None):
+    ''' Computes the tree decompositions of the nested graphs of all probabilities for each repetition of a chunk.
+
+        As the treewidth is monotone in the probability, the treewidths of all graphs between two graphs of equal
+        treewidth are known and the decomposition of the denser graph is an optimal decomposition of these graphs. Hence,
+        the graphs are processed by divide and conquer over the sorted probabilities: the graphs of the smallest and the
+        largest probability are decomposed first and a range is only split (and its middle graph decomposed) if the
+        treewidths at its ends differ. The time for generating the graphs of a repetition is split evenly among them.
+    '''
+    chunk_index, num_nodes, probabilities, repetition_indices, completed_tasks = chunk
+    logger.info("Processing coupled chunk {}: {} repetitions of graphs with {} nodes and {} probabilities".format(
+        chunk_index, len(repetition_indices), num_nodes, len(probabilities)))
+
+    sorted_probabilities = sorted(probabilities)
+    chunk_results = []
+    for repetition_index in repetition_indices:
+        logger.debug("Processing coupled graphs with {} nodes, rep {} (timeout for computation: {})".format(
+            num_nodes, repetition_index, pipeline.timeout))
+        generation_timer = phase_timing.PhaseTimer()
+        with generation_timer.measure("generation"):
+            graph_generator.seed(derive_coupled_seed(random_seed_base, num_nodes, repetition_index))
+            graphs = graph_generator.generate_coupled_graphs(num_nodes, sorted_probabilities)
+        outcomes = [None] * len(graphs)
+        phase_timers = [pipeline.start_phase_timer()] + [phase_timing.PhaseTimer() for _ in graphs[1:]]
+        generation_timings = generation_timer.get_timings()
+        for phase_timer in phase_timers:
+            phase_timer.add_time("generation", generation_timings.get_wall_time("generation") / len(graphs),
+                                 generation_timings.get_cpu_time("generation") / len(graphs))
+
+        def decompose(index):
+            outcomes[index] = pipeline.decompose(graphs[index], phase_timers[index])
+
+        def fill_range(lower_index, upper_index):
+            if upper_index - lower_index <= 1:
+                return
+            lower_treewidth = outcomes[lower_index].get_treewidth()
+            if lower_treewidth is not None and lower_treewidth == outcomes[upper_index].get_treewidth():
+                for index in range(lower_index + 1, upper_index):
+                    outcomes[index] = pipeline.derive_from_supergraph(graphs[index], outcomes[upper_index],
+                                                                      phase_timers[index])
+                return
+            middle_index = (lower_index + upper_index) // 2
+            decompose(middle_index)
+            fill_range(lower_index, middle_index)
+            fill_range(middle_index, upper_index)
+
+        decompose(0)
+        if len(graphs) > 1:
+            decompose(len(graphs) - 1)
+            fill_range(0, len(graphs) - 1)
+
+        for prob, graph, outcome, phase_timer in zip(sorted_probabilities, graphs, outcomes, phase_timers):
+            if (prob, repetition_index) in completed_tasks:
+                # recorded by an earlier execution
+                continue
+            result = pipeline.create_result(graph, num_nodes, prob, repetition_index, outcome, phase_timer)
+            _write_result(result, outcome, pipeline, result_writer, logger, metrics_publisher)
+            chunk_results.append((num_nodes, prob, repetition_index, result.treewidth, outcome.runtime))
+    return chunk_results
+
+
+class DecompositionOutcome(object):
+    ''' The tree decomposition of a single graph together with how and how fast it was obtained. '''
+
+    def __init__(self, tree_decomposition, runtime, decomposition_method, cache_hit=False, is_optimal=True,
+                 lower_bound=None):
+        self.tree_decomposition = tree_decomposition
+        self.runtime = runtime
+        self.decomposition_method = decomposition_method
+        self.cache_hit = cache_hit
+        # whether the width of the decomposition is the treewidth; otherwise, the lower bound on the treewidth is given
+        self.is_optimal = is_optimal
+        self.lower_bound = lower_bound
+        # the time spent on verifying the decomposition (not contained in the runtime), None if it was not verified
+        self.verification_time = None
+        # whether the backend was invoked (for the graph or one of its components)
+        self.solver_invoked = False
+        # the ChildResourceUsage of the solver processes, None if the decomposition was computed in-process
+        self.child_resource_usage = None
+
+    def get_treewidth(self):
+        if not self.is_optimal:
+            return None
+        return self.get_upper_bound()
+
+    def get_upper_bound(self):
+        if self.tree_decomposition is None:
+            return None
+        return self.tree_decomposition.width
+
+    def get_lower_bound(self):
+        if self.is_optimal:
+            return self.get_upper_bound()
+        return self.lower_bound
+
+
+class TreeDecompositionPipeline(object):
+    ''' Obtains the tree decompositions of graphs by (in this order) looking them up in the treewidth cache (if given),
+        comparing lower and upper bounds (if use_treewidth_bounds is set), and invoking the solver (the backend, by
+        default Tamaki's algorithm). If use_preprocessing is set, the solver is only invoked for the connected
+        components of the graph obtained by safe reductions (see treewidth_preprocessing). Graphs and components with at
+        most exact_solver_max_nodes nodes are decomposed by the in-process exact solver (see exact_treewidth) instead.
+        If anytime is set, graphs which could not be decomposed otherwise are decomposed heuristically. Decompositions
+        are verified according to the policy of the verifier (by default, all of them) and optimal decompositions are
+        added to the cache.
+
+        The times spent in the phases of processing a graph are accumulated by a phase_timing.PhaseTimer per graph. As
+        a result cannot contain the time for writing itself, the time spent on writing results is added to the timer of
+        the subsequent graph (see start_phase_timer).
+    '''
+
+    def __init__(self, timeout, store_graphs_of_treewidth, store_only_connected_graphs, logger, cache=None,
+                 use_treewidth_bounds=False, use_preprocessing=False, component_threads=1,
+                 exact_solver_max_nodes=0, anytime=False, backend=None, verifier=None):
+        self.timeout = timeout
+        self.store_graphs_of_treewidth = store_graphs_of_treewidth
+        self.store_only_connected_graphs = store_only_connected_graphs
+        self.logger = logger
+        self.cache = cache
+        self.use_treewidth_bounds = use_treewidth_bounds
+        self.use_preprocessing = use_preprocessing
+        self.component_threads = component_threads
+        self.exact_solver_max_nodes = exact_solver_max_nodes
+        self.anytime = anytime
+        if backend is None:
+            backend = decomposition_backends.TamakiBackend(timeout=timeout, logger=logger)
+        self.backend = backend
+        if verifier is None:
+            verifier = tree_decomposition_verification.TreeDecompositionVerifier()
+        self.verifier = verifier
+        self._result_writing_timer = phase_timing.PhaseTimer()
+
+    def start_phase_timer(self):
+        ''' Returns the PhaseTimer for the next graph, which contains the time spent on writing results since the
+            previous call.
+        '''
+        phase_timer = self._result_writing_timer
+        self._result_writing_timer = phase_timing.PhaseTimer()
+        return phase_timer
+
+    def measure_result_writing(self):
+        return self._result_writing_timer.measure("result_writing")
+
+    def decompose(self, graph, phase_timer=None):
+        ''' Returns the DecompositionOutcome of the graph. The times spent on decomposing and on verifying the
+            decomposition are added to the phase_timer (if given).
+        '''
+        if phase_timer is None:
+            phase_timer = phase_timing.PhaseTimer()
+        with phase_timer.measure("decomposition"):
+            if self.backend.spawns_child_processes:
+                with child_resource_usage.ChildResourceMonitor() as monitor:
+                    canonical_graph, outcome = self._decompose_with_cache(graph)
+                if outcome.solver_invoked:
+                    outcome.child_resource_usage = monitor.usage
+            else:
+                canonical_graph, outcome = self._decompose_with_cache(graph)
+        with phase_timer.measure("verification"):
+            outcome.verification_time = self.verifier.verify(graph, outcome.tree_decomposition)
+        if canonical_graph is not None and not outcome.cache_hit and outcome.tree_decomposition is not None \
+                and outcome.is_optimal:
+            with phase_timer.measure("decomposition"):
+                self.cache.store(canonical_graph, outcome.tree_decomposition)
+        return outcome
+
+    def _decompose_with_cache(self, graph):
+        ''' Returns the canonical form of the graph (see _lookup_in_cache) and its outcome. '''
+        canonical_graph, outcome = self._lookup_in_cache(graph)
+        if outcome is None:
+            outcome = self._decompose_uncached(graph)
+            if outcome.tree_decomposition is None and self.anytime:
+                outcome = self._decompose_heuristically(graph, outcome)
+        return canonical_graph, outcome
+
+    def _lookup_in_cache(self, graph):
+        ''' Returns the canonical form of the graph (None if it is not cached) and the outcome of the cache lookup (None
+            if the graph was not found). The runtime of cache hits is the time for canonicalization and lookup.
+        '''
+        if self.cache is None:
+            return None, None
+        algorithm_time_start = time.perf_counter()
+        canonical_graph = self.cache.canonicalize(graph)
+        if canonical_graph is None:
+            return None, None
+        tree_decomp = self.cache.lookup(canonical_graph)
+        if tree_decomp is None:
+            return canonical_graph, None
+        self.logger.debug("Found graph in treewidth cache.")
+        return canonical_graph, DecompositionOutcome(tree_decomp, time.perf_counter() - algorithm_time_start, "cache",
+                                                     cache_hit=True)
+
+    def _decompose_heuristically(self, graph, failed_outcome):
+        ''' Returns the outcome consisting of the decomposition induced by the best heuristic elimination ordering and
+            the best lower bound, whose runtime includes the runtime of the failed attempt.
+        '''
+        algorithm_time_start = time.perf_counter()
+        bitset_graph = treewidth_bounds.BitsetGraph.from_undirected_graph(graph)
+        bounds = treewidth_bounds.compute_treewidth_bounds(bitset_graph)
+        tree_decomp = treewidth_bounds.tree_decomposition_from_elimination_ordering(bitset_graph,
+                                                                                    bounds.elimination_ordering)
+        algorithm_time = time.perf_counter() - algorithm_time_start + (failed_outcome.runtime or 0.0)
+        self.logger.info("Could not decompose graph exactly; using heuristic decomposition ({} <= tw <= {})".format(
+            bounds.lower_bound, bounds.upper_bound))
+        outcome = DecompositionOutcome(tree_decomp, algorithm_time, "bounds" if bounds.is_tight() else "heuristic",
+                                       is_optimal=bounds.is_tight(),
+                                       lower_bound=bounds.lower_bound)
+        outcome.solver_invoked = failed_outcome.solver_invoked
+        return outcome
+
+    def _decompose_uncached(self, graph):
+        if self.use_treewidth_bounds:
+            algorithm_time_start = time.perf_counter()
+            bitset_graph = treewidth_bounds.BitsetGraph.from_undirected_graph(graph)
+            bounds = treewidth_bounds.compute_treewidth_bounds(bitset_graph)
+            if bounds.is_tight():
+                self.logger.debug("Treewidth bounds match.")
+                tree_decomp = treewidth_bounds.tree_decomposition_from_elimination_ordering(
+                    bitset_graph, bounds.elimination_ordering)
+                return DecompositionOutcome(tree_decomp, time.perf_counter() - algorithm_time_start, "bounds")
+            self.logger.debug("Treewidth bounds do not match: {} <= tw <= {}".format(bounds.lower_bound,
+                                                                                  bounds.upper_bound))
+
+        if len(graph.nodes) <= self.exact_solver_max_nodes:
+            algorithm_time_start = time.perf_counter()
+            tree_decomp = exact_treewidth.compute_exact_tree_decomposition(graph)
+            return DecompositionOutcome(tree_decomp, time.perf_counter() - algorithm_time_start, "exact")
+
+        if self.use_preprocessing:
+            return self._decompose_with_preprocessing(graph)
+
+        algorithm_time_start = time.perf_counter()
+        tree_decomp = self.backend.compute_tree_decomposition(graph)
+        outcome = DecompositionOutcome(tree_decomp, time.perf_counter() - algorithm_time_start, "solver",
+                                       is_optimal=self.backend.is_exact)
+        outcome.solver_invoked = True
+        return outcome
+
+    def _decompose_with_preprocessing(self, graph):
+        ''' Decomposes the components of the reduced graph. '''
+
+        def solve_component(component_graph):
+            if len(component_graph.nodes) <= self.exact_solver_max_nodes:
+                return exact_treewidth.compute_exact_tree_decomposition(component_graph)
+            return self.backend.compute_tree_decomposition(component_graph)
+
+        algorithm_time_start = time.perf_counter()
+        reduction = treewidth_preprocessing.reduce_graph(graph)
+        self.logger.debug("Reduced graph to {} components by eliminating {} nodes (lower bound {})".format(
+            len(reduction.components), len(reduction.eliminated_nodes), reduction.lower_bound))
+        tree_decomp = treewidth_preprocessing.decompose_reduced_graph(reduction, solve_component,
+                                                                      threads=self.component_threads)
+        algorithm_time = time.perf_counter() - algorithm_time_start
+        if not reduction.components:
+            decomposition_method = "reduction"
+        elif all(len(nodes) <= self.exact_solver_max_nodes for nodes, _ in reduction.components):
+            decomposition_method = "exact"
+        else:
+            decomposition_method = "solver"
+        is_optimal = decomposition_method != "solver" or self.backend.is_exact
+        outcome = DecompositionOutcome(tree_decomp, algorithm_time, decomposition_method, is_optimal=is_optimal)
+        outcome.solver_invoked = decomposition_method == "solver"
+        return outcome
+
+    def derive_from_supergraph(self, graph, supergraph_outcome, phase_timer=None):
+        ''' Returns the outcome for a graph contained in a supergraph of equal treewidth, whose decomposition is valid
+            (and optimal) for the graph as well. As the decomposition is reused as is, the runtime is zero.
+        '''
+        if phase_timer is None:
+            phase_timer = phase_timing.PhaseTimer()
+        outcome = DecompositionOutcome(supergraph_outcome.tree_decomposition, 0.0, "coupling")
+        with phase_timer.measure("verification"):
+            outcome.verification_time = self.verifier.verify(graph, outcome.tree_decomposition)
+        return outcome
+
+    def create_result(self, graph, num_nodes, prob, repetition_index, outcome, phase_timer=None):
+        ''' Returns the TreeDecompositionAlgorithmResult of the graph, which contains the timings of the phase_timer (if
+            given) including the time for extracting the edge representation.
+        '''
+        if phase_timer is None:
+            phase_timer = phase_timing.PhaseTimer()
+        treewidth = outcome.get_treewidth()
+        # graphs whose treewidth is unknown are stored according to the width of their decomposition
+        width = treewidth if treewidth is not None else outcome.get_upper_bound()
+
+        graph_edge_representation = None
+
+        if width is not None and width in self.store_graphs_of_treewidth:
+            #generally interesting graph: compute edge_representation
+            with phase_timer.measure("edge_representation"):
+                graph_edge_representation = graph.get_edge_representation()
+            if self.store_only_connected_graphs:
+                #if we are only interested in connected graphs, then we only store the representation if it is connected
+                with phase_timer.measure("connectivity_check"):
+                    is_connected = datamodel.is_connected_undirected_edge_representation(graph_edge_representation)
+                if not is_connected:
+                    graph_edge_representation = None
+
+        if graph_edge_representation is not None:
+            self.logger.debug("Storing graph of treewidth {} and number of nodes {}.".format(width, num_nodes))
+
+        return TreeDecompositionAlgorithmResult(
+            num_nodes=num_nodes,
+            edge_probability=prob,
+            repetition_index=repetition_index,
+            undirected_graph_edge_representation=graph_edge_representation,
+            treewidth=treewidth,
+            runtime_treewidth_computation=outcome.runtime,
+            treewidth_lower_bound=outcome.get_lower_bound(),
+            treewidth_upper_bound=outcome.get_upper_bound(),
+            cache_hit=outcome.cache_hit,
+            decomposition_method=outcome.decomposition_method,
+            decomposition_backend=self.backend.name,
+            runtime_verification=outcome.verification_time,
+            phase_timings=phase_timer.get_timings(),
+            child_resource_usage=outcome.child_resource_usage,
+        )
 
 
 class SimpleRandomGraphGenerator(object):
@@ -221,6 +1508,14 @@ class SimpleRandomGraphGenerator(object):
     This class generates directed graphs uniformly at random by first introducing the selected number of nodes and
     then adding directed (!) edges uniformly at random.
     Mostly copied from alib.scenariogeneration, since much of the original code adds unnecessary complexity (costs, demands, etc)
+
+    Two engines are available:
+    - "numpy":  all node pairs (i, j) with i < j are sampled using a single numpy call (or, for sparse probabilities,
+                using geometrically distributed skips between consecutive edges) and the graph is then built from the
+                resulting edge array.
+    - "legacy": the original implementation drawing one number of python's random module per node pair. Together with
+                the seeding and partitioning of earlier studies (see LegacyGraphSequence), it reproduces their graphs.
+    Both engines generate Erdos-Renyi graphs and are reproducible given the seed (see seed()).
     """
 
     EXPECTED_PARAMETERS = [
@@ -228,10 +1523,100 @@ class SimpleRandomGraphGenerator(object):
         "probability"
     ]
 
-    def __init__(self):
-        pass
+    ENGINES = ["numpy", "legacy"]
+    DEFAULT_ENGINE = "numpy"
+
+    # below this connection probability, the numpy engine skips over non-edges instead of sampling all node pairs
+    SPARSE_PROBABILITY_THRESHOLD = 0.1
+
+    def __init__(self, engine=None):
+        if engine is None:
+            engine = self.DEFAULT_ENGINE
+        if engine not in self.ENGINES:
+            raise ValueError("Unknown graph generation engine {}; must be one of {}".format(engine, self.ENGINES))
+        self.engine = engine
+        self._rng = np.random.default_rng()
+        self._node_pairs_cache = {}
+
+    def seed(self, seed):
+        """ Seeds the random number generator used by the engine. """
+        if self.engine == "legacy":
+            random.seed(seed)
+        else:
+            self._rng = np.random.default_rng(seed)
 
     def generate_graph(self, number_of_nodes, connection_probability):
+        if self.engine == "legacy":
+            return self._generate_graph_legacy(number_of_nodes, connection_probability)
+        edges = self.generate_edge_array(number_of_nodes, connection_probability)
+        return self.build_graph_from_edge_array(number_of_nodes, edges)
+
+    def generate_edge_array(self, number_of_nodes, connection_probability):
+        """ Returns the edges of a random graph as an integer array of shape (number of edges, 2). The nodes are
+            numbered from 1 to number_of_nodes and each row (i, j) satisfies i < j. Rows are sorted lexicographically.
+        """
+        first_nodes, second_nodes = self._get_node_pairs(number_of_nodes)
+        number_of_pairs = len(first_nodes)
+        if connection_probability <= 0 or number_of_pairs == 0:
+            selected_pairs = np.empty(0, dtype=np.intp)
+        elif connection_probability >= 1:
+            selected_pairs = np.arange(number_of_pairs)
+        elif connection_probability < self.SPARSE_PROBABILITY_THRESHOLD:
+            selected_pairs = self._sample_pairs_by_geometric_skipping(number_of_pairs, connection_probability)
+        else:
+            selected_pairs = np.flatnonzero(self._rng.random(number_of_pairs) < connection_probability)
+        return np.column_stack((first_nodes[selected_pairs], second_nodes[selected_pairs]))
+
+    def generate_coupled_graphs(self, number_of_nodes, connection_probabilities):
+        edge_arrays = self.generate_coupled_edge_arrays(number_of_nodes, connection_probabilities)
+        return [self.build_graph_from_edge_array(number_of_nodes, edges) for edges in edge_arrays]
+
+    def generate_coupled_edge_arrays(self, number_of_nodes, connection_probabilities):
+        """ Returns the edge arrays (see generate_edge_array) of random graphs for all given connection probabilities,
+            which share a single random number per node pair: each pair is an edge of the graph of probability p if its
+            number is below p. Hence, each graph is an Erdos-Renyi graph of its probability and the graphs are nested,
+            i.e. the graph of a smaller probability is a subgraph of the graph of a larger probability.
+        """
+        if self.engine == "legacy":
+            raise ValueError("Coupled graphs cannot be generated by the legacy engine")
+        first_nodes, second_nodes = self._get_node_pairs(number_of_nodes)
+        pair_values = self._rng.random(len(first_nodes))
+        edge_arrays = []
+        for connection_probability in connection_probabilities:
+            selected_pairs = np.flatnonzero(pair_values < connection_probability)
+            edge_arrays.append(np.column_stack((first_nodes[selected_pairs], second_nodes[selected_pairs])))
+        return edge_arrays
+
+    def _sample_pairs_by_geometric_skipping(self, number_of_pairs, connection_probability):
+        """ Samples the indices of the selected node pairs by drawing the (geometrically distributed) distances between
+            consecutive edges. The number of random numbers drawn is proportional to the number of edges instead of the
+            number of node pairs.
+        """
+        expected_number_of_edges = number_of_pairs * connection_probability
+        batch_size = int(expected_number_of_edges + 4 * np.sqrt(expected_number_of_edges)) + 1
+        positions = np.cumsum(self._rng.geometric(connection_probability, size=batch_size)) - 1
+        while positions[-1] < number_of_pairs:
+            further_positions = positions[-1] + np.cumsum(self._rng.geometric(connection_probability, size=batch_size))
+            positions = np.concatenate((positions, further_positions))
+        return positions[:np.searchsorted(positions, number_of_pairs)]
+
+    def _get_node_pairs(self, number_of_nodes):
+        if number_of_nodes not in self._node_pairs_cache:
+            first_nodes, second_nodes = np.triu_indices(number_of_nodes, k=1)
+            self._node_pairs_cache[number_of_nodes] = (first_nodes + 1, second_nodes + 1)
+        return self._node_pairs_cache[number_of_nodes]
+
+    @staticmethod
+    def build_graph_from_edge_array(number_of_nodes, edges, name="req"):
+        undirected_graph = datamodel.UndirectedGraph(name)
+        node_names = [str(i) for i in range(number_of_nodes + 1)]
+        for node in node_names[1:]:
+            undirected_graph.add_node(node)
+        for i, j in edges.tolist():
+            undirected_graph.add_edge(node_names[i], node_names[j])
+        return undirected_graph
+
+    def _generate_graph_legacy(self, number_of_nodes, connection_probability):
         name = "req"
         undirected_graph = datamodel.UndirectedGraph(name)
 
@@ -253,6 +1638,18 @@ class TreeDecompositionAlgorithmResult(object):
     ''' The result of a single tree decomposition computation.
 
     '''
+    # defaults for results pickled before the attributes were introduced
+    cache_hit = False
+    decomposition_method = "solver"
+    treewidth_lower_bound = None
+    treewidth_upper_bound = None
+    decomposition_backend = "tamaki"
+    runtime_verification = None
+    phase_timings = None
+    child_cpu_time_user = None
+    child_cpu_time_system = None
+    child_peak_rss = None
+
     def __init__(
             self,
             num_nodes,
@@ -261,6 +1658,14 @@ class TreeDecompositionAlgorithmResult(object):
             undirected_graph_edge_representation,
             treewidth,
             runtime_treewidth_computation,
+            cache_hit=False,
+            decomposition_method="solver",
+            treewidth_lower_bound=None,
+            treewidth_upper_bound=None,
+            decomposition_backend="tamaki",
+            runtime_verification=None,
+            phase_timings=None,
+            child_resource_usage=None,
     ):
         #the 3 generation parameters:
         self.num_nodes = num_nodes
@@ -272,12 +1677,81 @@ class TreeDecompositionAlgorithmResult(object):
         self.treewidth = treewidth
         self.runtime_treewidth_computation = runtime_treewidth_computation
 
+        #the time for verifying the tree decomposition (which is not contained in runtime_treewidth_computation); None
+        #if the decomposition was not verified (see tree_decomposition_verification.VERIFICATION_POLICIES)
+        self.runtime_verification = runtime_verification
+
+        #the wall and CPU times spent by the worker in the phases of processing the graph (see phase_timing.PHASES)
+        self.phase_timings = phase_timings
+
+        #the user and system CPU time (in seconds) and the peak resident set size (in bytes) of the solver processes (see
+        #child_resource_usage); None if the decomposition was computed in-process or the peak RSS is unknown
+        self.child_cpu_time_user = None
+        self.child_cpu_time_system = None
+        self.child_peak_rss = None
+        if child_resource_usage is not None:
+            self.child_cpu_time_user = child_resource_usage.user_time
+            self.child_cpu_time_system = child_resource_usage.system_time
+            self.child_peak_rss = child_resource_usage.peak_rss
+
+        #whether the tree decomposition was taken from the treewidth cache (in which case runtime_treewidth_computation
+        #is the runtime of the cache lookup)
+        self.cache_hit = cache_hit
+
+        #how the tree decomposition was obtained (see DECOMPOSITION_METHODS) and the backend used as solver (see
+        #decomposition_backends.BACKENDS)
+        self.decomposition_method = decomposition_method
+        self.decomposition_backend = decomposition_backend
+
+        #bounds on the treewidth, which both equal the treewidth if it is known; in anytime mode, the upper bound is the
+        #width of the heuristic decomposition of graphs which could not be decomposed exactly
+        if treewidth is not None:
+            treewidth_lower_bound = treewidth_upper_bound = treewidth
+        self.treewidth_lower_bound = treewidth_lower_bound
+        self.treewidth_upper_bound = treewidth_upper_bound
+
+    @property
+    def is_optimal(self):
+        ''' Whether the treewidth of the graph is known, i.e. the decomposition was optimal. '''
+        return self.treewidth is not None
+
+    def __getstate__(self):
+        # the edge representation is pickled separately, such that unpickled results can be filtered without
+        # deserializing their edge representations (which only happens upon access, see __getattr__)
+        state = self.__dict__.copy()
+        edge_representation = state.pop("undirected_graph_edge_representation", None)
+        if edge_representation is not None:
+            state["_serialized_edge_representation"] = pickle.dumps(edge_representation,
+                                                                    protocol=pickle.HIGHEST_PROTOCOL)
+        return state
+
+    def __getattr__(self, name):
+        # only called for attributes not found otherwise, i.e. for not yet deserialized edge representations
+        if name != "undirected_graph_edge_representation":
+            raise AttributeError(name)
+        serialized_edge_representation = self.__dict__.pop("_serialized_edge_representation", None)
+        edge_representation = None
+        if serialized_edge_representation is not None:
+            edge_representation = pickle.loads(serialized_edge_representation)
+        self.undirected_graph_edge_representation = edge_representation
+        return edge_representation
+
+    def get_serialized_edge_representation(self):
+        ''' Returns the pickled edge representation (None if no graph is stored) without deserializing it. '''
+        if "_serialized_edge_representation" in self.__dict__:
+            return self.__dict__["_serialized_edge_representation"]
+        if self.undirected_graph_edge_representation is None:
+            return None
+        return pickle.dumps(self.undirected_graph_edge_representation, protocol=pickle.HIGHEST_PROTOCOL)
+
     def short_representation(self):
-        return "Tree Decomposition Result for |V|: {}, edge probability: {}, repetition index: {}\n\ttreewidth: {}\n\truntime: {}\n".format(
+        return "Tree Decomposition Result for |V|: {}, edge probability: {}, repetition index: {}\n\ttreewidth: {} (bounds: [{}, {}])\n\truntime: {}\n".format(
             self.num_nodes,
             self.edge_probability,
             self.repetition_index,
             self.treewidth,
+            self.treewidth_lower_bound,
+            self.treewidth_upper_bound,
             self.runtime_treewidth_computation,
         )
 
@@ -17,6 +17,8 @@ from matplotlib.colors import LogNorm
 from vnep_approx import treewidth_model
 import math
 
+from . import columnar_results, phase_timing
+
 try:
     import pickle as pickle
 except ImportError:
@@ -80,11 +82,15 @@ information:
 - vmin and vmax:        minimum and maximum value for the heatmap
 - cmap:                 the colormap that is to be used for the heatmap
 - lookup_function:      which of the values shall be plotted. the input is a tuple consisting of a baseline and a randomized rounding
-                        solution. The function must return a numeric value or NaN
+                        solution. The function must return a numeric value or NaN (or None, e.g. for the treewidth of
+                        graphs which could not be decomposed, which is discarded)
 - metric filter:        after having applied the lookup_function (returning a numeric value or NaN) the metric_filter is 
                         applied (if given) and values not matching this function are discarded.
 - rounding_function:    the function that is applied for displaying the mean values in the heatmap plots
 - colorbar_ticks:       the tick values (numeric) for the heatmap plot   
+- exclude_cache_hits:   if True, results whose tree decomposition was taken from the treewidth cache are not considered
+                        (their runtime is the runtime of the cache lookup). Also applies to boxplot and decomposition
+                        runtime plot specifications.
 
 """
 heatmap_specification_avg_rounded_treewidth = dict(
@@ -148,6 +154,52 @@ heatmap_specification_avg_runtime = dict(
     cmap="inferno",
     plot_type=HeatmapPlotType.Simple_Treewidth_Evaluation_Average,
     lookup_function=lambda tw_result: tw_result.runtime_treewidth_computation,
+    exclude_cache_hits=True,
+    metric_filter=lambda obj: (obj >= -0.00001)
+)
+
+heatmap_specification_avg_runtime_including_cache_hits = dict(
+    name="Avg. Runtime (incl. Cache Hits)",
+    filename="runtime_including_cache_hits_avg",
+    vmin=0.1,
+    vmax=5.0,
+    cmap="inferno",
+    plot_type=HeatmapPlotType.Simple_Treewidth_Evaluation_Average,
+    lookup_function=lambda tw_result: tw_result.runtime_treewidth_computation,
+    exclude_cache_hits=False,
+    metric_filter=lambda obj: (obj >= -0.00001)
+)
+heatmap_specification_avg_treewidth_upper_bound = dict(
+    name="Avg. Treewidth Upper Bound",
+    filename="treewidth_upper_bound_avg",
+    vmin=1.0,
+    vmax=44.0,
+    colorbar_ticks=[1,2, 3, 4, 6, 10, 20, 40],
+    cmap="inferno",
+    plot_type=HeatmapPlotType.Simple_Treewidth_Evaluation_Average,
+    # results written before the bounds were introduced only provide the treewidth
+    lookup_function=lambda tw_result: tw_result.treewidth if tw_result.treewidth_upper_bound is None else tw_result.treewidth_upper_bound,
+    metric_filter=lambda obj: (obj >= -0.00001)
+)
+heatmap_specification_avg_treewidth_lower_bound = dict(
+    name="Avg. Treewidth Lower Bound",
+    filename="treewidth_lower_bound_avg",
+    vmin=1.0,
+    vmax=44.0,
+    colorbar_ticks=[1,2, 3, 4, 6, 10, 20, 40],
+    cmap="inferno",
+    plot_type=HeatmapPlotType.Simple_Treewidth_Evaluation_Average,
+    lookup_function=lambda tw_result: tw_result.treewidth if tw_result.treewidth_lower_bound is None else tw_result.treewidth_lower_bound,
+    metric_filter=lambda obj: (obj >= -0.00001)
+)
+heatmap_specification_avg_optimal = dict(
+    name="Optimally Decomposed Graphs [%]",
+    filename="optimal_avg",
+    vmin=1.0,
+    vmax=100.0,
+    cmap="inferno",
+    plot_type=HeatmapPlotType.Simple_Treewidth_Evaluation_Average,
+    lookup_function=lambda tw_result: 100.0 if tw_result.treewidth is not None else 0.0,
     metric_filter=lambda obj: (obj >= -0.00001)
 )
 heatmap_specification_max_treewidth = dict(
@@ -170,6 +222,41 @@ heatmap_specification_max_runtime = dict(
     cmap="inferno",
     plot_type=HeatmapPlotType.Simple_Treewidth_Evaluation_Max,
     lookup_function=lambda tw_result: tw_result.runtime_treewidth_computation,
+    exclude_cache_hits=True,
+    metric_filter=lambda obj: (obj >= -0.00001)
+)
+heatmap_specification_avg_child_cpu_time = dict(
+    name="Avg. Solver CPU Time",
+    filename="child_cpu_time_avg",
+    vmin=0.1,
+    vmax=20.0,
+    cmap="inferno",
+    plot_type=HeatmapPlotType.Simple_Treewidth_Evaluation_Average,
+    # the user and system CPU time of the solver processes, only known for results of Tamaki's algorithm
+    lookup_function=lambda tw_result: None if tw_result.child_cpu_time_user is None else tw_result.child_cpu_time_user + tw_result.child_cpu_time_system,
+    exclude_cache_hits=True,
+    metric_filter=lambda obj: (obj >= -0.00001)
+)
+heatmap_specification_avg_child_peak_rss = dict(
+    name="Avg. Solver Peak Memory [MiB]",
+    filename="child_peak_rss_avg",
+    vmin=1.0,
+    vmax=2048.0,
+    cmap="inferno",
+    plot_type=HeatmapPlotType.Simple_Treewidth_Evaluation_Average,
+    lookup_function=lambda tw_result: None if tw_result.child_peak_rss is None else tw_result.child_peak_rss / 2.0 ** 20,
+    exclude_cache_hits=True,
+    metric_filter=lambda obj: (obj >= -0.00001)
+)
+heatmap_specification_max_child_peak_rss = dict(
+    name="Max. Solver Peak Memory [MiB]",
+    filename="child_peak_rss_max",
+    vmin=1.0,
+    vmax=2048.0,
+    cmap="inferno",
+    plot_type=HeatmapPlotType.Simple_Treewidth_Evaluation_Max,
+    lookup_function=lambda tw_result: None if tw_result.child_peak_rss is None else tw_result.child_peak_rss / 2.0 ** 20,
+    exclude_cache_hits=True,
     metric_filter=lambda obj: (obj >= -0.00001)
 )
 
@@ -179,8 +266,15 @@ global_heatmap_specfications = [
     heatmap_specification_avg_ceil_treewidth,
     heatmap_specification_avg_floor_treewidth,
     heatmap_specification_avg_runtime,
+    heatmap_specification_avg_runtime_including_cache_hits,
+    heatmap_specification_avg_treewidth_upper_bound,
+    heatmap_specification_avg_treewidth_lower_bound,
+    heatmap_specification_avg_optimal,
     heatmap_specification_max_treewidth,
     heatmap_specification_max_runtime,
+    heatmap_specification_avg_child_cpu_time,
+    heatmap_specification_avg_child_peak_rss,
+    heatmap_specification_max_child_peak_rss,
 ]
 
 heatmap_specifications_per_type = {
@@ -213,6 +307,14 @@ heatmap_axes_specification_basic = dict(
 
 global_heatmap_axes_specifications = [heatmap_axes_specification_basic]
 
+
+def select_results(results, metric_specification):
+    """ Returns the results to be considered for the given metric specification (see exclude_cache_hits). """
+    if metric_specification.get("exclude_cache_hits", False):
+        return [result for result in results if not result.cache_hit]
+    return results
+
+
 """
 Boxplots: define plot types, metric specifications and axes specifications analogously. Key differences:
   - y-axis parameters are tied directly to metric specifications
@@ -231,6 +333,7 @@ boxplot_metric_specification_runtime = dict(
     use_log_scale=True,
     plot_type=BoxplotPlotType.Simple_Treewidth_Evaluation_Boxplot,
     lookup_function=lambda tw_result: tw_result.runtime_treewidth_computation,
+    exclude_cache_hits=True,
 )
 
 global_boxplot_specfications = [
@@ -288,6 +391,7 @@ decomposition_runtime_plot_metric_specification_runtime = dict(
     use_log_scale=True,
     plot_type=DecompositionRuntimePlotType.Simple_Treewidth_Evaluation_DecompositionRuntimePlot,
     lookup_function=lambda tw_result: tw_result.runtime_treewidth_computation,
+    exclude_cache_hits=True,
     percentiles=[0, 1, 25, 50, 75, 99, 100],
     linewidths=[0.25, 0.5, 0.5, 2, 0.5, 0.5, 0.25],
     color_values=[0.9, 0.6, 0.3, 0.3, 0.6, 0.9],
@@ -329,6 +433,47 @@ global_decomposition_runtime_plot_axes_specfications = [
 ]
 
 
+"""
+Phase Breakdown Plots: stacked bars of the mean time per phase of processing a graph (see phase_timing.PHASES), one
+plot per number of nodes with the probabilities on the x-axis.
+"""
+
+
+class PhaseBreakdownPlotType(object):
+    Simple_Treewidth_Evaluation_PhaseBreakdownPlot = 0
+
+
+phase_breakdown_plot_metric_specification_wall_time = dict(
+    name="Wall Time per Phase",
+    filename="phase_breakdown_wall_time",
+    y_axis_title="Mean Wall Time [s]",
+    plot_type=PhaseBreakdownPlotType.Simple_Treewidth_Evaluation_PhaseBreakdownPlot,
+    lookup_function=lambda phase_timings: phase_timings.wall_times,
+)
+
+phase_breakdown_plot_metric_specification_cpu_time = dict(
+    name="CPU Time per Phase",
+    filename="phase_breakdown_cpu_time",
+    y_axis_title="Mean CPU Time [s]",
+    plot_type=PhaseBreakdownPlotType.Simple_Treewidth_Evaluation_PhaseBreakdownPlot,
+    lookup_function=lambda phase_timings: phase_timings.cpu_times,
+)
+
+global_phase_breakdown_plot_specifications = [
+    phase_breakdown_plot_metric_specification_wall_time,
+    phase_breakdown_plot_metric_specification_cpu_time,
+]
+
+PHASE_LABELS = {
+    "generation": "Generation",
+    "decomposition": "Decomposition",
+    "verification": "Verification",
+    "edge_representation": "Edge Repr.",
+    "connectivity_check": "Connectivity",
+    "result_writing": "Result Writing",
+}
+
+
 class AbstractPlotter(object):
     ''' Abstract Plotter interface providing functionality used by the majority of plotting classes of this module.
     '''
@@ -543,8 +688,11 @@ class SingleBoxplotPlotter(AbstractPlotter):
                 print("\tprocessing data: {} nodes, prob {}".format(num_nodes, prob))
                 # assert len(results) == self.experiment_parameters["scenario_repetition"]  # sanity check for now
                 # logger.debug("values are {}".format(values_dict))
-                for result in results[::self.sampling_rate]:
+                for result in select_results(results, boxplot_metric_specification)[::self.sampling_rate]:
                     x_val = x_axis_function(result)
+                    if x_val is None:
+                        # e.g. the treewidth of graphs which could not be decomposed exactly
+                        continue
                     if x_val not in values_dict:
                         values_dict[x_val] = []
                     values_dict[x_val].append(lookup_function(result))
@@ -776,8 +924,11 @@ class DecompositionRuntimePlotter(AbstractPlotter):
                 print("\tprocessing data: {} nodes, prob {}".format(num_nodes, prob))
                 # assert len(results) == self.experiment_parameters["scenario_repetition"]  # sanity check for now
                 #logger.debug("values are {}".format(values_dict))
-                for result in results[::self.sampling_rate]:
+                for result in select_results(results, boxplot_metric_specification)[::self.sampling_rate]:
                     x_val = x_axis_function(result)
+                    if x_val is None:
+                        # e.g. the treewidth of graphs which could not be decomposed exactly
+                        continue
                     if x_val not in values_dict:
                         values_dict[x_val] = []
                     values_dict[x_val].append(lookup_function(result))
@@ -798,6 +949,96 @@ class DecompositionRuntimePlotter(AbstractPlotter):
         return solution_count_string
 
 
+class PhaseBreakdownPlotter(AbstractPlotter):
+    ''' Plots the mean time per phase of the results of each (number of nodes, probability) combination as stacked bars.
+        Results without phase timings (e.g. of earlier versions) are ignored.
+    '''
+
+    def __init__(self,
+                 output_path,
+                 output_filetype,
+                 experiment_parameters,
+                 data_dict,
+                 phase_breakdown_plot_type,
+                 list_of_metric_specifications=None,
+                 show_plot=False,
+                 save_plot=True,
+                 overwrite_existing_files=False,
+                 paper_mode=True,
+                 ):
+        super(PhaseBreakdownPlotter, self).__init__(output_path, output_filetype,
+                                                    experiment_parameters, data_dict,
+                                                    show_plot, save_plot,
+                                                    overwrite_existing_files, paper_mode)
+        self.plot_type = phase_breakdown_plot_type
+        if not list_of_metric_specifications:
+            self.list_of_metric_specifications = global_phase_breakdown_plot_specifications
+        else:
+            self.list_of_metric_specifications = list_of_metric_specifications
+
+    def plot_figure(self):
+        for metric_specification in self.list_of_metric_specifications:
+            for num_nodes in sorted(self.data_dict.keys()):
+                self.plot_single_phase_breakdown(metric_specification, num_nodes)
+
+    def plot_single_phase_breakdown(self, phase_breakdown_metric_specification, num_nodes):
+        filter_specifications = [dict(parameter="num_nodes", value=num_nodes)]
+        output_path, filename = self._construct_output_path_and_filename(
+            phase_breakdown_metric_specification["filename"], filter_specifications)
+
+        logger.debug("output_path is {};\t filename is {}".format(output_path, filename))
+
+        if not self.overwrite_existing_files and os.path.exists(filename):
+            logger.info("Skipping generation of {} as this file already exists".format(filename))
+            return
+
+        mean_times_per_probability = self._process_data(phase_breakdown_metric_specification, num_nodes)
+        if not mean_times_per_probability:
+            logger.info("Skipping generation of {} as no phase timings were recorded".format(filename))
+            return
+
+        probabilities = sorted(mean_times_per_probability.keys())
+        mean_times = np.array([mean_times_per_probability[prob] for prob in probabilities])
+        x_positions = np.arange(len(probabilities))
+
+        fig, ax = plt.subplots(figsize=FIGSIZE)
+        title = "{} Nodes".format(num_nodes)
+        if not self.paper_mode:
+            title = phase_breakdown_metric_specification["name"] + "\n" + title
+        ax.set_title(title, fontsize=PLOT_TITLE_FONT_SIZE)
+
+        bottom = np.zeros(len(probabilities))
+        for phase_index, phase in enumerate(phase_timing.PHASES):
+            ax.bar(x_positions, mean_times[:, phase_index], bottom=bottom,
+                   color=plt.cm.inferno(0.1 + 0.8 * phase_index / max(1, len(phase_timing.PHASES) - 1)),
+                   label=PHASE_LABELS[phase])
+            bottom += mean_times[:, phase_index]
+
+        ax.set_xticks(x_positions)
+        ax.set_xticklabels(["{}".format(int(round(100 * prob))) for prob in probabilities])
+        ax.legend(fontsize=LEGEND_LABEL_FONT_SIZE - 2, loc=2, handletextpad=.35, borderaxespad=0.175, borderpad=0.2,
+                  handlelength=1.75)
+
+        ax.tick_params(axis="x", **DEFAULT_MAJOR_TICK_PARAMS)
+        ax.tick_params(axis="y", **DEFAULT_MAJOR_TICK_PARAMS)
+        ax.grid(axis="y")
+
+        ax.set_xlabel("Edge Connection Probability (%)", fontsize=X_AXIS_LABEL_FONT_SIZE)
+        ax.set_ylabel(phase_breakdown_metric_specification['y_axis_title'], fontsize=Y_AXIS_LABEL_FONT_SIZE)
+
+        self._show_and_or_save_plots(output_path, filename)
+
+    def _process_data(self, phase_breakdown_metric_specification, num_nodes):
+        ''' Returns a dict mapping the probabilities to the mean times per phase of the results with num_nodes nodes. '''
+        lookup_function = phase_breakdown_metric_specification["lookup_function"]
+        mean_times_per_probability = {}
+        for prob, results in self.data_dict[num_nodes].items():
+            times = [lookup_function(result.phase_timings) for result in results if result.phase_timings is not None]
+            if times:
+                mean_times_per_probability[prob] = np.mean(times, axis=0)
+        return mean_times_per_probability
+
+
 class SingleHeatmapPlotter(AbstractPlotter):
     def __init__(self,
                  output_path,
@@ -894,8 +1135,9 @@ class SingleHeatmapPlotter(AbstractPlotter):
             # all scenario indices which has x_val as xaxis parameter (e.g. node_resource_factor = 0.5
             sub_dict = self.data_dict[x_val]
             for y_index, y_val in enumerate(yaxis_parameters):
-                results = self.data_dict[x_val][y_val]
+                results = select_results(self.data_dict[x_val][y_val], heatmap_metric_specification)
                 values = [heatmap_metric_specification['lookup_function'](result) for result in results]
+                values = [value for value in values if value is not None]
 
                 if 'metric_filter' in heatmap_metric_specification:
                     values = [value for value in values if heatmap_metric_specification['metric_filter'](value)]
@@ -908,6 +1150,10 @@ class SingleHeatmapPlotter(AbstractPlotter):
                     max_number_of_observed_values = len(values)
 
                 logger.debug("values are {}".format(values))
+                if len(values) == 0:
+                    # e.g. if all results were cache hits
+                    X[y_index, x_index] = np.nan
+                    continue
                 if heatmap_metric_specification["plot_type"] == HeatmapPlotType.Simple_Treewidth_Evaluation_Max:
                     m = np.max(values)
                     logger.debug("max is {}".format(m))
@@ -941,7 +1187,7 @@ class SingleHeatmapPlotter(AbstractPlotter):
                                                                      np.nanmax(observed_values))
             ax.set_title(title)
 
-        norm = LogNorm(vmin=X[X > 0].min(), vmax=X.max())
+        norm = LogNorm(vmin=X[X > 0].min(), vmax=np.nanmax(X))
         heatmap = ax.pcolor(
             X,
             cmap=heatmap_metric_specification['cmap'],
@@ -1058,10 +1304,26 @@ def plot_decomposition_runtime_plots(parameters, data, output_path, output_filet
     baseline_plotter.plot_figure()
 
 
-def make_plots(parameters_file, results_pickle, output_path, output_filetype):
-    parameters = yaml.load(parameters_file)
-    results = pickle.load(results_pickle)
+def plot_phase_breakdown_plots(parameters, data, output_path, output_filetype):
+    baseline_plotter = PhaseBreakdownPlotter(
+        output_path=output_path,
+        output_filetype=output_filetype,
+        experiment_parameters=parameters,
+        phase_breakdown_plot_type=PhaseBreakdownPlotType.Simple_Treewidth_Evaluation_PhaseBreakdownPlot,
+        data_dict=data,
+        show_plot=False,
+        save_plot=True,
+        overwrite_existing_files=True,
+        paper_mode=True,
+    )
+    baseline_plotter.plot_figure()
+
+
+def make_plots(parameters_file, results_path, output_path, output_filetype):
+    parameters = yaml.safe_load(parameters_file)
+    results = columnar_results.load_aggregated_results(results_path)
 
     plot_heatmaps(parameters, results, output_path, output_filetype)
     plot_decomposition_runtime_plots(parameters, results, output_path, output_filetype)
     plot_boxplots(parameters, results, output_path, output_filetype)
+    plot_phase_breakdown_plots(parameters, results, output_path, output_filetype)
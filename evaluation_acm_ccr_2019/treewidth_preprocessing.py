@@ -0,0 +1,210 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+
+import concurrent.futures
+import itertools
+import logging
+
+import vnep_approx.treewidth_model as twm
+
+from alib import datamodel
+
+from . import treewidth_bounds
+
+logger = logging.getLogger(__name__)
+
+""" This module contains safe reductions for computing tree decompositions (cf. Bodlaender and Koster, "Safe reduction
+    rules for weighted treewidth").
+
+    Before invoking a solver, nodes are eliminated as long as one of the following rules applies:
+    - simplicial rule: the neighbors of the node form a clique (in particular, the node has degree at most 1). The
+      degree of the node is a lower bound on the treewidth.
+    - almost simplicial rule: all but one of the neighbors of the node form a clique and the degree of the node does not
+      exceed the lower bound established so far (initially, the degeneracy of the graph). In particular, this covers
+      the series rule for nodes of degree 2.
+    Eliminating a node turns its neighborhood into a clique. The treewidth of the graph is the maximum of the lower bound
+    and the treewidth of the reduced graph, whose connected components are then decomposed independently. Finally, the
+    decompositions of the components are joined and the bags of the eliminated nodes are attached in reverse order of
+    elimination, yielding a decomposition of the original graph."""
+
+
+def _is_clique(nodes, adjacency):
+    for u, v in itertools.combinations(nodes, 2):
+        if v not in adjacency[u]:
+            return False
+    return True
+
+
+def _is_almost_simplicial(node, adjacency):
+    ''' Returns whether all but one of the neighbors of the (non-simplicial) node form a clique. '''
+    neighbors = adjacency[node]
+    for u, v in itertools.combinations(neighbors, 2):
+        if v not in adjacency[u]:
+            # each non-adjacent pair must contain the exceptional neighbor
+            return any(_is_clique(neighbors - {w}, adjacency) for w in (u, v))
+    return False
+
+
+class GraphReduction(object):
+    ''' The result of applying the safe reductions to a graph: the eliminated nodes (in order of elimination) together
+        with their neighbors at the time of elimination, the lower bound on the treewidth, and the connected components
+        of the reduced graph (as pairs of node lists and edge lists).
+    '''
+
+    def __init__(self, graph_name, eliminated_nodes, lower_bound, components):
+        self.graph_name = graph_name
+        self.eliminated_nodes = eliminated_nodes
+        self.lower_bound = lower_bound
+        self.components = components
+
+    def get_component_graphs(self):
+        component_graphs = []
+        for index, (nodes, edges) in enumerate(self.components):
+            component_graph = datamodel.UndirectedGraph("{}_component_{}".format(self.graph_name, index))
+            for node in nodes:
+                component_graph.add_node(node)
+            for u, v in edges:
+                component_graph.add_edge(u, v)
+            component_graphs.append(component_graph)
+        return component_graphs
+
+
+def reduce_graph(graph, lower_bound=None):
+    ''' Applies the simplicial and the almost simplicial rule until neither applies and splits the reduced graph into its
+        connected components. The lower_bound (on the treewidth of the graph) enables the almost simplicial rule for
+        nodes of larger degree; by default, the degeneracy of the graph is used.
+    '''
+    if lower_bound is None:
+        lower_bound = treewidth_bounds.degeneracy_lower_bound(treewidth_bounds.BitsetGraph.from_undirected_graph(graph))
+    # the nodes are considered in sorted order, such that the reductions do not depend on the hash seed
+    adjacency = {node: set() for node in sorted(graph.nodes)}
+    for edge in graph.edges:
+        u, v = tuple(edge)
+        adjacency[u].add(v)
+        adjacency[v].add(u)
+
+    eliminated_nodes = []
+    changed = True
+    while changed:
+        changed = False
+        # nodes of small degree are more likely to be (almost) simplicial
+        for node in sorted(adjacency, key=lambda v: len(adjacency[v])):
+            if node not in adjacency:
+                continue
+            neighbors = adjacency[node]
+            if _is_clique(neighbors, adjacency):
+                lower_bound = max(lower_bound, len(neighbors))
+            elif len(neighbors) > lower_bound or not _is_almost_simplicial(node, adjacency):
+                continue
+            for u, v in itertools.combinations(neighbors, 2):
+                adjacency[u].add(v)
+                adjacency[v].add(u)
+            for u in neighbors:
+                adjacency[u].discard(node)
+            del adjacency[node]
+            eliminated_nodes.append((node, frozenset(neighbors)))
+            changed = True
+
+    components = []
+    unvisited = set(adjacency)
+    for start_node in list(adjacency):
+        if start_node not in unvisited:
+            continue
+        unvisited.discard(start_node)
+        component_nodes = [start_node]
+        stack = [start_node]
+        while stack:
+            u = stack.pop()
+            for v in adjacency[u]:
+                if v in unvisited:
+                    unvisited.discard(v)
+                    component_nodes.append(v)
+                    stack.append(v)
+        position = {node: index for index, node in enumerate(component_nodes)}
+        component_edges = [(u, v) for u in component_nodes for v in adjacency[u] if position[u] < position[v]]
+        components.append((component_nodes, component_edges))
+
+    return GraphReduction(graph.name, eliminated_nodes, lower_bound, components)
+
+
+def decompose_reduced_graph(reduction, solve_component, threads=1):
+    ''' Decomposes the components of the reduced graph using solve_component, which maps a graph to a tree decomposition
+        (or None upon failure), and returns the assembled tree decomposition of the original graph. If threads is larger
+        than one, the components are decomposed concurrently. Returns None if any component could not be decomposed.
+    '''
+    component_graphs = reduction.get_component_graphs()
+    if threads > 1 and len(component_graphs) > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as executor:
+            component_decompositions = list(executor.map(solve_component, component_graphs))
+    else:
+        component_decompositions = [solve_component(component_graph) for component_graph in component_graphs]
+    if any(component_decomposition is None for component_decomposition in component_decompositions):
+        return None
+
+    tree_decomposition = twm.TreeDecomposition("{}_reduced_decomposition".format(reduction.graph_name))
+    bags = []
+    root_bag_node = None
+    for index, component_decomposition in enumerate(component_decompositions):
+        bag_node_names = {bag_node: "component_{}_{}".format(index, bag_node)
+                          for bag_node in component_decomposition.node_bag_dict}
+        for bag_node, bag in component_decomposition.node_bag_dict.items():
+            tree_decomposition.add_node(bag_node_names[bag_node], node_bag=frozenset(bag))
+            bags.append((bag_node_names[bag_node], frozenset(bag)))
+        for edge in component_decomposition.edges:
+            bag_node_1, bag_node_2 = tuple(edge)
+            tree_decomposition.add_edge(bag_node_names[bag_node_1], bag_node_names[bag_node_2])
+        if not bag_node_names:
+            continue
+        component_root = next(iter(bag_node_names.values()))
+        if root_bag_node is None:
+            root_bag_node = component_root
+        else:
+            tree_decomposition.add_edge(root_bag_node, component_root)
+
+    # the neighbors of each eliminated node form a clique in the graph at the time of its elimination, which is
+    # decomposed by the bags added so far, i.e. one of these bags contains all neighbors
+    for index in reversed(range(len(reduction.eliminated_nodes))):
+        node, neighbors = reduction.eliminated_nodes[index]
+        bag_node = "reduction_{}".format(index)
+        parent = next((other_bag_node for other_bag_node, other_bag in bags if neighbors <= other_bag), None)
+        tree_decomposition.add_node(bag_node, node_bag=neighbors | {node})
+        if parent is not None:
+            tree_decomposition.add_edge(bag_node, parent)
+        bags.append((bag_node, neighbors | {node}))
+    return tree_decomposition
+
+
+def compute_tree_decomposition(graph, solve_component=None, logger=None, timeout=None, threads=1):
+    ''' Computes a tree decomposition of the graph by reducing it, decomposing the components of the reduced graph using
+        solve_component (by default, Tamaki's algorithm with the given timeout per component), and assembling the
+        decompositions. Returns None if a component could not be decomposed.
+    '''
+    if logger is None:
+        logger = logging.getLogger(__name__)
+    if solve_component is None:
+        def solve_component(component_graph):
+            return twm.compute_tree_decomposition(component_graph, logger=logger, timeout=timeout)
+    reduction = reduce_graph(graph)
+    logger.debug("Reduced graph with {} nodes to {} components by eliminating {} nodes (lower bound {})".format(
+        len(graph.nodes), len(reduction.components), len(reduction.eliminated_nodes), reduction.lower_bound))
+    return decompose_reduced_graph(reduction, solve_component, threads=threads)
@@ -0,0 +1,257 @@
+# MIT License
+#
+# Copyright (c) 2016-2018 Matthias Rost, Elias Doehne
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+import collections
+import logging
+import multiprocessing as mp
+import queue
+
+logger = logging.getLogger(__name__)
+
+""" This module supervises the worker processes of an experiment.
+
+    Each worker process fetches its chunks from its own task queue and reports the results of each finished chunk via
+    a shared status queue, such that the supervisor knows which chunks are assigned to which worker at any time. At
+    most chunks_per_worker chunks are assigned to a worker, i.e. the next chunk is handed out while the current one is
+    processed, and the chunks are handed out as the workers finish their chunks.
+
+    If a worker process terminates abnormally (e.g. due to a segfault or the OOM killer), the results of its chunks
+    which were already written are recovered, the unfinished tasks are handed out again, and the worker is respawned.
+    A chunk whose processing killed a worker max_chunk_attempts times is considered a poison chunk and is not handed out
+    again; it is reported as failed instead.
+
+    If a memory watchdog is given (see memory_watchdog.MemoryWatchdog), the memory usage of the workers is sampled
+    while waiting for results and chunks which the watchdog does not admit are deferred until it admits them, while
+    further chunks may be handed out in the meantime."""
+
+DEFAULT_MAX_CHUNK_ATTEMPTS = 3
+DEFAULT_CHUNKS_PER_WORKER = 2
+
+# interval in seconds in which the liveness of the workers is checked while no chunk is finished
+DEFAULT_POLL_INTERVAL = 5.0
+
+
+class FailedChunk(object):
+    ''' The remaining tasks of a chunk which killed its worker process in each of its attempts. '''
+
+    def __init__(self, chunk, attempts, exit_codes):
+        self.chunk = chunk
+        self.attempts = attempts
+        self.exit_codes = exit_codes
+
+
+class WorkerSupervisor(object):
+    ''' Starts, feeds, and supervises the worker processes.
+
+        start_worker(process_index, task_queue, status_queue) must start and return the worker process, which processes
+        the chunks (tuples whose first element is the chunk index) fetched from task_queue until it receives None and
+        puts the tuple (process_index, chunk_index, chunk_results) into status_queue after each chunk.
+
+        recover_chunk(process_index, chunk) is called for each chunk assigned to a terminated worker and must return the
+        results of the tasks of the chunk which were written before the termination (in the format of
+        chunk_results) and the chunk consisting of the remaining tasks (None if all tasks were completed).
+
+        If a memory_watchdog is given, chunks are only handed out if it admits them. At most number_of_workers chunks are
+        deferred at a time, i.e. no new chunks are requested while as many chunks are deferred.
+    '''
+
+    def __init__(self, number_of_workers, start_worker, recover_chunk, max_chunk_attempts=DEFAULT_MAX_CHUNK_ATTEMPTS,
+                 chunks_per_worker=DEFAULT_CHUNKS_PER_WORKER, poll_interval=DEFAULT_POLL_INTERVAL, memory_watchdog=None):
+        if max_chunk_attempts < 1:
+            raise ValueError("The maximal number of attempts per chunk must be positive, but is {}.".format(
+                max_chunk_attempts))
+        self.number_of_workers = number_of_workers
+        self.start_worker = start_worker
+        self.recover_chunk = recover_chunk
+        self.max_chunk_attempts = max_chunk_attempts
+        self.chunks_per_worker = chunks_per_worker
+        self.poll_interval = poll_interval
+        self.memory_watchdog = memory_watchdog
+        if memory_watchdog is not None:
+            self.poll_interval = min(poll_interval, memory_watchdog.sample_interval)
+        self.status_queue = mp.Queue()
+        self.processes = [None] * number_of_workers
+        self.task_queues = [None] * number_of_workers
+        # the chunks assigned to each worker in the order in which they are processed
+        self.assigned_chunks = [collections.deque() for _ in range(number_of_workers)]
+        # chunks to be handed out again, which take precedence over new chunks
+        self.pending_chunks = collections.deque()
+        # chunks not admitted by the memory watchdog, which take precedence over the pending chunks once admitted
+        self.deferred_chunks = collections.deque()
+        self.attempts = collections.defaultdict(int)
+        self.exit_codes = collections.defaultdict(list)
+        self.failed_chunks = []
+        self.number_of_respawns = 0
+        self.number_of_deferred_chunks = 0
+        self.number_of_chunks = None
+        self.number_of_requested_chunks = 0
+
+    def _start(self, process_index):
+        self.task_queues[process_index] = mp.Queue()
+        self.processes[process_index] = self.start_worker(process_index, self.task_queues[process_index],
+                                                          self.status_queue)
+
+    def run(self, next_chunk, on_chunk_finished, number_of_chunks=None):
+        ''' Hands out the chunks returned by next_chunk() until it returns None while no chunk is outstanding (i.e.,
+            next_chunk may return None while it waits for the results of outstanding chunks). on_chunk_finished is
+            called with the chunk_results of each finished chunk and with the recovered results of chunks whose worker
+            terminated. Finally, the workers are stopped and the list of FailedChunk objects is returned.
+            number_of_chunks is the number of chunks returned by next_chunk, if known in advance.
+        '''
+        self.number_of_chunks = number_of_chunks
+        for process_index in range(self.number_of_workers):
+            self._start(process_index)
+        try:
+            while True:
+                self._handle_terminated_workers(on_chunk_finished)
+                if self.memory_watchdog is not None:
+                    self.memory_watchdog.sample(self.processes, self.assigned_chunks)
+                self._hand_out_chunks(next_chunk)
+                if not self.pending_chunks and not self.deferred_chunks and not any(self.assigned_chunks):
+                    break
+                try:
+                    process_index, chunk_index, chunk_results = self.status_queue.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    continue
+                assigned_chunks = self.assigned_chunks[process_index]
+                if not assigned_chunks or assigned_chunks[0][0] != chunk_index:
+                    # reported by a terminated worker whose results were already recovered
+                    logger.info("Ignoring outdated results of chunk {} from worker {}".format(chunk_index,
+                                                                                            process_index))
+                    continue
+                assigned_chunks.popleft()
+                on_chunk_finished(chunk_results)
+        except BaseException:
+            self._terminate_workers()
+            raise
+        self._stop_workers()
+        if self.memory_watchdog is not None:
+            logger.info("Deferred {} chunks due to the memory usage".format(self.number_of_deferred_chunks))
+            self.memory_watchdog.log_profile()
+        return self.failed_chunks
+
+    def get_number_of_waiting_chunks(self):
+        ''' Returns the number of chunks not yet handed out to the workers, i.e. the chunks not yet obtained from
+            next_chunk and the pending and deferred chunks, or None if the number of chunks is not known in advance.
+            As the deques are only read, this may be called from other threads while the supervisor is running.
+        '''
+        if self.number_of_chunks is None:
+            return None
+        return self.number_of_chunks - self.number_of_requested_chunks + len(self.pending_chunks) + \
+            len(self.deferred_chunks)
+
+    def _request_chunk(self, next_chunk):
+        chunk = next_chunk()
+        if chunk is not None:
+            self.number_of_requested_chunks += 1
+        return chunk
+
+    def _hand_out_chunks(self, next_chunk):
+        # fill the workers level by level, such that each worker obtains a chunk before any worker obtains a second one
+        for level in range(self.chunks_per_worker):
+            for process_index in range(self.number_of_workers):
+                if len(self.assigned_chunks[process_index]) > level:
+                    continue
+                chunk = self._next_admitted_chunk(next_chunk, prefetch=level > 0)
+                if chunk is None:
+                    return
+                self.assigned_chunks[process_index].append(chunk)
+                self.task_queues[process_index].put(chunk)
+
+    def _next_admitted_chunk(self, next_chunk, prefetch):
+        if self.memory_watchdog is None:
+            if self.pending_chunks:
+                return self.pending_chunks.popleft()
+            return self._request_chunk(next_chunk)
+        number_of_busy_workers = sum(1 for chunks in self.assigned_chunks if chunks)
+        for index, chunk in enumerate(self.deferred_chunks):
+            if self.memory_watchdog.admits(chunk, number_of_busy_workers, prefetch):
+                del self.deferred_chunks[index]
+                return chunk
+        while len(self.deferred_chunks) < self.number_of_workers:
+            if self.pending_chunks:
+                chunk = self.pending_chunks.popleft()
+            else:
+                chunk = self._request_chunk(next_chunk)
+                if chunk is None:
+                    return None
+            if self.memory_watchdog.admits(chunk, number_of_busy_workers, prefetch):
+                return chunk
+            self.deferred_chunks.append(chunk)
+            self.number_of_deferred_chunks += 1
+        return None
+
+    def _handle_terminated_workers(self, on_chunk_finished):
+        for process_index, process in enumerate(self.processes):
+            if process.is_alive():
+                continue
+            process.join()
+            assigned_chunks = list(self.assigned_chunks[process_index])
+            self.assigned_chunks[process_index].clear()
+            logger.warning("Worker {} (pid {}) terminated with exit code {} while {} chunks were assigned to it".format(
+                process_index, process.pid, process.exitcode, len(assigned_chunks)))
+            chunks_to_hand_out = []
+            # the worker died while processing the first of its chunks whose tasks are not all completed, i.e., the
+            # attempt is charged to this chunk, while the following chunks were not fetched yet or not started
+            charged_chunk_index = None
+            for chunk in assigned_chunks:
+                recovered_results, remaining_chunk = self.recover_chunk(process_index, chunk)
+                if recovered_results:
+                    on_chunk_finished(recovered_results)
+                if remaining_chunk is None:
+                    continue
+                chunk_index = chunk[0]
+                if charged_chunk_index is None:
+                    charged_chunk_index = chunk_index
+                    self.attempts[chunk_index] += 1
+                    self.exit_codes[chunk_index].append(process.exitcode)
+                    if self.attempts[chunk_index] >= self.max_chunk_attempts:
+                        logger.error("Giving up chunk {} after {} attempts: {}".format(
+                            chunk_index, self.attempts[chunk_index], remaining_chunk))
+                        self.failed_chunks.append(FailedChunk(remaining_chunk, self.attempts[chunk_index],
+                                                              self.exit_codes[chunk_index]))
+                        continue
+                chunks_to_hand_out.append(remaining_chunk)
+            self.pending_chunks.extendleft(reversed(chunks_to_hand_out))
+            self.number_of_respawns += 1
+            logger.info("Respawning worker {} and handing out {} chunks again".format(process_index,
+                                                                                    len(chunks_to_hand_out)))
+            self._start(process_index)
+
+    def _terminate_workers(self):
+        for process in self.processes:
+            if process is not None and process.is_alive():
+                process.terminate()
+                process.join()
+
+    def _stop_workers(self):
+        for process_index, process in enumerate(self.processes):
+            if process is not None and process.is_alive():
+                self.task_queues[process_index].put(None)
+        for process_index, process in enumerate(self.processes):
+            if process is None:
+                continue
+            process.join()
+            if process.exitcode != 0:
+                logger.warning("Worker {} terminated with exit code {}".format(process_index, process.exitcode))
+        if self.number_of_respawns:
+            logger.warning("Respawned worker processes {} times".format(self.number_of_respawns))
@@ -0,0 +1,43 @@
+import itertools
+
+from alib import datamodel
+
+
+def create_graph_with_nodes(nodes, edges):
+    graph = datamodel.UndirectedGraph("test")
+    for node in nodes:
+        graph.add_node(node)
+    for u, v in edges:
+        graph.add_edge(u, v)
+    return graph
+
+
+def create_graph(number_of_nodes, edges):
+    ''' Returns the graph on the nodes "1", ..., "<number_of_nodes>" with the given edges between node numbers. '''
+    return create_graph_with_nodes([str(node) for node in range(1, number_of_nodes + 1)],
+                                   [(str(u), str(v)) for u, v in edges])
+
+
+def create_random_graph(number_of_nodes, connection_probability, random_instance):
+    return create_graph(number_of_nodes, [(u, v) for u, v in itertools.combinations(range(1, number_of_nodes + 1), 2)
+                                          if random_instance.random() < connection_probability])
+
+
+def brute_force_treewidth(graph):
+    ''' Returns the minimal width over all elimination orderings. '''
+    best_width = max(len(graph.nodes) - 1, 0)
+    for ordering in itertools.permutations(graph.nodes):
+        adjacency = {node: set() for node in graph.nodes}
+        for edge in graph.edges:
+            u, v = tuple(edge)
+            adjacency[u].add(v)
+            adjacency[v].add(u)
+        width = 0
+        for node in ordering:
+            neighbors = adjacency.pop(node)
+            width = max(width, len(neighbors))
+            for u in neighbors:
+                adjacency[u] |= neighbors - {u}
+                adjacency[u].discard(node)
+        best_width = min(best_width, width)
+    return best_width
@@ -0,0 +1,100 @@
+import random
+
+import pytest
+
+from evaluation_acm_ccr_2019 import adaptive_sampling
+
+CONSTANT_CELL = (10, 0.1)
+NOISY_CELL = (10, 0.5)
+TIMED_OUT_CELL = (40, 0.5)
+
+
+def _sample_treewidth(cell, random_instance):
+    if cell == CONSTANT_CELL:
+        return 2
+    if cell == NOISY_CELL:
+        return random_instance.randint(0, 10)
+    return None
+
+
+def _run(controller, random_instance):
+    ''' Executes the chunks handed out by the controller one after another and returns the repetition indices sampled
+        per cell.
+    '''
+    repetition_indices = {cell: [] for cell in controller.cells}
+    while True:
+        chunk = controller.next_chunk()
+        if chunk is None:
+            return repetition_indices
+        num_nodes, prob, chunk_repetition_indices = chunk
+        for repetition_index in chunk_repetition_indices:
+            repetition_indices[(num_nodes, prob)].append(repetition_index)
+            controller.add_result(num_nodes, prob, _sample_treewidth((num_nodes, prob), random_instance), 1.0)
+
+
+def test_only_imprecise_cells_are_sampled_beyond_the_minimum():
+    controller = adaptive_sampling.AdaptiveSamplingController([CONSTANT_CELL, NOISY_CELL, TIMED_OUT_CELL], chunk_size=4,
+                                                              min_repetitions=10, max_repetitions=50)
+    repetition_indices = _run(controller, random.Random(0))
+
+    assert len(repetition_indices[CONSTANT_CELL]) == 10
+    assert len(repetition_indices[TIMED_OUT_CELL]) == 10
+    assert len(repetition_indices[NOISY_CELL]) == 50
+    assert sorted(repetition_indices[NOISY_CELL]) == list(range(50))
+
+
+def test_total_number_of_repetitions_is_respected():
+    controller = adaptive_sampling.AdaptiveSamplingController([CONSTANT_CELL, NOISY_CELL], chunk_size=3,
+                                                              min_repetitions=5, max_repetitions=1000,
+                                                              total_repetitions=23)
+    repetition_indices = _run(controller, random.Random(1))
+
+    assert len(repetition_indices[CONSTANT_CELL]) == 5
+    assert len(repetition_indices[NOISY_CELL]) == 18
+    assert controller.number_of_dispatched_repetitions == 23
+
+
+def test_completed_tasks_count_towards_the_repetitions_and_keep_their_indices():
+    controller = adaptive_sampling.AdaptiveSamplingController([CONSTANT_CELL], chunk_size=2, min_repetitions=6)
+    for repetition_index in [0, 3]:
+        controller.add_completed_task(CONSTANT_CELL[0], CONSTANT_CELL[1], repetition_index, 2, 1.0)
+    repetition_indices = _run(controller, random.Random(2))
+
+    assert sorted(repetition_indices[CONSTANT_CELL]) == [1, 2, 4, 5]
+
+
+def test_default_parameters_spend_the_repetitions_of_uniform_sampling():
+    controller = adaptive_sampling.AdaptiveSamplingController.from_parameters({"min_repetitions": 5},
+                                                                              [CONSTANT_CELL, NOISY_CELL],
+                                                                              chunk_size=5, default_repetitions=20)
+    repetition_indices = _run(controller, random.Random(3))
+
+    assert len(repetition_indices[CONSTANT_CELL]) == 5
+    assert len(repetition_indices[NOISY_CELL]) == 35
+
+
+def test_default_parameters_move_the_saved_repetitions_to_a_noisy_cell():
+    controller = adaptive_sampling.AdaptiveSamplingController.from_parameters({}, [CONSTANT_CELL, NOISY_CELL],
+                                                                              chunk_size=10, default_repetitions=50)
+    repetition_indices = _run(controller, random.Random(4))
+
+    assert len(repetition_indices[CONSTANT_CELL]) == adaptive_sampling.DEFAULT_MIN_REPETITIONS
+    assert len(repetition_indices[NOISY_CELL]) > 50
+    assert controller.number_of_dispatched_repetitions == 2 * 50
+
+
+def test_cells_without_variance_estimate_are_sampled_further():
+    controller = adaptive_sampling.AdaptiveSamplingController([NOISY_CELL, TIMED_OUT_CELL], chunk_size=1,
+                                                              min_repetitions=1, max_repetitions=20)
+    repetition_indices = _run(controller, random.Random(5))
+
+    assert len(repetition_indices[NOISY_CELL]) == 20
+    assert len(repetition_indices[TIMED_OUT_CELL]) == 2
+
+
+@pytest.mark.parametrize("parameters", [{"min_repetition": 5}, {"min_repetitions": 5, "max_repetitions": 4},
+                                        {"confidence_level": 1.0}])
+def test_invalid_parameters_are_rejected(parameters):
+    with pytest.raises(ValueError):
+        adaptive_sampling.AdaptiveSamplingController.from_parameters(parameters, [CONSTANT_CELL], chunk_size=5,
+                                                                     default_repetitions=20)
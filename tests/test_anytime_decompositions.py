@@ -0,0 +1,110 @@
+import logging
+
+from alib import datamodel
+
+from evaluation_acm_ccr_2019 import columnar_results
+from evaluation_acm_ccr_2019 import decomposition_backends
+from evaluation_acm_ccr_2019 import tree_decomposition_verification
+from evaluation_acm_ccr_2019 import treewidth_bounds
+from evaluation_acm_ccr_2019 import treewidth_cache
+from evaluation_acm_ccr_2019 import treewidth_computation_experiments as tce
+
+from conftest import create_graph
+
+
+def _create_grid(size):
+    return create_graph(size * size, [(size * row + column + 1, size * row + column + 2)
+                                      for row in range(size) for column in range(size - 1)] +
+                        [(size * row + column + 1, size * row + column + 1 + size)
+                         for row in range(size - 1) for column in range(size)])
+
+
+# the 4x4 grid has treewidth 4, but its lower bounds only yield 3
+GRID = _create_grid(4)
+TREE = create_graph(6, [(1, 2), (1, 3), (3, 4), (3, 5), (5, 6)])
+
+
+class _TimingOutBackend(decomposition_backends.TreeDecompositionBackend):
+    ''' Exact backend failing to decompose any graph, as if each computation timed out. '''
+    name = "timing_out"
+    is_exact = True
+
+    def compute_tree_decomposition(self, graph):
+        return None
+
+
+def _create_pipeline(anytime, cache=None):
+    return tce.TreeDecompositionPipeline(None, [], False, logging.getLogger(__name__), cache=cache, anytime=anytime,
+                                         backend=_TimingOutBackend())
+
+
+def test_failed_decompositions_are_kept_without_anytime():
+    pipeline = _create_pipeline(anytime=False)
+    outcome = pipeline.decompose(GRID)
+    result = pipeline.create_result(GRID, 16, 0.5, 0, outcome)
+
+    assert outcome.tree_decomposition is None
+    assert (result.treewidth, result.treewidth_lower_bound, result.treewidth_upper_bound) == (None, None, None)
+    assert not result.is_optimal
+
+
+def test_heuristic_decomposition_and_lower_bound_are_recorded_upon_failure():
+    pipeline = _create_pipeline(anytime=True)
+    outcome = pipeline.decompose(GRID)
+    result = pipeline.create_result(GRID, 16, 0.5, 0, outcome)
+
+    tree_decomposition_verification.verify_tree_decomposition(GRID, outcome.tree_decomposition)
+    assert outcome.decomposition_method == "heuristic"
+    assert (result.treewidth, result.treewidth_lower_bound, result.treewidth_upper_bound) == (None, 3, 4)
+    assert not result.is_optimal
+
+
+def test_heuristic_decomposition_with_matching_bounds_is_optimal():
+    pipeline = _create_pipeline(anytime=True)
+    outcome = pipeline.decompose(TREE)
+    result = pipeline.create_result(TREE, 6, 0.5, 0, outcome)
+
+    assert outcome.decomposition_method == "bounds"
+    assert (result.treewidth, result.treewidth_lower_bound, result.treewidth_upper_bound) == (1, 1, 1)
+
+
+def test_only_optimal_decompositions_are_cached(tmp_path):
+    cache = treewidth_cache.TreewidthCache(str(tmp_path / "cache.sqlite"), max_nodes=len(GRID.nodes))
+    pipeline = _create_pipeline(anytime=True, cache=cache)
+    for graph in [GRID, TREE, GRID, TREE]:
+        pipeline.decompose(graph)
+
+    assert cache.number_of_lookups == 4
+    assert cache.number_of_hits == 1
+    cache.close()
+
+
+def test_bounds_of_heuristic_results_are_stored_in_the_columnar_results(tmp_path):
+    path = str(tmp_path / "results.columnar")
+    pipeline = _create_pipeline(anytime=True)
+    with columnar_results.ColumnarResultsWriter(path) as writer:
+        for repetition_index, graph in enumerate([GRID, TREE]):
+            writer.add_result(pipeline.create_result(graph, 16, 0.5, repetition_index, pipeline.decompose(graph)))
+    stored_results = columnar_results.ColumnarResults(path)
+
+    assert [(record.treewidth, record.treewidth_lower_bound, record.treewidth_upper_bound, record.is_optimal,
+             record.decomposition_method) for record in stored_results.iter_results()] == \
+        [(None, 3, 4, False, "heuristic"), (1, 1, 1, True, "bounds")]
+    assert list(stored_results.select_rows(min_treewidth=2)) == []
+    assert list(stored_results.select_rows(min_treewidth=2, use_treewidth_upper_bound=True)) == [0]
+
+
+def test_bitset_graphs_do_not_depend_on_the_order_of_the_nodes():
+    reversed_grid = datamodel.UndirectedGraph("test")
+    for node in reversed(GRID.nodes):
+        reversed_grid.add_node(node)
+    for u, v in reversed(list(GRID.edges)):
+        reversed_grid.add_edge(v, u)
+    bitset_graph = treewidth_bounds.BitsetGraph.from_undirected_graph(GRID)
+    reversed_bitset_graph = treewidth_bounds.BitsetGraph.from_undirected_graph(reversed_grid)
+
+    assert reversed_bitset_graph.nodes == bitset_graph.nodes
+    assert reversed_bitset_graph.adjacency == bitset_graph.adjacency
+    for heuristic in treewidth_bounds.ELIMINATION_HEURISTICS:
+        assert treewidth_bounds.compute_elimination_ordering(reversed_bitset_graph, heuristic) == \
+            treewidth_bounds.compute_elimination_ordering(bitset_graph, heuristic)
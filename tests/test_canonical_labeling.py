@@ -0,0 +1,83 @@
+import itertools
+import random
+
+import pytest
+
+from evaluation_acm_ccr_2019 import canonical_labeling
+
+
+def _create_random_edges(number_of_nodes, connection_probability, random_instance):
+    return [(u, v) for u, v in itertools.combinations(range(number_of_nodes), 2)
+            if random_instance.random() < connection_probability]
+
+
+def _relabel(nodes, edges, random_instance):
+    permuted_nodes = list(nodes)
+    random_instance.shuffle(permuted_nodes)
+    names = {node: "v{}".format(permuted_node) for node, permuted_node in zip(nodes, permuted_nodes)}
+    relabeled_edges = [(names[v], names[u]) if random_instance.random() < 0.5 else (names[u], names[v])
+                       for u, v in edges]
+    random_instance.shuffle(relabeled_edges)
+    relabeled_nodes = [names[node] for node in nodes]
+    random_instance.shuffle(relabeled_nodes)
+    return relabeled_nodes, relabeled_edges
+
+
+def _canonical_edges(edges, labeling):
+    return {frozenset((labeling[u], labeling[v])) for u, v in edges}
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_canonical_form_is_invariant_under_relabeling(seed):
+    random_instance = random.Random(seed)
+    nodes = list(range(random_instance.randint(1, 25)))
+    edges = _create_random_edges(len(nodes), random_instance.choice([0.1, 0.3, 0.5, 0.8]), random_instance)
+    canonical_form, labeling = canonical_labeling.compute_canonical_form(nodes, edges)
+
+    assert sorted(labeling.values()) == list(range(len(nodes)))
+    for _ in range(3):
+        relabeled_nodes, relabeled_edges = _relabel(nodes, edges, random_instance)
+        relabeled_canonical_form, relabeled_labeling = canonical_labeling.compute_canonical_form(relabeled_nodes,
+                                                                                                 relabeled_edges)
+        assert relabeled_canonical_form == canonical_form
+        assert _canonical_edges(relabeled_edges, relabeled_labeling) == _canonical_edges(edges, labeling)
+
+
+def test_canonical_form_distinguishes_non_isomorphic_graphs():
+    nodes = list(range(4))
+    path = canonical_labeling.compute_canonical_form(nodes, [(0, 1), (1, 2), (2, 3)])[0]
+    star = canonical_labeling.compute_canonical_form(nodes, [(0, 1), (0, 2), (0, 3)])[0]
+    edge_with_isolated_nodes = canonical_labeling.compute_canonical_form(nodes, [(2, 3)])[0]
+
+    assert len({path, star, edge_with_isolated_nodes}) == 3
+    assert canonical_labeling.compute_canonical_form(nodes[:2], [(0, 1)])[0] != edge_with_isolated_nodes
+
+
+def test_regular_graphs_with_equal_refinement_are_distinguished():
+    # the 6-cycle and two disjoint triangles are both 2-regular on 6 nodes
+    nodes = list(range(6))
+    cycle = canonical_labeling.compute_canonical_form(nodes, [(i, (i + 1) % 6) for i in nodes])[0]
+    triangles = canonical_labeling.compute_canonical_form(nodes, [(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3)])[0]
+
+    assert cycle != triangles
+
+
+@pytest.mark.parametrize("number_of_nodes, number_of_classes", [(1, 1), (2, 2), (3, 4), (4, 11), (5, 34)])
+def test_number_of_isomorphism_classes(number_of_nodes, number_of_classes):
+    nodes = list(range(number_of_nodes))
+    pairs = list(itertools.combinations(nodes, 2))
+    canonical_forms = set()
+    for selection in itertools.product([False, True], repeat=len(pairs)):
+        edges = [pair for pair, selected in zip(pairs, selection) if selected]
+        canonical_forms.add(canonical_labeling.compute_canonical_form(nodes, edges)[0])
+
+    assert len(canonical_forms) == number_of_classes
+
+
+def test_search_is_aborted_after_max_leaves():
+    # two disjoint 4-cycles are not distinguished by refinement, such that the search explores several leaves
+    nodes = list(range(8))
+    cycles = [(i, (i + 1) % 4) for i in range(4)] + [(4 + i, 4 + (i + 1) % 4) for i in range(4)]
+
+    assert canonical_labeling.compute_canonical_form(nodes, cycles, max_leaves=1) is None
+    assert canonical_labeling.compute_canonical_form(nodes, cycles) is not None
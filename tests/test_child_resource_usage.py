@@ -0,0 +1,107 @@
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import yaml
+
+from evaluation_acm_ccr_2019 import child_resource_usage
+from evaluation_acm_ccr_2019 import decomposition_backends
+from evaluation_acm_ccr_2019 import treewidth_computation_experiments as tce
+
+from conftest import create_graph
+
+requires_resource = pytest.mark.skipif(child_resource_usage.resource is None,
+                                       reason="the resource usage of child processes is not available")
+
+# spins for about 0.3 seconds and holds 64 MiB for 0.3 seconds
+BUSY_CHILD = "import time\nstart = time.process_time()\nwhile time.process_time() - start < 0.3: pass\n" \
+             "data = bytearray(64 * 2 ** 20)\ntime.sleep(0.3)\n"
+
+
+class _SubprocessBackend(decomposition_backends.ExactDynamicProgrammingBackend):
+    ''' Exact backend running a busy child process for each graph. '''
+    name = "subprocess"
+    spawns_child_processes = True
+
+    def compute_tree_decomposition(self, graph):
+        subprocess.check_call([sys.executable, "-c", BUSY_CHILD])
+        return super(_SubprocessBackend, self).compute_tree_decomposition(graph)
+
+
+@requires_resource
+def test_cpu_time_and_peak_rss_of_children_are_measured():
+    subprocess.check_call([sys.executable, "-c", "pass"])
+    with child_resource_usage.ChildResourceMonitor() as monitor:
+        subprocess.check_call([sys.executable, "-c", BUSY_CHILD])
+
+    assert monitor.usage.user_time + monitor.usage.system_time >= 0.25
+    assert monitor.usage.peak_rss >= 64 * 2 ** 20
+
+
+@requires_resource
+def test_children_terminated_before_the_monitoring_are_not_accounted_for():
+    subprocess.check_call([sys.executable, "-c", BUSY_CHILD])
+    with child_resource_usage.ChildResourceMonitor() as monitor:
+        pass
+
+    assert monitor.usage.user_time + monitor.usage.system_time < 0.1
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/task"), reason="/proc is not available")
+def test_descendants_are_found_transitively():
+    child = subprocess.Popen([sys.executable, "-c", "import subprocess, sys\n"
+                                                    "subprocess.check_call([sys.executable, '-c', 'input()'])"],
+                             stdin=subprocess.PIPE)
+    try:
+        descendant_pids = []
+        deadline = time.time() + 10.0
+        while len(descendant_pids) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+            descendant_pids = child_resource_usage.get_descendant_pids(os.getpid())
+
+        assert child.pid in descendant_pids
+        assert len(child_resource_usage.get_descendant_pids(child.pid)) == 1
+    finally:
+        child.communicate(b"\n")
+
+
+@requires_resource
+def test_usage_is_only_recorded_for_graphs_decomposed_by_the_solver():
+    pipeline = tce.TreeDecompositionPipeline(None, [], False, logging.getLogger(__name__), use_treewidth_bounds=True,
+                                             backend=_SubprocessBackend())
+    # the bounds of the 4x4 grid do not match
+    grid = create_graph(16, [(4 * row + column + 1, 4 * row + column + 2) for row in range(4) for column in range(3)] +
+                         [(4 * row + column + 1, 4 * row + column + 5) for row in range(3) for column in range(4)])
+    tree = create_graph(4, [(1, 2), (2, 3), (2, 4)])
+    grid_outcome = pipeline.decompose(grid)
+    tree_outcome = pipeline.decompose(tree)
+
+    assert grid_outcome.decomposition_method == "solver"
+    grid_result = pipeline.create_result(grid, 16, 0.5, 0, grid_outcome)
+    assert grid_result.child_cpu_time_user + grid_result.child_cpu_time_system >= 0.25
+    assert tree_outcome.decomposition_method == "bounds"
+    assert tree_outcome.child_resource_usage is None
+    assert pipeline.create_result(tree, 4, 0.5, 0, tree_outcome).child_cpu_time_user is None
+
+
+def test_summary_aggregates_the_usage_per_combination(tmp_path):
+    path = str(tmp_path / "resource_usage.yml")
+    summary = child_resource_usage.ResourceUsageSummary()
+    summary.add_results([
+        tce.TreeDecompositionAlgorithmResult(
+            10, 0.5, 0, None, 3, 1.0, child_resource_usage=child_resource_usage.ChildResourceUsage(1.0, 0.5, 2 ** 20)),
+        tce.TreeDecompositionAlgorithmResult(
+            10, 0.5, 1, None, 3, 1.0, child_resource_usage=child_resource_usage.ChildResourceUsage(3.0, 0.5, None)),
+        tce.TreeDecompositionAlgorithmResult(10, 0.1, 0, None, 1, 0.1),
+    ])
+    summary.save(path)
+
+    assert len(summary) == 1
+    assert summary.get_max_peak_rss() == 2 ** 20
+    with open(path) as f:
+        assert yaml.safe_load(f) == [dict(num_nodes=10, probability=0.5, count=2, mean_child_cpu_time_user=2.0,
+                                          mean_child_cpu_time_system=0.5, mean_child_peak_rss_mib=1.0,
+                                          max_child_peak_rss_mib=1.0)]
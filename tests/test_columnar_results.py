@@ -0,0 +1,79 @@
+import numpy as np
+
+from evaluation_acm_ccr_2019 import columnar_results
+from evaluation_acm_ccr_2019.treewidth_computation_experiments import TreeDecompositionAlgorithmResult
+
+
+def _create_results():
+    return [
+        TreeDecompositionAlgorithmResult(20, 0.5, 1, None, None, 3.0),
+        TreeDecompositionAlgorithmResult(10, 0.5, 0, [("1", "2"), ("2", "3")], 1, 0.25),
+        TreeDecompositionAlgorithmResult(10, 0.1, 1, None, 0, 0.125),
+        TreeDecompositionAlgorithmResult(10, 0.1, 0, [("1", "3")], 1, 2.0),
+        TreeDecompositionAlgorithmResult(20, 0.5, 0, None, 7, 4.0),
+    ]
+
+
+def _write_columnar_results(path, results):
+    with columnar_results.ColumnarResultsWriter(path) as writer:
+        for result in results:
+            writer.add_result(result)
+    return columnar_results.ColumnarResults(path)
+
+
+def _attributes(result):
+    return (result.num_nodes, result.edge_probability, result.repetition_index, result.treewidth,
+            result.runtime_treewidth_computation, result.undirected_graph_edge_representation)
+
+
+def test_results_are_sorted_and_read_back(tmp_path):
+    path = str(tmp_path / "results.columnar")
+    results = _create_results()
+    stored_results = _write_columnar_results(path, results)
+
+    assert columnar_results.is_columnar_results_path(path)
+    expected_results = sorted(results, key=lambda result: (result.num_nodes, result.edge_probability,
+                                                           result.repetition_index))
+    assert [_attributes(record) for record in stored_results.iter_results()] == \
+        [_attributes(result) for result in expected_results]
+    assert [record.get_serialized_edge_representation() for record in stored_results.iter_results()] == \
+        [result.get_serialized_edge_representation() for result in expected_results]
+
+
+def test_missing_treewidth_is_read_back_as_none(tmp_path):
+    stored_results = _write_columnar_results(str(tmp_path / "results.columnar"), _create_results())
+
+    assert stored_results.get_treewidth(len(stored_results) - 1) is None
+    assert stored_results.runtime_treewidth_computation[-1] == 3.0
+
+
+def test_cells_and_row_selection(tmp_path):
+    stored_results = _write_columnar_results(str(tmp_path / "results.columnar"), _create_results())
+
+    cell_boundaries = stored_results.get_cell_boundaries()
+    assert cell_boundaries == {(10, 0.1): (0, 2), (10, 0.5): (2, 3), (20, 0.5): (3, 5)}
+    assert list(stored_results.select_rows(min_treewidth=1)) == [0, 2, 3]
+    assert list(stored_results.select_rows(max_treewidth=1, require_edge_representation=True)) == [0, 2]
+    assert list(stored_results.select_rows(row_range=cell_boundaries[(20, 0.5)])) == [3, 4]
+    assert list(stored_results.select_rows(min_nodes=15, max_edge_probability=0.5)) == [3, 4]
+
+
+def test_result_dict_view_matches_the_pickle_layout(tmp_path):
+    path = str(tmp_path / "results.columnar")
+    _write_columnar_results(path, _create_results())
+
+    result_dict = columnar_results.load_aggregated_results(path)
+    assert sorted(result_dict) == [10, 20]
+    assert sorted(result_dict[10]) == [0.1, 0.5]
+    assert [record.repetition_index for record in result_dict[10][0.1]] == [0, 1]
+    assert result_dict[20][0.5][1].treewidth is None
+    assert [record.treewidth for record in result_dict[20][0.5][0:2]] == [7, None]
+
+
+def test_empty_results(tmp_path):
+    stored_results = _write_columnar_results(str(tmp_path / "results.columnar"), [])
+
+    assert len(stored_results) == 0
+    assert stored_results.get_cell_boundaries() == {}
+    assert len(stored_results.select_rows(min_treewidth=1)) == 0
+    assert stored_results.num_nodes.dtype == np.int16
@@ -0,0 +1,95 @@
+import itertools
+import logging
+
+from evaluation_acm_ccr_2019 import decomposition_backends
+from evaluation_acm_ccr_2019 import exact_treewidth
+from evaluation_acm_ccr_2019 import result_files
+from evaluation_acm_ccr_2019 import treewidth_computation_experiments as tce
+
+NUM_NODES = [5, 10, 15]
+PROBABILITIES = [0.1, 0.25, 0.5]
+REPETITIONS = 7
+
+
+class _RecordingBackend(decomposition_backends.ExactDynamicProgrammingBackend):
+    ''' Exact backend recording the graphs it is invoked for. '''
+
+    def __init__(self):
+        self.graphs = []
+
+    def compute_tree_decomposition(self, graph):
+        self.graphs.append(graph)
+        return super(_RecordingBackend, self).compute_tree_decomposition(graph)
+
+
+def _process_coupled_chunk(tmp_path, chunk, random_seed_base=0):
+    ''' Processes the chunk using the recording backend and returns the backend and the written results. '''
+    filename = str(tmp_path / "results_0.pickle")
+    backend = _RecordingBackend()
+    pipeline = tce.TreeDecompositionPipeline(None, [], False, logging.getLogger(__name__), backend=backend)
+    with result_files.FramedResultWriter(filename) as result_writer:
+        tce._process_coupled_chunk(chunk, tce.SimpleRandomGraphGenerator(engine="numpy"), random_seed_base, pipeline,
+                                   result_writer, logging.getLogger(__name__))
+    return backend, list(result_files.read_results_from_process_file(filename))
+
+
+def test_coupled_work_chunks_cover_all_repetitions_and_keep_completed_tasks():
+    completed_tasks = {(5, prob, 2) for prob in PROBABILITIES} | {(10, 0.25, 3)}
+    chunks = list(tce.generate_coupled_work_chunks(NUM_NODES, PROBABILITIES, REPETITIONS, chunk_size=3,
+                                                   completed_tasks=completed_tasks))
+
+    repetitions = [(num_nodes, repetition_index)
+                   for _, num_nodes, _, repetition_indices, _ in chunks for repetition_index in repetition_indices]
+    assert (5, 2) not in repetitions
+    assert len(repetitions) == len(NUM_NODES) * REPETITIONS - 1
+    assert all(chunk[2] == tuple(PROBABILITIES) for chunk in chunks)
+    chunk_with_completed_task = [chunk for chunk in chunks if chunk[1] == 10 and 3 in chunk[3]][0]
+    assert chunk_with_completed_task[4] == frozenset({(0.25, 3)})
+
+
+def test_coupled_seeds_differ_from_the_task_seeds():
+    tasks = list(itertools.product(range(5, 40, 5), [0.05, 0.1, 0.5, 0.9], range(50)))
+
+    assert not {tce.derive_task_seed(0, *task) for task in tasks} & \
+        {tce.derive_coupled_seed(0, num_nodes, repetition_index) for num_nodes, _, repetition_index in tasks}
+
+
+def test_coupled_graphs_are_nested():
+    generator = tce.SimpleRandomGraphGenerator(engine="numpy")
+    generator.seed(tce.derive_coupled_seed(0, 20, 0))
+    edge_arrays = generator.generate_coupled_edge_arrays(20, [0.1, 0.3, 0.3, 0.6, 1.0])
+    edge_sets = [set(map(tuple, edges.tolist())) for edges in edge_arrays]
+
+    assert all(sparser <= denser for sparser, denser in zip(edge_sets, edge_sets[1:]))
+    assert edge_sets[1] == edge_sets[2]
+    assert len(edge_sets[-1]) == 20 * 19 // 2
+
+
+def test_graphs_between_graphs_of_equal_treewidth_are_not_decomposed(tmp_path):
+    # the graphs of almost equal probabilities coincide, such that only the outermost ones are decomposed
+    probabilities = (0.5, 0.5000001, 0.5000002, 0.5000003, 0.5000004)
+    backend, results = _process_coupled_chunk(tmp_path, (0, 10, probabilities, (0,), frozenset()))
+
+    assert len(backend.graphs) == 2
+    assert [result.decomposition_method for result in results] == ["solver", "coupling", "coupling", "coupling",
+                                                                   "solver"]
+    assert len({result.treewidth for result in results}) == 1
+    assert all(result.runtime_treewidth_computation == 0.0 for result in results[1:-1])
+
+
+def test_coupled_treewidths_match_the_treewidths_of_the_regenerated_graphs(tmp_path):
+    probabilities = tuple(prob / 10.0 for prob in range(1, 10))
+    chunk = (0, 9, probabilities, (0, 1, 2), frozenset({(0.5, 1), (0.9, 2)}))
+    backend, results = _process_coupled_chunk(tmp_path, chunk, random_seed_base=3)
+
+    assert len(results) == 3 * len(probabilities) - 2
+    assert not {(0.5, 1), (0.9, 2)} & {(result.edge_probability, result.repetition_index) for result in results}
+    # the graphs of the completed tasks are decomposed (but not recorded) if they bound a range of probabilities
+    number_of_solver_results = len([result for result in results if result.decomposition_method == "solver"])
+    assert number_of_solver_results <= len(backend.graphs) <= number_of_solver_results + 2
+    assert len(backend.graphs) < 3 * len(probabilities)
+    generator = tce.SimpleRandomGraphGenerator(engine="numpy")
+    for result in results:
+        graph = tce.regenerate_graph(generator, 3, 9, result.edge_probability, result.repetition_index,
+                                     coupled_sampling=True)
+        assert result.treewidth == exact_treewidth.compute_exact_tree_decomposition(graph).width
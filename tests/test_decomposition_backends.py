@@ -0,0 +1,97 @@
+import itertools
+import random
+
+import pytest
+
+from alib import datamodel
+
+from evaluation_acm_ccr_2019 import decomposition_backends
+from evaluation_acm_ccr_2019 import exact_treewidth
+from evaluation_acm_ccr_2019 import tree_decomposition_verification
+from evaluation_acm_ccr_2019 import treewidth_computation_experiments as tce
+
+from conftest import create_random_graph
+
+IN_PROCESS_BACKENDS = ["exact_dp", "min_fill", "min_degree"]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_backends_compute_valid_decompositions(seed):
+    random_instance = random.Random(seed)
+    graph = create_random_graph(random_instance.randint(1, 11), random_instance.choice([0.2, 0.4, 0.6]),
+                                random_instance)
+
+    widths = {}
+    for name in IN_PROCESS_BACKENDS:
+        tree_decomposition = decomposition_backends.create_backend(name).compute_tree_decomposition(graph)
+        tree_decomposition_verification.verify_tree_decomposition(graph, tree_decomposition)
+        widths[name] = tree_decomposition.width
+
+    assert widths["exact_dp"] == min(widths.values())
+
+
+@pytest.mark.parametrize("heuristic", ["min_fill", "min_degree"])
+def test_heuristic_decompositions_do_not_depend_on_the_order_of_the_nodes(heuristic):
+    random_instance = random.Random(0)
+    graph = create_random_graph(15, 0.3, random_instance)
+    shuffled_graph = datamodel.UndirectedGraph("test")
+    nodes = list(graph.nodes)
+    edges = list(graph.edges)
+    random_instance.shuffle(nodes)
+    random_instance.shuffle(edges)
+    for node in nodes:
+        shuffled_graph.add_node(node)
+    for u, v in edges:
+        shuffled_graph.add_edge(v, u)
+    backend = decomposition_backends.create_backend(heuristic)
+
+    assert sorted(map(sorted, backend.compute_tree_decomposition(graph).node_bag_dict.values())) == \
+        sorted(map(sorted, backend.compute_tree_decomposition(shuffled_graph).node_bag_dict.values()))
+
+
+def test_exact_backend_fails_for_graphs_above_its_node_limit():
+    graph = create_random_graph(exact_treewidth.DEFAULT_MAX_NODES + 1, 0.5, random.Random(1))
+
+    assert decomposition_backends.create_backend("exact_dp").compute_tree_decomposition(graph) is None
+    assert decomposition_backends.ExactDynamicProgrammingBackend(max_nodes=5).compute_tree_decomposition(
+        create_random_graph(6, 0.5, random.Random(2))) is None
+    assert decomposition_backends.ExactDynamicProgrammingBackend(max_nodes=6).compute_tree_decomposition(
+        create_random_graph(6, 0.5, random.Random(2))) is not None
+
+
+def test_exact_backend_is_not_benchmarked_by_default():
+    assert "exact_dp" not in decomposition_backends.DEFAULT_BENCHMARK_BACKENDS
+    assert set(decomposition_backends.DEFAULT_BENCHMARK_BACKENDS) <= set(decomposition_backends.BACKENDS)
+
+
+def test_unknown_backends_are_rejected():
+    with pytest.raises(ValueError):
+        decomposition_backends.create_backend("quickbb")
+    with pytest.raises(ValueError):
+        decomposition_backends.EliminationHeuristicBackend("max_degree")
+
+
+@pytest.mark.parametrize("backends_string, expected", [("tamaki", ["tamaki"]),
+                                                       (" min_fill, exact_dp ,", ["min_fill", "exact_dp"])])
+def test_parse_backends(backends_string, expected):
+    assert decomposition_backends.parse_backends(backends_string) == expected
+
+
+@pytest.mark.parametrize("backends_string", ["", " , ", "min_fill,quickbb"])
+def test_parse_backends_rejects_invalid_lists(backends_string):
+    with pytest.raises(ValueError):
+        decomposition_backends.parse_backends(backends_string)
+
+
+def test_benchmark_compares_the_widths_to_the_exact_backend():
+    statistics = tce.benchmark_backends([6, 9], [0.3, 0.6], 4, IN_PROCESS_BACKENDS)
+
+    assert [(entry["num_nodes"], entry["probability"], entry["backend"]) for entry in statistics] == \
+        list(itertools.product([6, 9], [0.3, 0.6], IN_PROCESS_BACKENDS))
+    for entry in statistics:
+        assert entry["count"] == 4
+        assert entry["failures"] == 0
+        assert entry["mean_width_gap"] >= 0
+        if entry["backend"] == "exact_dp":
+            assert entry["max_width_gap"] == 0
+            assert entry["fraction_reference_width"] == 1.0
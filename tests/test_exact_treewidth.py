@@ -0,0 +1,44 @@
+import itertools
+import random
+
+import pytest
+
+from evaluation_acm_ccr_2019 import exact_treewidth
+from evaluation_acm_ccr_2019 import tree_decomposition_verification
+from evaluation_acm_ccr_2019 import treewidth_bounds
+
+from conftest import create_graph, create_random_graph, brute_force_treewidth
+
+
+def _get_width(tree_decomposition):
+    return max(len(bag) for bag in tree_decomposition.node_bag_dict.values()) - 1
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_exact_treewidth_matches_brute_force(seed):
+    random_instance = random.Random(seed)
+    graph = create_random_graph(random_instance.randint(1, 7), random_instance.choice([0.2, 0.4, 0.6, 0.8]),
+                                random_instance)
+
+    tree_decomposition = exact_treewidth.compute_exact_tree_decomposition(graph)
+
+    tree_decomposition_verification.verify_tree_decomposition(graph, tree_decomposition)
+    assert _get_width(tree_decomposition) == brute_force_treewidth(graph)
+
+
+@pytest.mark.parametrize("graph, treewidth", [
+    (create_graph(6, [(i, i % 6 + 1) for i in range(1, 7)]), 2),
+    (create_graph(6, itertools.combinations(range(1, 7), 2)), 5),
+    (create_graph(9, [(3 * row + column + 1, 3 * row + column + 2) for row in range(3) for column in range(2)] +
+                  [(3 * row + column + 1, 3 * row + column + 4) for row in range(2) for column in range(3)]), 3),
+    (create_graph(8, [(1, node) for node in range(2, 9)]), 1),
+    (create_graph(4, []), 0),
+])
+def test_exact_treewidth_of_known_graphs(graph, treewidth):
+    ordering, width = exact_treewidth.compute_exact_elimination_ordering(
+        treewidth_bounds.BitsetGraph.from_undirected_graph(graph))
+
+    assert width == treewidth
+    assert sorted(ordering) == list(range(len(graph.nodes)))
+    assert _get_width(exact_treewidth.compute_exact_tree_decomposition(graph)) == treewidth
+
@@ -0,0 +1,74 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from evaluation_acm_ccr_2019 import treewidth_computation_experiments as tce
+
+
+@pytest.mark.parametrize("prob", [0.0, 0.02, 0.3, 1.0])
+def test_edge_arrays_contain_sorted_node_pairs(prob):
+    num_nodes = 30
+    generator = tce.SimpleRandomGraphGenerator(engine="numpy")
+    generator.seed(3)
+    edges = generator.generate_edge_array(num_nodes, prob)
+
+    assert edges.shape[1] == 2
+    assert np.all(edges[:, 0] < edges[:, 1])
+    assert np.all((1 <= edges) & (edges <= num_nodes))
+    assert edges.tolist() == sorted(edges.tolist())
+    if prob == 0.0:
+        assert len(edges) == 0
+    if prob == 1.0:
+        assert len(edges) == num_nodes * (num_nodes - 1) // 2
+
+
+@pytest.mark.parametrize("prob", [0.01, 0.05, 0.5])
+def test_edge_density_matches_the_probability(prob):
+    num_nodes = 200
+    generator = tce.SimpleRandomGraphGenerator(engine="numpy")
+    generator.seed(11)
+    number_of_pairs = num_nodes * (num_nodes - 1) // 2
+    densities = [len(generator.generate_edge_array(num_nodes, prob)) / float(number_of_pairs) for _ in range(20)]
+
+    assert abs(np.mean(densities) - prob) < 0.1 * prob
+
+
+@pytest.mark.parametrize("engine", tce.SimpleRandomGraphGenerator.ENGINES)
+def test_graphs_are_reproducible_given_the_seed(engine):
+    generator = tce.SimpleRandomGraphGenerator(engine=engine)
+    edge_representations = []
+    for _ in range(2):
+        generator.seed(42)
+        edge_representations.append([sorted(generator.generate_graph(15, prob).get_edge_representation())
+                                     for prob in [0.05, 0.5]])
+
+    assert edge_representations[0] == edge_representations[1]
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError):
+        tce.SimpleRandomGraphGenerator(engine="networkx")
+
+
+def test_legacy_graph_sequence_reproduces_the_original_process_streams():
+    ''' The original implementation seeded process i with random_seed_base + i and generated the graphs of the tasks
+        whose index is congruent to i modulo the number of processes in the order of the parameter space.
+    '''
+    num_nodes_list, probabilities, repetitions, random_seed_base, number_of_processes = [6, 4, 9], [0.4, 0.2], 5, 7, 3
+    generator = tce.SimpleRandomGraphGenerator(engine="legacy")
+    original_graphs = {}
+    for process_index in range(number_of_processes):
+        random.seed(random_seed_base + process_index)
+        tasks = itertools.product(num_nodes_list, probabilities, range(repetitions))
+        for task_index, task in enumerate(tasks):
+            if task_index % number_of_processes == process_index:
+                original_graphs[task] = sorted(generator.generate_graph(task[0], task[1]).get_edge_representation())
+
+    sequence = tce.LegacyGraphSequence(num_nodes_list, probabilities, repetitions, random_seed_base,
+                                       number_of_processes)
+    shuffled_tasks = sorted(original_graphs)
+    random.Random(1).shuffle(shuffled_tasks)
+    for task in shuffled_tasks:
+        assert sorted(sequence.generate_graph(generator, *task).get_edge_representation()) == original_graphs[task]
@@ -0,0 +1,239 @@
+import os
+import pickle
+
+import pytest
+
+from evaluation_acm_ccr_2019 import columnar_results
+from evaluation_acm_ccr_2019 import graph_storage_extraction
+from evaluation_acm_ccr_2019 import result_files
+from evaluation_acm_ccr_2019.treewidth_computation_experiments import TreeDecompositionAlgorithmResult
+
+PATH = [("1", "2"), ("2", "3"), ("3", "4")]
+
+
+class _CountingEdgeRepresentation(object):
+    ''' Edge representation counting how often it is unpickled. '''
+    number_of_unpickled_instances = 0
+
+    def __init__(self, label):
+        self.label = label
+
+    def __setstate__(self, state):
+        _CountingEdgeRepresentation.number_of_unpickled_instances += 1
+        self.__dict__.update(state)
+
+    def __eq__(self, other):
+        return isinstance(other, _CountingEdgeRepresentation) and self.label == other.label
+
+
+def _create_results(edge_representation_factory=lambda num_nodes, prob, repetition_index: PATH):
+    ''' Returns results of several cells, some without treewidth and some without edge representation. '''
+    results = []
+    for num_nodes in [5, 10, 15]:
+        for prob in [0.1, 0.5]:
+            for repetition_index in range(3):
+                treewidth = (num_nodes // 5 + repetition_index) if repetition_index < 2 else None
+                edge_representation = edge_representation_factory(num_nodes, prob, repetition_index)
+                if (num_nodes + repetition_index) % 4 == 0:
+                    edge_representation = None
+                results.append(TreeDecompositionAlgorithmResult(num_nodes, prob, repetition_index, edge_representation,
+                                                                treewidth, 1.0,
+                                                                treewidth_upper_bound=num_nodes // 5 + 2))
+    return results
+
+
+def _write_framed_results(path, results, number_of_files=1):
+    os.makedirs(path)
+    for file_index in range(number_of_files):
+        with result_files.FramedResultWriter(os.path.join(path, "results_{}.pickle".format(file_index))) as writer:
+            for result in results[file_index::number_of_files]:
+                writer.add_result(result)
+    return path
+
+
+def _write_columnar_results(path, results):
+    with columnar_results.ColumnarResultsWriter(path) as writer:
+        for result in results:
+            writer.add_result(result)
+    return path
+
+
+def _write_aggregated_pickle(filename, results):
+    result_dict = {}
+    for result in results:
+        result_dict.setdefault(result.num_nodes, {}).setdefault(result.edge_probability, []).append(result)
+    with open(filename, "wb") as f:
+        pickle.dump(result_dict, f)
+    return filename
+
+
+def _write_inputs(tmp_path, results, monkeypatch):
+    ''' Writes the results in all input formats and returns the paths by format. '''
+    paths = dict(
+        framed=_write_framed_results(str(tmp_path / "framed"), results, number_of_files=3),
+        columnar=_write_columnar_results(str(tmp_path / "results.columnar"), results),
+        aggregated=_write_aggregated_pickle(str(tmp_path / "aggregated_results.pickle"), results),
+    )
+    with monkeypatch.context() as patch:
+        # results pickled by earlier versions store their edge representation in place
+        patch.setattr(TreeDecompositionAlgorithmResult, "__getstate__", lambda result: result.__dict__.copy())
+        paths["legacy_aggregated"] = _write_aggregated_pickle(str(tmp_path / "legacy_aggregated_results.pickle"),
+                                                              results)
+    return paths
+
+
+def test_pickled_result_deserializes_its_edge_representation_upon_access():
+    _CountingEdgeRepresentation.number_of_unpickled_instances = 0
+    result = TreeDecompositionAlgorithmResult(4, 0.5, 2, _CountingEdgeRepresentation("a"), 1, 0.5)
+
+    unpickled_result = pickle.loads(pickle.dumps(result))
+
+    assert (unpickled_result.num_nodes, unpickled_result.edge_probability, unpickled_result.repetition_index,
+            unpickled_result.treewidth, unpickled_result.runtime_treewidth_computation) == (4, 0.5, 2, 1, 0.5)
+    assert _CountingEdgeRepresentation.number_of_unpickled_instances == 0
+    assert unpickled_result.get_serialized_edge_representation() == result.get_serialized_edge_representation()
+    assert _CountingEdgeRepresentation.number_of_unpickled_instances == 0
+    assert unpickled_result.undirected_graph_edge_representation == _CountingEdgeRepresentation("a")
+    assert unpickled_result.undirected_graph_edge_representation == _CountingEdgeRepresentation("a")
+    assert _CountingEdgeRepresentation.number_of_unpickled_instances == 1
+
+
+def test_pickled_result_without_edge_representation_round_trips():
+    result = TreeDecompositionAlgorithmResult(4, 0.5, 2, None, None, 0.5, treewidth_upper_bound=3)
+
+    unpickled_result = pickle.loads(pickle.dumps(result))
+
+    assert unpickled_result.get_serialized_edge_representation() is None
+    assert unpickled_result.undirected_graph_edge_representation is None
+    assert unpickled_result.treewidth_upper_bound == 3
+    assert pickle.loads(pickle.dumps(TreeDecompositionAlgorithmResult(4, 0.5, 2, PATH, 1, 0.5))) \
+        .undirected_graph_edge_representation == PATH
+
+
+RESULT_FILTER = graph_storage_extraction.ResultFilter(2, 4, 10, 20, 0.2, 0.4)
+
+
+@pytest.mark.parametrize("num_nodes, prob, treewidth, expected_width", [
+    (15, 0.3, 3, 3),
+    (10, 0.3, 3, 3),
+    (20, 0.3, 3, 3),
+    (9, 0.3, 3, None),
+    (21, 0.3, 3, None),
+    (15, 0.2, 3, 3),
+    (15, 0.4, 3, 3),
+    (15, 0.19, 3, None),
+    (15, 0.41, 3, None),
+    (15, 0.3, 2, 2),
+    (15, 0.3, 4, 4),
+    (15, 0.3, 1, None),
+    (15, 0.3, 5, None),
+])
+def test_result_filter_ranges_are_inclusive(num_nodes, prob, treewidth, expected_width):
+    result = TreeDecompositionAlgorithmResult(num_nodes, prob, 0, None, treewidth, 1.0)
+
+    assert RESULT_FILTER.get_width(result) == expected_width
+    assert RESULT_FILTER.matches_cell(num_nodes, prob) == (10 <= num_nodes <= 20 and 0.2 <= prob <= 0.4)
+
+
+@pytest.mark.parametrize("treewidth_upper_bound, use_treewidth_upper_bound, expected_width", [
+    (3, False, None),
+    (3, True, 3),
+    (4, True, 4),
+    (5, True, None),
+    (None, True, None),
+])
+def test_result_filter_classifies_results_without_treewidth_by_their_upper_bound(
+        treewidth_upper_bound, use_treewidth_upper_bound, expected_width):
+    result_filter = graph_storage_extraction.ResultFilter(2, 4, 10, 20, 0.2, 0.4,
+                                                          use_treewidth_upper_bound=use_treewidth_upper_bound)
+    result = TreeDecompositionAlgorithmResult(15, 0.3, 0, None, None, 1.0, treewidth_upper_bound=treewidth_upper_bound)
+
+    assert result_filter.get_width(result) == expected_width
+
+
+def test_result_files_are_found_by_pattern_directory_and_filename(tmp_path):
+    path = _write_framed_results(str(tmp_path / "framed"), _create_results(), number_of_files=2)
+    aggregated_file = _write_aggregated_pickle(str(tmp_path / "aggregated_results.pickle"), _create_results())
+    filenames = [os.path.join(path, "results_0.pickle"), os.path.join(path, "results_1.pickle")]
+
+    assert graph_storage_extraction.find_result_files(os.path.join(path, "results_*.pickle")) == filenames
+    assert graph_storage_extraction.find_result_files(path) == filenames
+    assert graph_storage_extraction.find_result_files(filenames[1]) == filenames[1:]
+    assert graph_storage_extraction.find_result_files(aggregated_file) is None
+
+
+@pytest.mark.parametrize("input_format", ["framed", "columnar", "aggregated", "legacy_aggregated"])
+def test_edge_representations_of_non_matching_results_are_not_unpickled(tmp_path, monkeypatch, input_format):
+    results = _create_results(lambda num_nodes, prob, repetition_index: _CountingEdgeRepresentation(
+        (num_nodes, prob, repetition_index)))
+    input_path = _write_inputs(tmp_path, results, monkeypatch)[input_format]
+    result_filter = graph_storage_extraction.ResultFilter(2, 3, 10, 15, 0.1, 0.1)
+    _CountingEdgeRepresentation.number_of_unpickled_instances = 0
+
+    matches = graph_storage_extraction.extract_matching_graphs(input_path, result_filter)
+
+    # a legacy aggregated pickle can only be loaded as a whole, including all edge representations
+    expected_number_of_unpickled_instances = 0
+    if input_format == "legacy_aggregated":
+        expected_number_of_unpickled_instances = len([result for result in results
+                                                      if result.undirected_graph_edge_representation is not None])
+    assert _CountingEdgeRepresentation.number_of_unpickled_instances == expected_number_of_unpickled_instances
+    assert [pickle.loads(match[4]).label for match in matches] == [(10, 0.1, 0), (10, 0.1, 1), (15, 0.1, 0)]
+
+
+@pytest.mark.parametrize("use_treewidth_upper_bound", [False, True])
+def test_extraction_yields_the_same_graphs_for_all_input_formats(tmp_path, monkeypatch, use_treewidth_upper_bound):
+    results = _create_results(lambda num_nodes, prob, repetition_index: PATH[:1 + repetition_index])
+    paths = _write_inputs(tmp_path, results, monkeypatch)
+    result_filter = graph_storage_extraction.ResultFilter(1, 4, 5, 15, 0.1, 0.5,
+                                                          use_treewidth_upper_bound=use_treewidth_upper_bound)
+
+    matches_by_format = {input_format: graph_storage_extraction.extract_matching_graphs(path, result_filter)
+                         for input_format, path in paths.items()}
+
+    expected_matches = sorted(
+        (result.num_nodes, result.edge_probability, result.repetition_index, result_filter.get_width(result),
+         pickle.dumps(result.undirected_graph_edge_representation, protocol=pickle.HIGHEST_PROTOCOL))
+        for result in results
+        if result_filter.get_width(result) is not None and result.undirected_graph_edge_representation is not None)
+    assert len(expected_matches) > 0
+    for input_format, matches in matches_by_format.items():
+        assert [match[:4] for match in matches] == [match[:4] for match in expected_matches], input_format
+        assert [pickle.loads(match[4]) for match in matches] == [pickle.loads(match[4]) for match in expected_matches]
+
+
+@pytest.mark.parametrize("input_format", ["framed", "columnar"])
+def test_parallel_extraction_matches_serial_extraction(tmp_path, monkeypatch, input_format):
+    results = _create_results(lambda num_nodes, prob, repetition_index: PATH[:1 + (num_nodes + repetition_index) % 3])
+    input_path = _write_inputs(tmp_path, results, monkeypatch)[input_format]
+    result_filter = graph_storage_extraction.ResultFilter(0, 10, 0, 100, 0.0, 1.0, use_treewidth_upper_bound=True)
+
+    serial_matches = graph_storage_extraction.extract_matching_graphs(input_path, result_filter, threads=1)
+    parallel_matches = graph_storage_extraction.extract_matching_graphs(input_path, result_filter, threads=3)
+
+    assert len(serial_matches) > 3
+    assert parallel_matches == serial_matches
+
+
+def test_single_result_file_in_the_legacy_format_is_streamed(tmp_path, monkeypatch):
+    results = _create_results()
+    legacy_file = str(tmp_path / "results_0.pickle")
+    with open(legacy_file, "wb") as f:
+        for result in results:
+            pickle.dump(result, f)
+    result_filter = graph_storage_extraction.ResultFilter(0, 10, 0, 100, 0.0, 1.0)
+
+    assert graph_storage_extraction.find_result_files(legacy_file) is None
+    assert graph_storage_extraction.extract_matching_graphs(legacy_file, result_filter) == \
+        graph_storage_extraction.extract_matching_graphs(_write_inputs(tmp_path, results, monkeypatch)["framed"],
+                                                         result_filter)
+
+
+def test_unknown_pickles_are_rejected(tmp_path):
+    filename = str(tmp_path / "unknown.pickle")
+    with open(filename, "wb") as f:
+        pickle.dump([1, 2, 3], f)
+
+    with pytest.raises(ValueError):
+        graph_storage_extraction.extract_matching_graphs(filename, graph_storage_extraction.ResultFilter(
+            0, 10, 0, 100, 0.0, 1.0))
@@ -0,0 +1,162 @@
+import collections
+import os
+import pickle
+import random
+
+import pytest
+
+from alib import datamodel
+
+from evaluation_acm_ccr_2019 import graph_storage_extraction
+from evaluation_acm_ccr_2019 import graph_store
+from evaluation_acm_ccr_2019 import result_files
+from evaluation_acm_ccr_2019.treewidth_computation_experiments import TreeDecompositionAlgorithmResult
+
+PATH = [("1", "2"), ("2", "3"), ("3", "4")]
+STAR = [("1", "2"), ("1", "3"), ("1", "4")]
+CYCLE = [("1", "2"), ("2", "3"), ("3", "4"), ("4", "1")]
+TRIANGLE = [("1", "2"), ("2", "3"), ("3", "1")]
+RELABELED_PATH = [("2", "4"), ("4", "1"), ("1", "3")]
+RELABELED_STAR = [("4", "1"), ("4", "2"), ("3", "4")]
+
+
+def _write_graph_store(path, graphs):
+    with graph_store.GraphStoreWriter(path) as writer:
+        for graph in graphs:
+            treewidth, edge_representation = graph[:2]
+            multiplicity = graph[2] if len(graph) > 2 else 1
+            writer.add_graph_as_edge_representation(treewidth, edge_representation, multiplicity=multiplicity)
+    return graph_store.GraphStore(path)
+
+
+def _write_result_file(filename, graphs):
+    with result_files.FramedResultWriter(filename) as writer:
+        for repetition_index, (treewidth, edge_representation) in enumerate(graphs):
+            writer.add_result(TreeDecompositionAlgorithmResult(4, 0.5, repetition_index, edge_representation,
+                                                               treewidth, 0.5))
+
+
+def test_graphs_are_stored_in_buckets(tmp_path):
+    path = str(tmp_path / "graphs")
+    store = _write_graph_store(path, [(2, CYCLE), (1, PATH), (2, TRIANGLE), (1, STAR)])
+
+    assert graph_store.is_graph_store_path(path)
+    assert len(store) == 4
+    assert store.get_buckets() == [(1, 4), (2, 3), (2, 4)]
+    assert store.get_number_of_graphs(1, 4) == 2
+    assert store.get_number_of_graphs(3, 4) == 0
+    assert [store.get_edge_representation(graph_index) for graph_index in store.get_graph_indices(1, 4)] == [PATH, STAR]
+    assert [store.get_edge_representation(graph_index) for graph_index in store.get_graph_indices(2, 3)] == [TRIANGLE]
+
+
+def test_graphs_of_a_bucket_are_sampled_uniformly(tmp_path):
+    store = _write_graph_store(str(tmp_path / "graphs"), [(2, CYCLE), (1, PATH), (1, STAR)])
+    random_instance = random.Random(0)
+
+    counts = collections.Counter(tuple(store.sample_edge_representation(1, 4, random_instance)) for _ in range(4000))
+
+    assert set(counts) == {tuple(PATH), tuple(STAR)}
+    assert abs(counts[tuple(STAR)] / 4000.0 - 0.5) < 0.03
+    assert all(store.sample_edge_representation(2, 4, random_instance) == CYCLE for _ in range(10))
+
+
+def test_sampling_from_an_empty_bucket_fails(tmp_path):
+    store = _write_graph_store(str(tmp_path / "graphs"), [(1, PATH)])
+
+    with pytest.raises(KeyError):
+        store.sample_graph_index(2, 4)
+
+
+def test_sampling_is_reproducible(tmp_path):
+    store = _write_graph_store(str(tmp_path / "graphs"), [(1, PATH), (1, STAR), (1, CYCLE)])
+
+    samples = []
+    for _ in range(2):
+        random_instance = random.Random(5)
+        samples.append([store.sample_graph_index(1, 4, random_instance) for _ in range(20)])
+    assert samples[0] == samples[1]
+    assert len(set(samples[0])) == 3
+
+
+def test_non_numeric_node_names_are_relabeled():
+    edges, number_of_nodes = graph_store.pack_edge_representation([("a", "b"), ("b", "c")])
+
+    assert number_of_nodes == 3
+    assert edges.tolist() == [[1, 2], [2, 3]]
+    assert graph_store.unpack_edge_representation(edges) == [("1", "2"), ("2", "3")]
+
+
+def test_multiplicities_are_stored_per_graph(tmp_path):
+    store = _write_graph_store(str(tmp_path / "graphs"), [(2, CYCLE, 1), (1, PATH, 3), (2, TRIANGLE, 2), (1, STAR, 5)])
+
+    assert store.get_total_multiplicity(1, 4) == 8
+    assert store.get_total_multiplicity(3, 4) == 0
+    assert [store.get_multiplicity(graph_index) for graph_index in store.get_graph_indices(1, 4)] == [3, 5]
+
+
+def test_sampling_respects_multiplicities(tmp_path):
+    store = _write_graph_store(str(tmp_path / "graphs"), [(2, CYCLE, 1), (1, PATH, 1), (1, STAR, 3)])
+    random_instance = random.Random(0)
+
+    weighted_counts = collections.Counter(
+        tuple(store.sample_edge_representation(1, 4, random_instance)) for _ in range(4000))
+    uniform_counts = collections.Counter(
+        tuple(store.sample_edge_representation(1, 4, random_instance, respect_multiplicities=False))
+        for _ in range(4000))
+
+    assert abs(weighted_counts[tuple(STAR)] / 4000.0 - 0.75) < 0.03
+    assert abs(uniform_counts[tuple(STAR)] / 4000.0 - 0.5) < 0.03
+
+
+def test_graph_stores_without_multiplicities_are_sampled_uniformly(tmp_path):
+    path = str(tmp_path / "graphs")
+    _write_graph_store(path, [(1, PATH, 1), (1, STAR, 7)])
+    os.remove(os.path.join(path, graph_store.MULTIPLICITY_OFFSETS_FILENAME))
+    store = graph_store.GraphStore(path)
+
+    assert store.get_total_multiplicity(1, 4) == 2
+    assert [store.get_multiplicity(graph_index) for graph_index in store.get_graph_indices(1, 4)] == [1, 1]
+    random_instance = random.Random(1)
+    counts = collections.Counter(store.sample_graph_index(1, 4, random_instance) for _ in range(2000))
+    assert abs(counts[0] / 2000.0 - 0.5) < 0.05
+
+
+def test_deduplication_counts_the_graphs_of_each_isomorphism_class():
+    graphs = [(1, PATH), (1, RELABELED_STAR), (1, RELABELED_PATH), (1, STAR), (1, PATH), (2, CYCLE), (2, TRIANGLE)]
+    matches = [(len({node for edge in edge_representation for node in edge}), 0.5, repetition_index, width,
+                pickle.dumps(edge_representation))
+               for repetition_index, (width, edge_representation) in enumerate(graphs)]
+
+    deduplicated_graphs = graph_storage_extraction.deduplicate_isomorphic_graphs(matches)
+
+    assert [(width, pickle.loads(serialized_edge_representation), multiplicity)
+            for width, serialized_edge_representation, multiplicity in deduplicated_graphs] == \
+        [(1, PATH, 3), (1, RELABELED_STAR, 2), (2, CYCLE, 1), (2, TRIANGLE, 1)]
+
+
+def test_extracted_graph_store_holds_each_isomorphism_class_once(tmp_path):
+    result_file = str(tmp_path / "results_0.pickle")
+    _write_result_file(result_file, [(1, PATH), (1, RELABELED_PATH), (1, STAR), (2, CYCLE)])
+    output_path = str(tmp_path / "graphs")
+
+    number_of_graphs = graph_storage_extraction.extract_graph_store(
+        result_file, graph_storage_extraction.ResultFilter(1, 1, 1, 10, 0.0, 1.0), output_path, deduplicate=True)
+
+    store = graph_store.GraphStore(output_path)
+    assert number_of_graphs == 2
+    assert [(store.get_edge_representation(graph_index), store.get_multiplicity(graph_index))
+            for graph_index in store.get_graph_indices(1, 4)] == [(PATH, 2), (STAR, 1)]
+
+
+def test_undirected_graph_storage_keeps_isomorphic_graphs(tmp_path, monkeypatch):
+    result_file = str(tmp_path / "results_0.pickle")
+    _write_result_file(result_file, [(1, PATH), (1, RELABELED_PATH), (1, PATH)])
+    added_graphs = []
+    monkeypatch.setattr(datamodel.UndirectedGraphStorage, "add_graph_as_edge_representation",
+                        lambda graph_storage, parameter, edge_representation: added_graphs.append(
+                            (parameter, edge_representation)))
+
+    graph_storage_extraction.extract_undirected_graph_storage(
+        result_file, graph_storage_extraction.ResultFilter(0, 5, 1, 10, 0.0, 1.0))
+
+    assert added_graphs == [(1, PATH), (1, RELABELED_PATH), (1, PATH)]
@@ -0,0 +1,125 @@
+import multiprocessing as mp
+import os
+import time
+
+import pytest
+
+from evaluation_acm_ccr_2019 import memory_watchdog
+from evaluation_acm_ccr_2019 import worker_supervision
+
+MIB = 2 ** 20
+LARGE_CHUNK = (0, 50, 0.5, (0, 1))
+SMALL_CHUNK = (1, 10, 0.5, (0, 1))
+
+
+def _create_watchdog(current_usage, memory_budget=100 * MIB, soft_limit=0.5):
+    watchdog = memory_watchdog.MemoryWatchdog(memory_budget, soft_limit)
+    watchdog.task_class_profile = {(50, 0.5): [1, 60 * MIB], (10, 0.5): [1, 10 * MIB], (10, 0.9): [1, 20 * MIB]}
+    watchdog.current_usage = current_usage
+    return watchdog
+
+
+def _run_worker(process_index, task_queue, status_queue):
+    while True:
+        chunk = task_queue.get()
+        if chunk is None:
+            return
+        time.sleep(0.02)
+        status_queue.put((process_index, chunk[0], [chunk[0]]))
+
+
+class _SimulatedMemoryWatchdog(memory_watchdog.MemoryWatchdog):
+    ''' Watchdog assuming that each busy worker uses the profiled peak of its current chunk. '''
+
+    def __init__(self, *args, **kwargs):
+        super(_SimulatedMemoryWatchdog, self).__init__(*args, **kwargs)
+        self.max_number_of_concurrent_large_chunks = 0
+
+    def sample(self, processes, assigned_chunks, force=False):
+        current_chunks = [chunks[0] for chunks in assigned_chunks if chunks]
+        self.current_usage = sum(self.predict_usage(chunk) for chunk in current_chunks)
+        number_of_large_chunks = len([chunk for chunk in current_chunks if chunk[1] == 50])
+        self.max_number_of_concurrent_large_chunks = max(self.max_number_of_concurrent_large_chunks,
+                                                         number_of_large_chunks)
+
+
+def test_all_chunks_are_admitted_below_the_soft_limit():
+    watchdog = _create_watchdog(40 * MIB)
+
+    assert watchdog.admits(LARGE_CHUNK, number_of_busy_workers=3, prefetch=True)
+    assert watchdog.current_usage == 40 * MIB
+    assert watchdog.admits(LARGE_CHUNK, number_of_busy_workers=3)
+    assert watchdog.current_usage == 100 * MIB
+
+
+def test_only_chunks_fitting_into_the_budget_are_admitted_above_the_soft_limit():
+    watchdog = _create_watchdog(60 * MIB)
+
+    assert not watchdog.admits(SMALL_CHUNK, number_of_busy_workers=1, prefetch=True)
+    assert not watchdog.admits(LARGE_CHUNK, number_of_busy_workers=1)
+    assert watchdog.admits(SMALL_CHUNK, number_of_busy_workers=1)
+    assert watchdog.current_usage == 70 * MIB
+    # the predicted usage of admitted chunks is reserved until the next sample
+    for _ in range(2):
+        assert watchdog.admits(SMALL_CHUNK, number_of_busy_workers=2)
+    assert not watchdog.admits(SMALL_CHUNK, number_of_busy_workers=3)
+
+
+def test_chunks_are_always_admitted_if_no_worker_is_busy():
+    watchdog = _create_watchdog(95 * MIB)
+
+    assert not watchdog.admits(LARGE_CHUNK, number_of_busy_workers=1)
+    assert watchdog.admits(LARGE_CHUNK, number_of_busy_workers=0)
+
+
+def test_usage_of_unobserved_task_classes_is_predicted_by_dominating_classes():
+    watchdog = _create_watchdog(0)
+
+    assert watchdog.predict_usage((2, 10, 0.9, (0,))) == 20 * MIB
+    assert watchdog.predict_usage((2, 10, 0.7, (0,))) == 20 * MIB
+    assert watchdog.predict_usage((2, 30, 0.2, (0,))) == 60 * MIB
+    assert watchdog.predict_usage((2, 60, 0.5, (0,))) == 0
+    # coupled chunks are classified by their largest probability
+    assert watchdog.predict_usage((2, 10, (0.1, 0.9), (0,), frozenset())) == 20 * MIB
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="/proc is not available")
+def test_samples_are_attributed_to_the_task_class_of_the_current_chunk():
+    watchdog = memory_watchdog.MemoryWatchdog(2 ** 40)
+    current_process = mp.current_process()
+    watchdog.sample([current_process, current_process], [[SMALL_CHUNK, LARGE_CHUNK], []])
+
+    rss = memory_watchdog.get_process_tree_rss(os.getpid())
+    assert watchdog.task_class_profile[(10, 0.5)][0] == 1
+    assert 0 < watchdog.task_class_profile[(10, 0.5)][1] <= 2 * rss
+    assert (50, 0.5) not in watchdog.task_class_profile
+    assert watchdog.peak_usage >= watchdog.task_class_profile[(10, 0.5)][1]
+
+
+def test_supervisor_defers_chunks_exceeding_the_budget():
+    chunks = [(chunk_index, 50 if chunk_index % 2 == 0 else 10, 0.5, (0,)) for chunk_index in range(12)]
+    watchdog = _SimulatedMemoryWatchdog(100 * MIB, soft_limit=0.5, sample_interval=0.01)
+    watchdog.task_class_profile = {(50, 0.5): [1, 60 * MIB], (10, 0.5): [1, 10 * MIB]}
+
+    def start_worker(process_index, task_queue, status_queue):
+        process = mp.Process(target=_run_worker, args=(process_index, task_queue, status_queue))
+        process.start()
+        return process
+
+    # without prefetching, a large chunk is only handed out while no other large chunk is processed
+    supervisor = worker_supervision.WorkerSupervisor(3, start_worker, lambda process_index, chunk: ([], chunk),
+                                                     chunks_per_worker=1, poll_interval=0.01, memory_watchdog=watchdog)
+    chunk_iterator = iter(chunks)
+    finished_chunks = []
+    failed_chunks = supervisor.run(lambda: next(chunk_iterator, None), finished_chunks.extend)
+
+    assert failed_chunks == []
+    assert sorted(finished_chunks) == list(range(len(chunks)))
+    assert supervisor.number_of_deferred_chunks > 0
+    assert watchdog.max_number_of_concurrent_large_chunks == 1
+
+
+@pytest.mark.parametrize("memory_budget, soft_limit", [(0, 0.5), (100, 0.0), (100, 1.5)])
+def test_invalid_parameters_are_rejected(memory_budget, soft_limit):
+    with pytest.raises(ValueError):
+        memory_watchdog.MemoryWatchdog(memory_budget, soft_limit)
@@ -0,0 +1,87 @@
+import logging
+import pickle
+import time
+
+import pytest
+
+from evaluation_acm_ccr_2019 import columnar_results
+from evaluation_acm_ccr_2019 import decomposition_backends
+from evaluation_acm_ccr_2019 import phase_timing
+from evaluation_acm_ccr_2019 import treewidth_computation_experiments as tce
+
+from conftest import create_graph
+
+
+def _create_pipeline(store_graphs_of_treewidth=()):
+    return tce.TreeDecompositionPipeline(None, list(store_graphs_of_treewidth), False, logging.getLogger(__name__),
+                                         backend=decomposition_backends.ExactDynamicProgrammingBackend())
+
+
+def test_wall_and_cpu_times_are_accumulated_per_phase():
+    timer = phase_timing.PhaseTimer()
+    for _ in range(2):
+        with timer.measure("decomposition"):
+            time.sleep(0.05)
+    timer.add_time("generation", 1.5, 0.5)
+    timings = timer.get_timings()
+
+    assert timings.get_wall_time("decomposition") >= 0.1
+    assert timings.get_cpu_time("decomposition") < 0.05
+    assert (timings.get_wall_time("generation"), timings.get_cpu_time("generation")) == (1.5, 0.5)
+    assert timings.get_wall_time("verification") == 0.0
+    assert timings.get_total_wall_time() == pytest.approx(1.5 + timings.get_wall_time("decomposition"))
+
+
+def test_unknown_phases_are_rejected():
+    with pytest.raises(ValueError):
+        phase_timing.PhaseTimer().add_time("sleeping", 1.0, 0.0)
+
+
+def test_timings_are_pickled_compactly():
+    timings = phase_timing.PhaseTimings(range(len(phase_timing.PHASES)), [0.5] * len(phase_timing.PHASES))
+    unpickled_timings = pickle.loads(pickle.dumps(timings, protocol=pickle.HIGHEST_PROTOCOL))
+
+    assert unpickled_timings.wall_times == timings.wall_times
+    assert unpickled_timings.cpu_times == timings.cpu_times
+
+
+def test_results_contain_the_phases_of_their_graph():
+    graph = create_graph(4, [(1, 2), (2, 3), (3, 4)])
+    pipeline = _create_pipeline(store_graphs_of_treewidth=[1])
+    phase_timer = pipeline.start_phase_timer()
+    outcome = pipeline.decompose(graph, phase_timer)
+    timings = pipeline.create_result(graph, 4, 0.5, 0, outcome, phase_timer).phase_timings
+
+    assert timings.get_wall_time("decomposition") > 0.0
+    assert timings.get_wall_time("verification") > 0.0
+    assert timings.get_wall_time("edge_representation") > 0.0
+    assert timings.get_wall_time("result_writing") == 0.0
+
+
+def test_result_writing_is_added_to_the_timings_of_the_next_graph():
+    pipeline = _create_pipeline()
+    first_timer = pipeline.start_phase_timer()
+    with pipeline.measure_result_writing():
+        time.sleep(0.05)
+    second_timer = pipeline.start_phase_timer()
+    third_timer = pipeline.start_phase_timer()
+
+    assert first_timer.get_timings().get_wall_time("result_writing") == 0.0
+    assert second_timer.get_timings().get_wall_time("result_writing") >= 0.05
+    assert third_timer.get_timings().get_wall_time("result_writing") == 0.0
+
+
+def test_phase_timings_are_stored_in_the_columnar_results(tmp_path):
+    path = str(tmp_path / "results.columnar")
+    number_of_phases = len(phase_timing.PHASES)
+    with columnar_results.ColumnarResultsWriter(path) as writer:
+        writer.add_result(tce.TreeDecompositionAlgorithmResult(
+            10, 0.1, 0, None, 2, 0.5, phase_timings=phase_timing.PhaseTimings([0.5] * number_of_phases,
+                                                                              [0.25] * number_of_phases)))
+        writer.add_result(tce.TreeDecompositionAlgorithmResult(10, 0.1, 1, None, 2, 0.5))
+
+    records = list(columnar_results.ColumnarResults(path).iter_results())
+    assert records[1].phase_timings is None
+    for phase in phase_timing.PHASES:
+        assert records[0].phase_timings.get_wall_time(phase) == 0.5
+        assert records[0].phase_timings.get_cpu_time(phase) == 0.25
@@ -0,0 +1,104 @@
+import logging
+
+import pytest
+
+from alib import datamodel
+
+from evaluation_acm_ccr_2019 import decomposition_backends
+from evaluation_acm_ccr_2019 import progress_telemetry
+from evaluation_acm_ccr_2019 import result_files
+from evaluation_acm_ccr_2019 import runtime_model
+from evaluation_acm_ccr_2019 import treewidth_computation_experiments as tce
+
+
+def _create_monitor(metrics_files, expected_tasks=None, number_of_workers=1, model=None, **kwargs):
+    if model is None:
+        model = runtime_model.RuntimeModel()
+    return progress_telemetry.ProgressMonitor(metrics_files, expected_tasks, number_of_workers, model, **kwargs)
+
+
+def test_committed_and_uncommitted_graphs_are_aggregated(tmp_path):
+    metrics_file = str(tmp_path / "metrics_0.json")
+    publisher = progress_telemetry.WorkerMetricsPublisher(metrics_file)
+    publisher.add_graph(10, 0.5, 1.0, 1.5, False)
+    publisher.add_graph(10, 0.5, None, 2.5, True)
+    publisher.add_graph(20, 0.5, 3.0, 3.5, False)
+    publisher.commit(number_of_unwritten_results=1)
+    publisher.publish(force=True)
+
+    assert publisher.cells == {(10, 0.5): [2, 1.0, 4.0, 1]}
+    assert _create_monitor([metrics_file, str(tmp_path / "metrics_1.json")]).aggregate() == \
+        {(10, 0.5): [2, 1.0, 4.0, 1], (20, 0.5): [1, 3.0, 3.5, 0]}
+
+
+def test_respawned_worker_continues_only_the_committed_metrics(tmp_path):
+    metrics_file = str(tmp_path / "metrics_0.json")
+    publisher = progress_telemetry.WorkerMetricsPublisher(metrics_file)
+    for _ in range(3):
+        publisher.add_graph(10, 0.5, 1.0, 1.0, False)
+    publisher.commit(number_of_unwritten_results=2)
+    publisher.publish(force=True)
+
+    # the two unwritten graphs are processed again by the respawned worker
+    respawned_publisher = progress_telemetry.WorkerMetricsPublisher(metrics_file)
+    for _ in range(2):
+        respawned_publisher.add_graph(10, 0.5, 1.0, 1.0, False)
+    respawned_publisher.commit()
+    respawned_publisher.publish(force=True)
+
+    assert _create_monitor([metrics_file]).aggregate() == {(10, 0.5): [3, 3.0, 3.0, 0]}
+
+
+def test_only_written_results_are_committed(tmp_path):
+    graph = datamodel.UndirectedGraph("test")
+    for node in ["1", "2"]:
+        graph.add_node(node)
+    pipeline = tce.TreeDecompositionPipeline(None, [], False, logging.getLogger(__name__),
+                                             backend=decomposition_backends.ExactDynamicProgrammingBackend())
+    publisher = progress_telemetry.WorkerMetricsPublisher(str(tmp_path / "metrics_0.json"))
+    number_of_committed_graphs = []
+    with result_files.FramedResultWriter(str(tmp_path / "results_0.pickle"), batch_size=2,
+                                         flush_interval=3600) as result_writer:
+        for repetition_index in range(3):
+            outcome = pipeline.decompose(graph)
+            result = pipeline.create_result(graph, 2, 0.5, repetition_index, outcome)
+            tce._write_result(result, outcome, pipeline, result_writer, logging.getLogger(__name__), publisher)
+            number_of_committed_graphs.append(publisher.cells.get((2, 0.5), [0])[0])
+
+    assert number_of_committed_graphs == [0, 2, 2]
+    assert len(publisher.uncommitted_graphs) == 1
+
+
+def test_remaining_time_is_estimated_from_the_observed_and_predicted_runtimes(tmp_path):
+    metrics_file = str(tmp_path / "metrics_0.json")
+    publisher = progress_telemetry.WorkerMetricsPublisher(metrics_file)
+    for _ in range(4):
+        publisher.add_graph(10, 0.5, 1.0, 2.0, False)
+    publisher.commit()
+    publisher.publish(force=True)
+    model = runtime_model.RuntimeModel()
+    model.add_runtime(20, 0.5, 5.0)
+    monitor = _create_monitor([metrics_file], expected_tasks={(10, 0.5): 10, (20, 0.5): 3}, number_of_workers=2,
+                              model=model)
+
+    # 6 graphs of 2 seconds each and 3 graphs of 5 seconds of solver time, i.e. 10 seconds of wall time, each
+    assert monitor.estimate_remaining_time(monitor.aggregate()) == pytest.approx((6 * 2.0 + 3 * 10.0) / 2)
+
+
+def test_prometheus_textfile_contains_the_progress(tmp_path):
+    metrics_file = str(tmp_path / "metrics_0.json")
+    publisher = progress_telemetry.WorkerMetricsPublisher(metrics_file)
+    publisher.add_graph(10, 0.5, 1.0, 2.0, False)
+    publisher.publish(force=True)
+    prometheus_textfile = str(tmp_path / "treewidth.prom")
+    monitor = _create_monitor([metrics_file], expected_tasks={(10, 0.5): 4}, completed_tasks={(10, 0.5): 4},
+                              prometheus_textfile=prometheus_textfile, get_number_of_waiting_chunks=lambda: 7)
+    monitor.start()
+    monitor.stop()
+
+    with open(prometheus_textfile) as f:
+        lines = f.read().splitlines()
+    assert 'treewidth_experiment_graphs_total{num_nodes="10",probability="0.5"} 1.0' in lines
+    assert 'treewidth_experiment_cell_completion_ratio{num_nodes="10",probability="0.5"} 0.625' in lines
+    assert "treewidth_experiment_waiting_chunks 7.0" in lines
+    assert "treewidth_experiment_eta_seconds 6.0" in lines
@@ -0,0 +1,109 @@
+import os
+import pickle
+
+from evaluation_acm_ccr_2019 import result_files
+
+
+def _write_results(filename, results, batch_size=3):
+    with result_files.FramedResultWriter(filename, batch_size=batch_size, flush_interval=3600) as writer:
+        for result in results:
+            writer.add_result(result)
+
+
+def _read_results(filename, repair_incomplete_tail=False):
+    return list(result_files.read_results_from_process_file(filename, repair_incomplete_tail=repair_incomplete_tail))
+
+
+def test_written_results_are_read_back_in_order(tmp_path):
+    filename = str(tmp_path / "results_0.pickle")
+    results = [(10, 0.1, repetition_index, {"treewidth": repetition_index % 4}) for repetition_index in range(10)]
+    _write_results(filename, results)
+
+    assert result_files.is_framed_result_file(filename)
+    assert _read_results(filename) == results
+
+
+def test_results_are_buffered_until_the_batch_is_full(tmp_path):
+    filename = str(tmp_path / "results_0.pickle")
+    writer = result_files.FramedResultWriter(filename, batch_size=3, flush_interval=3600)
+    writer.add_result(0)
+    writer.add_result(1)
+    assert _read_results(filename) == []
+    writer.add_result(2)
+    assert _read_results(filename) == [0, 1, 2]
+    writer.add_result(3)
+    writer.close()
+    assert _read_results(filename) == [0, 1, 2, 3]
+
+
+def test_incomplete_last_frame_is_discarded_and_repaired(tmp_path):
+    filename = str(tmp_path / "results_0.pickle")
+    _write_results(filename, list(range(8)))
+    complete_size = os.path.getsize(filename)
+    _write_results(filename, ["lost"] * 5, batch_size=5)
+    with open(filename, "rb+") as f:
+        f.truncate(os.path.getsize(filename) - 4)
+
+    assert _read_results(filename) == list(range(8))
+    assert os.path.getsize(filename) > complete_size
+
+    assert _read_results(filename, repair_incomplete_tail=True) == list(range(8))
+    assert os.path.getsize(filename) == complete_size
+
+    _write_results(filename, [8, 9])
+    assert _read_results(filename) == list(range(10))
+
+
+def test_truncated_frame_header_is_discarded(tmp_path):
+    filename = str(tmp_path / "results_0.pickle")
+    _write_results(filename, list(range(3)))
+    with open(filename, "ab") as f:
+        f.write(result_files.FRAME_HEADER.pack(100, 0)[:5])
+
+    assert _read_results(filename) == list(range(3))
+
+
+def test_frame_with_wrong_checksum_is_discarded(tmp_path):
+    filename = str(tmp_path / "results_0.pickle")
+    _write_results(filename, list(range(6)))
+    with open(filename, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        last_byte = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last_byte[0] ^ 0xff]))
+
+    assert _read_results(filename) == list(range(3))
+
+
+def test_legacy_files_are_read_and_appended_to_in_their_format(tmp_path):
+    filename = str(tmp_path / "results_0.pickle")
+    with open(filename, "wb") as f:
+        for result in range(4):
+            pickle.dump(result, f)
+        f.write(pickle.dumps(4)[:-2])
+
+    assert not result_files.is_framed_result_file(filename)
+    assert _read_results(filename, repair_incomplete_tail=True) == list(range(4))
+
+    _write_results(filename, [4, 5])
+    assert not result_files.is_framed_result_file(filename)
+    assert _read_results(filename) == list(range(6))
+
+
+def test_concurrent_reading_yields_the_results_of_all_files(tmp_path):
+    filenames = []
+    expected_results = []
+    for process_index in range(4):
+        filename = str(tmp_path / "results_{}.pickle".format(process_index))
+        results = [(process_index, index) for index in range(25)]
+        if process_index == 3:
+            with open(filename, "wb") as f:
+                for result in results:
+                    pickle.dump(result, f)
+        else:
+            _write_results(filename, results, batch_size=7)
+        filenames.append(filename)
+        expected_results.extend(results)
+
+    results = list(result_files.read_results_from_process_files_concurrently(filenames, threads=3))
+    assert sorted(results) == sorted(expected_results)
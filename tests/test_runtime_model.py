@@ -0,0 +1,60 @@
+import yaml
+
+from evaluation_acm_ccr_2019 import result_files
+from evaluation_acm_ccr_2019 import runtime_model
+from evaluation_acm_ccr_2019 import treewidth_computation_experiments as tce
+
+
+def _create_result(num_nodes, prob, repetition_index, runtime):
+    return tce.TreeDecompositionAlgorithmResult(num_nodes, prob, repetition_index, None, 3, runtime)
+
+
+def test_runtimes_are_predicted_by_the_mean_of_the_nearest_combination():
+    model = runtime_model.RuntimeModel()
+    model.add_runtime(10, 0.1, 1.0)
+    model.add_runtime(10, 0.1, 3.0)
+    model.add_runtime(50, 0.5, 40.0)
+    model.add_runtime(50, 0.1, 8.0, count=2)
+
+    assert model.predict(10, 0.1) == 2.0
+    assert model.predict(50, 0.1) == 4.0
+    assert model.predict(45, 0.45) == 40.0
+    assert model.predict(12, 0.15) == 2.0
+
+
+def test_empty_model_predicts_the_highest_runtimes_for_large_graphs_of_medium_density():
+    model = runtime_model.RuntimeModel()
+
+    assert model.predict(40, 0.5) > model.predict(20, 0.5)
+    assert model.predict(40, 0.5) > model.predict(40, 0.1)
+    assert model.predict(40, 0.5) > model.predict(40, 0.9)
+
+
+def test_saved_model_is_loaded_with_its_counts(tmp_path):
+    path = str(tmp_path / "runtime_model.yml")
+    model = runtime_model.RuntimeModel()
+    model.add_results([_create_result(10, 0.1, 0, 1.0), _create_result(10, 0.1, 1, 2.0),
+                       _create_result(20, 0.3, 0, 5.0)])
+    model.save(path)
+
+    loaded_model = runtime_model.RuntimeModel.load(path)
+    assert loaded_model.cells == {(10, 0.1): [2, 3.0], (20, 0.3): [1, 5.0]}
+
+
+def test_study_saves_only_its_own_runtimes(tmp_path):
+    earlier_model_file = str(tmp_path / "earlier_runtime_model.yml")
+    earlier_model = runtime_model.RuntimeModel()
+    earlier_model.add_runtime(10, 0.1, 100.0)
+    earlier_model.add_runtime(50, 0.5, 1000.0)
+    earlier_model.save(earlier_model_file)
+    output_file_base = str(tmp_path / "results_{process_index}.pickle")
+    with result_files.FramedResultWriter(output_file_base.format(process_index=0)) as writer:
+        writer.add_result(_create_result(10, 0.1, 0, 1.0))
+        writer.add_result(_create_result(10, 0.1, 1, 3.0))
+
+    experiment = tce.SimpleTreeDecompositionExperiment(1, output_file_base, runtime_model_file=earlier_model_file)
+    assert experiment.runtime_model.predict(50, 0.5) == 1000.0
+    experiment.combine_results_to_overall_pickle()
+
+    with open(experiment.runtime_model_file) as f:
+        assert yaml.safe_load(f) == [dict(num_nodes=10, probability=0.1, count=2, mean_runtime=2.0)]
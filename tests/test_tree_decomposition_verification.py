@@ -0,0 +1,99 @@
+import pytest
+
+from alib import datamodel
+from vnep_approx import treewidth_model as twm
+
+from evaluation_acm_ccr_2019 import tree_decomposition_verification as tdv
+from evaluation_acm_ccr_2019 import treewidth_bounds
+
+from conftest import create_graph
+
+
+def _create_tree_decomposition(bags, edges):
+    tree_decomposition = twm.TreeDecomposition("test_decomposition")
+    for bag_node, bag in bags.items():
+        tree_decomposition.add_node(bag_node, node_bag=frozenset(str(node) for node in bag))
+    for bag_node_1, bag_node_2 in edges:
+        tree_decomposition.add_edge(bag_node_1, bag_node_2)
+    return tree_decomposition
+
+
+# the cycle 1-2-3-4-5 and a path decomposition of width 2
+CYCLE = create_graph(5, [(1, 2), (2, 3), (3, 4), (4, 5), (5, 1)])
+CYCLE_BAGS = {"a": [1, 2, 5], "b": [2, 3, 5], "c": [3, 4, 5]}
+CYCLE_TREE_EDGES = [("a", "b"), ("b", "c")]
+
+
+def _find_violation(bags, edges, graph=CYCLE):
+    return tdv.find_tree_decomposition_violation(treewidth_bounds.BitsetGraph.from_undirected_graph(graph),
+                                                 _create_tree_decomposition(bags, edges))
+
+
+def test_valid_decomposition_is_accepted():
+    assert _find_violation(CYCLE_BAGS, CYCLE_TREE_EDGES) is None
+    tdv.verify_tree_decomposition(CYCLE, _create_tree_decomposition(CYCLE_BAGS, CYCLE_TREE_EDGES))
+
+
+def test_decomposition_of_the_empty_graph_is_accepted():
+    assert _find_violation({}, [], graph=create_graph(0, [])) is None
+
+
+@pytest.mark.parametrize("bags, edges, expected_violation", [
+    (dict(CYCLE_BAGS, c=[3, 5]), CYCLE_TREE_EDGES, "node 4 is not contained in any bag"),
+    (dict(CYCLE_BAGS, a=[1, 2]), CYCLE_TREE_EDGES, "edge (1, 5) is not contained in any bag"),
+    (dict(CYCLE_BAGS, b=[2, 3]), CYCLE_TREE_EDGES, "the bags containing node 5 are not connected"),
+    (dict(CYCLE_BAGS, c=[3, 4, 6]), CYCLE_TREE_EDGES, "node 6, which is not contained in the graph"),
+    (CYCLE_BAGS, CYCLE_TREE_EDGES[:1], "the decomposition has 3 bags but 1 edges"),
+    (dict(CYCLE_BAGS, d=[1]), CYCLE_TREE_EDGES + [("a", "c")], "the decomposition contains a cycle"),
+])
+def test_violations_are_detected(bags, edges, expected_violation):
+    violation = _find_violation(bags, edges)
+
+    assert violation is not None and expected_violation in violation
+    with pytest.raises(tdv.InvalidTreeDecompositionError):
+        tdv.verify_tree_decomposition(CYCLE, _create_tree_decomposition(bags, edges))
+
+
+def test_verification_policies():
+    invalid_tree_decomposition = _create_tree_decomposition(dict(CYCLE_BAGS, b=[2, 3]), CYCLE_TREE_EDGES)
+    valid_tree_decomposition = _create_tree_decomposition(CYCLE_BAGS, CYCLE_TREE_EDGES)
+
+    assert tdv.TreeDecompositionVerifier("off").verify(CYCLE, invalid_tree_decomposition) is None
+    verifier = tdv.TreeDecompositionVerifier("full")
+    assert verifier.verify(CYCLE, valid_tree_decomposition) >= 0.0
+    assert verifier.verify(CYCLE, None) is None
+    assert verifier.number_of_verifications == 1
+    with pytest.raises(tdv.InvalidTreeDecompositionError):
+        verifier.verify(CYCLE, invalid_tree_decomposition)
+
+
+def test_sampled_verification_is_reproducible():
+    tree_decomposition = _create_tree_decomposition(CYCLE_BAGS, CYCLE_TREE_EDGES)
+    verified = []
+    for _ in range(2):
+        verifier = tdv.TreeDecompositionVerifier("sampled", sample_rate=0.25, random_seed=3)
+        verified.append([verifier.verify(CYCLE, tree_decomposition) is not None for _ in range(400)])
+
+    assert verified[0] == verified[1]
+    assert 60 <= sum(verified[0]) <= 140
+
+
+@pytest.mark.parametrize("policy, sample_rate", [("some", 0.1), ("sampled", 0.0), ("sampled", 1.5)])
+def test_invalid_verifier_parameters_are_rejected(policy, sample_rate):
+    with pytest.raises(ValueError):
+        tdv.TreeDecompositionVerifier(policy, sample_rate)
+
+
+@pytest.mark.parametrize("bags, expected_violation", [
+    (dict(CYCLE_BAGS, a=[1, 5], c=[4, 5]), "edge (1, 2) is not contained in any bag"),
+    (dict(CYCLE_BAGS, a=[2], c=[3]), "node 1 is not contained in any bag"),
+])
+def test_reported_violation_does_not_depend_on_the_order_of_the_nodes(bags, expected_violation):
+    reversed_cycle = datamodel.UndirectedGraph("test")
+    for node in reversed(CYCLE.nodes):
+        reversed_cycle.add_node(node)
+    for u, v in reversed(list(CYCLE.edges)):
+        reversed_cycle.add_edge(v, u)
+
+    for graph in [CYCLE, reversed_cycle]:
+        assert expected_violation in _find_violation(bags, CYCLE_TREE_EDGES, graph=graph)
@@ -0,0 +1,80 @@
+import itertools
+import logging
+import random
+
+import pytest
+
+from evaluation_acm_ccr_2019 import decomposition_backends
+from evaluation_acm_ccr_2019 import exact_treewidth
+from evaluation_acm_ccr_2019 import tree_decomposition_verification
+from evaluation_acm_ccr_2019 import treewidth_bounds
+from evaluation_acm_ccr_2019 import treewidth_computation_experiments as tce
+
+from conftest import create_graph, create_random_graph, brute_force_treewidth
+
+
+def _get_width(tree_decomposition):
+    return max(len(bag) for bag in tree_decomposition.node_bag_dict.values()) - 1
+
+
+class _RecordingBackend(decomposition_backends.ExactDynamicProgrammingBackend):
+    ''' Exact backend recording the graphs it is invoked for. '''
+
+    def __init__(self):
+        self.graphs = []
+
+    def compute_tree_decomposition(self, graph):
+        self.graphs.append(graph)
+        return super(_RecordingBackend, self).compute_tree_decomposition(graph)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_treewidth_bounds_enclose_the_treewidth(seed):
+    random_instance = random.Random(seed)
+    graph = create_random_graph(7, random_instance.choice([0.3, 0.5, 0.7]), random_instance)
+    bitset_graph = treewidth_bounds.BitsetGraph.from_undirected_graph(graph)
+
+    bounds = treewidth_bounds.compute_treewidth_bounds(bitset_graph)
+    tree_decomposition = treewidth_bounds.tree_decomposition_from_elimination_ordering(bitset_graph,
+                                                                                        bounds.elimination_ordering)
+
+    treewidth = brute_force_treewidth(graph)
+    assert bounds.lower_bound <= treewidth <= bounds.upper_bound
+    assert _get_width(tree_decomposition) == bounds.upper_bound
+    tree_decomposition_verification.verify_tree_decomposition(graph, tree_decomposition)
+
+
+@pytest.mark.parametrize("graph, treewidth", [
+    (create_graph(7, [(i, i + 1) for i in range(1, 6)] + [(2, 7)]), 1),
+    (create_graph(6, [(i, i % 6 + 1) for i in range(1, 7)]), 2),
+    (create_graph(6, itertools.combinations(range(1, 7), 2)), 5),
+    (create_graph(4, []), 0),
+])
+def test_treewidth_bounds_of_forests_cycles_and_cliques_are_tight(graph, treewidth):
+    bounds = treewidth_bounds.compute_treewidth_bounds(treewidth_bounds.BitsetGraph.from_undirected_graph(graph))
+
+    assert bounds.is_tight()
+    assert bounds.upper_bound == treewidth
+
+
+def test_pipeline_invokes_the_solver_only_for_graphs_with_differing_bounds():
+    random_instance = random.Random(0)
+    graphs = [create_random_graph(10, prob, random_instance) for prob in [0.2, 0.4, 0.5, 0.6, 0.9] for _ in range(4)]
+    backend = _RecordingBackend()
+    pipeline = tce.TreeDecompositionPipeline(None, [], False, logging.getLogger(__name__), use_treewidth_bounds=True,
+                                             backend=backend)
+
+    graphs_with_tight_bounds = []
+    for graph in graphs:
+        outcome = pipeline.decompose(graph)
+        bounds = treewidth_bounds.compute_treewidth_bounds(treewidth_bounds.BitsetGraph.from_undirected_graph(graph))
+        if bounds.is_tight():
+            graphs_with_tight_bounds.append(graph)
+            assert outcome.decomposition_method == "bounds"
+        else:
+            assert outcome.decomposition_method == "solver"
+        assert outcome.get_treewidth() == exact_treewidth.compute_exact_tree_decomposition(graph).width
+
+    assert 0 < len(graphs_with_tight_bounds) < len(graphs)
+    assert len(backend.graphs) == len(graphs) - len(graphs_with_tight_bounds)
+    assert not any(graph in graphs_with_tight_bounds for graph in backend.graphs)
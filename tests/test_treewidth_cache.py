@@ -0,0 +1,56 @@
+from vnep_approx import treewidth_model as twm
+
+from evaluation_acm_ccr_2019 import treewidth_cache
+
+from conftest import create_graph_with_nodes
+
+
+def _create_path_decomposition(path_nodes):
+    tree_decomposition = twm.TreeDecomposition("test_decomposition")
+    for index in range(len(path_nodes) - 1):
+        tree_decomposition.add_node("bag_{}".format(index), node_bag=frozenset(path_nodes[index:index + 2]))
+        if index > 0:
+            tree_decomposition.add_edge("bag_{}".format(index - 1), "bag_{}".format(index))
+    return tree_decomposition
+
+
+def test_decomposition_is_translated_to_the_nodes_of_an_isomorphic_graph(tmp_path):
+    cache = treewidth_cache.TreewidthCache(str(tmp_path / "cache.sqlite"))
+    path = create_graph_with_nodes(["1", "2", "3", "4"], [("1", "2"), ("2", "3"), ("3", "4")])
+    relabeled_path = create_graph_with_nodes(["d", "a", "c", "b"], [("c", "a"), ("b", "d"), ("a", "d")])
+
+    assert cache.lookup(cache.canonicalize(path)) is None
+    cache.store(cache.canonicalize(path), _create_path_decomposition(["1", "2", "3", "4"]))
+    tree_decomposition = cache.lookup(cache.canonicalize(relabeled_path))
+
+    assert tree_decomposition is not None
+    assert tree_decomposition.width == 1
+    bags = list(tree_decomposition.node_bag_dict.values())
+    assert set().union(*bags) == {"a", "b", "c", "d"}
+    for u, v in relabeled_path.edges:
+        assert any(u in bag and v in bag for bag in bags)
+    assert cache.number_of_lookups == 2
+    assert cache.get_hit_rate() == 0.5
+    cache.close()
+
+
+def test_cache_is_shared_via_the_database_file(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    graph = create_graph_with_nodes(["1", "2", "3"], [("1", "2"), ("2", "3")])
+    writing_cache = treewidth_cache.TreewidthCache(path)
+    writing_cache.store(writing_cache.canonicalize(graph), _create_path_decomposition(["1", "2", "3"]))
+    writing_cache.close()
+
+    reading_cache = treewidth_cache.TreewidthCache(path)
+    assert reading_cache.lookup(reading_cache.canonicalize(graph)) is not None
+    other_graph = create_graph_with_nodes(["1", "2", "3"], [("1", "2")])
+    assert reading_cache.lookup(reading_cache.canonicalize(other_graph)) is None
+    reading_cache.close()
+
+
+def test_large_graphs_are_not_cached(tmp_path):
+    cache = treewidth_cache.TreewidthCache(str(tmp_path / "cache.sqlite"), max_nodes=3)
+    graph = create_graph_with_nodes(["1", "2", "3", "4"], [("1", "2")])
+
+    assert cache.canonicalize(graph) is None
+    cache.close()
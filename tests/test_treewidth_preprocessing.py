@@ -0,0 +1,69 @@
+import itertools
+import random
+
+import pytest
+
+from evaluation_acm_ccr_2019 import exact_treewidth
+from evaluation_acm_ccr_2019 import tree_decomposition_verification
+from evaluation_acm_ccr_2019 import treewidth_preprocessing
+
+from conftest import create_graph
+
+# the edges of the complete bipartite graph K_{3,3} (of treewidth 3), to which no reduction applies
+K33_EDGES = [(u, v) for u in range(1, 4) for v in range(4, 7)]
+
+
+def _get_width(tree_decomposition):
+    return max(len(bag) for bag in tree_decomposition.node_bag_dict.values()) - 1
+
+
+@pytest.mark.parametrize("graph, treewidth", [
+    (create_graph(7, [(1, 2), (1, 3), (2, 4), (2, 5), (3, 6), (3, 7)]), 1),
+    (create_graph(8, [(i, i % 8 + 1) for i in range(1, 9)]), 2),
+    (create_graph(5, itertools.combinations(range(1, 6), 2)), 4),
+])
+def test_reductions_eliminate_trees_cycles_and_cliques_completely(graph, treewidth):
+    reduction = treewidth_preprocessing.reduce_graph(graph)
+
+    assert reduction.components == []
+    assert len(reduction.eliminated_nodes) == len(graph.nodes)
+    assert reduction.lower_bound == treewidth
+    tree_decomposition = treewidth_preprocessing.decompose_reduced_graph(reduction, lambda component_graph: None)
+    tree_decomposition_verification.verify_tree_decomposition(graph, tree_decomposition)
+    assert _get_width(tree_decomposition) == treewidth
+
+
+def test_reductions_keep_the_irreducible_part():
+    # the pendant paths are eliminated, while K_{3,3} is kept
+    graph = create_graph(9, K33_EDGES + [(1, 7), (7, 8), (6, 9)])
+
+    reduction = treewidth_preprocessing.reduce_graph(graph)
+
+    assert sorted(node for node, _ in reduction.eliminated_nodes) == ["7", "8", "9"]
+    assert len(reduction.components) == 1
+    assert sorted(reduction.components[0][0]) == [str(node) for node in range(1, 7)]
+
+
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.parametrize("threads", [1, 3])
+def test_decomposition_of_the_reduced_graph_is_optimal(seed, threads):
+    random_instance = random.Random(seed)
+    number_of_nodes = random_instance.randint(4, 12)
+    connection_probability = random_instance.choice([0.15, 0.25, 0.4])
+    graph = create_graph(number_of_nodes, [(u, v) for u, v in itertools.combinations(range(1, number_of_nodes + 1), 2)
+                                            if random_instance.random() < connection_probability])
+
+    reduction = treewidth_preprocessing.reduce_graph(graph)
+    tree_decomposition = treewidth_preprocessing.decompose_reduced_graph(
+        reduction, exact_treewidth.compute_exact_tree_decomposition, threads=threads)
+
+    tree_decomposition_verification.verify_tree_decomposition(graph, tree_decomposition)
+    assert _get_width(tree_decomposition) == _get_width(exact_treewidth.compute_exact_tree_decomposition(graph))
+    assert reduction.lower_bound <= _get_width(tree_decomposition)
+
+
+def test_decomposition_fails_if_a_component_cannot_be_decomposed():
+    reduction = treewidth_preprocessing.reduce_graph(create_graph(6, K33_EDGES))
+    assert len(reduction.components) == 1
+
+    assert treewidth_preprocessing.decompose_reduced_graph(reduction, lambda component_graph: None) is None
@@ -0,0 +1,139 @@
+import itertools
+import os
+
+import numpy as np
+import pytest
+
+from evaluation_acm_ccr_2019 import result_files
+from evaluation_acm_ccr_2019 import treewidth_computation_experiments as tce
+
+NUM_NODES = [5, 10, 15]
+PROBABILITIES = [0.1, 0.25, 0.5]
+REPETITIONS = 7
+
+
+def _tasks_of_chunks(chunks):
+    return [(num_nodes, prob, repetition_index)
+            for _, num_nodes, prob, repetition_indices in chunks
+            for repetition_index in repetition_indices]
+
+
+def _create_result(num_nodes, prob, repetition_index, treewidth=2, runtime=0.5):
+    return tce.TreeDecompositionAlgorithmResult(num_nodes, prob, repetition_index, None, treewidth, runtime)
+
+
+def test_work_chunks_cover_all_tasks_once_in_product_order():
+    chunks = list(tce.generate_work_chunks(NUM_NODES, PROBABILITIES, REPETITIONS, chunk_size=3))
+
+    assert [chunk[0] for chunk in chunks] == list(range(len(chunks)))
+    assert all(1 <= len(chunk[3]) <= 3 for chunk in chunks)
+    assert _tasks_of_chunks(chunks) == list(itertools.product(NUM_NODES, PROBABILITIES, range(REPETITIONS)))
+
+
+def test_work_chunks_omit_completed_tasks():
+    completed_tasks = {(5, 0.1, 0), (5, 0.1, 4), (15, 0.5, 6)}
+    chunks = list(tce.generate_work_chunks(NUM_NODES, PROBABILITIES, REPETITIONS, chunk_size=2,
+                                           completed_tasks=completed_tasks))
+
+    tasks = _tasks_of_chunks(chunks)
+    assert not completed_tasks & set(tasks)
+    assert len(tasks) == len(NUM_NODES) * len(PROBABILITIES) * REPETITIONS - len(completed_tasks)
+
+
+def test_completed_tasks_are_collected_from_the_result_files_of_all_processes(tmp_path):
+    output_file_base = str(tmp_path / "results_{process_index}.pickle")
+    for process_index, results in enumerate([[_create_result(5, 0.1, 0, treewidth=1, runtime=0.25)],
+                                             [_create_result(5, 0.1, 1), _create_result(10, 0.5, 3)],
+                                             [_create_result(15, 0.25, 2)]]):
+        with result_files.FramedResultWriter(output_file_base.format(process_index=process_index)) as writer:
+            for result in results:
+                writer.add_result(result)
+    # the last process was killed while writing its second batch
+    last_file = output_file_base.format(process_index=2)
+    complete_size = os.path.getsize(last_file)
+    with result_files.FramedResultWriter(last_file) as writer:
+        writer.add_result(_create_result(15, 0.25, 3))
+    with open(last_file, "rb+") as f:
+        f.truncate(os.path.getsize(last_file) - 4)
+
+    experiment = tce.SimpleTreeDecompositionExperiment(2, output_file_base, resume=True)
+    completed_tasks = experiment.collect_completed_tasks()
+
+    assert completed_tasks == {(5, 0.1, 0): (1, 0.25), (5, 0.1, 1): (2, 0.5), (10, 0.5, 3): (2, 0.5),
+                               (15, 0.25, 2): (2, 0.5)}
+    assert os.path.getsize(last_file) == complete_size
+    assert last_file in experiment.output_filenames
+
+
+def test_work_chunks_reject_invalid_chunk_size():
+    with pytest.raises(ValueError):
+        list(tce.generate_work_chunks(NUM_NODES, PROBABILITIES, REPETITIONS, chunk_size=0))
+
+
+@pytest.mark.parametrize("number_of_shards", [1, 2, 3, 5])
+def test_shards_partition_the_tasks_independently_of_the_chunk_size(number_of_shards):
+    all_tasks = set(itertools.product(NUM_NODES, PROBABILITIES, range(REPETITIONS)))
+    tasks_of_shards = []
+    for shard_index in range(number_of_shards):
+        tasks = _tasks_of_chunks(tce.generate_work_chunks(NUM_NODES, PROBABILITIES, REPETITIONS, chunk_size=2,
+                                                          shard=(shard_index, number_of_shards)))
+        other_chunk_size_tasks = _tasks_of_chunks(tce.generate_work_chunks(NUM_NODES, PROBABILITIES, REPETITIONS,
+                                                                           chunk_size=5,
+                                                                           shard=(shard_index, number_of_shards)))
+        assert tasks == other_chunk_size_tasks
+        tasks_of_shards.append(set(tasks))
+
+    assert set.union(*tasks_of_shards) == all_tasks
+    assert sum(len(tasks) for tasks in tasks_of_shards) == len(all_tasks)
+
+
+@pytest.mark.parametrize("shard_string, expected", [("0/1", (0, 1)), ("2/3", (2, 3))])
+def test_parse_shard(shard_string, expected):
+    assert tce.parse_shard(shard_string) == expected
+
+
+@pytest.mark.parametrize("shard_string", ["1/1", "-1/2", "3", "a/b", "0/0"])
+def test_parse_shard_rejects_invalid_specifications(shard_string):
+    with pytest.raises(ValueError):
+        tce.parse_shard(shard_string)
+
+
+def test_task_seeds_are_deterministic_and_distinct():
+    tasks = list(itertools.product(range(5, 40, 5), [0.05, 0.1, 0.100001, 0.5, 0.9], range(50)))
+    seeds = [tce.derive_task_seed(0, *task) for task in tasks]
+
+    assert seeds == [tce.derive_task_seed(0, *task) for task in tasks]
+    assert len(set(seeds)) == len(tasks)
+    assert tce.derive_task_seed(0, 10, 0.1, 3) == tce.derive_task_seed(0, 10, 0.1 + 0.2 - 0.2, 3)
+    assert not set(seeds) & {tce.derive_task_seed(1, *task) for task in tasks}
+
+
+def test_graphs_of_neighbouring_task_seeds_are_uncorrelated():
+    ''' Compares the edge indicators of the graphs of consecutive repetitions: for independent graphs of probability 1/2,
+        each node pair is an edge of both graphs with probability 1/4.
+    '''
+    num_nodes, prob = 40, 0.5
+    generator = tce.SimpleRandomGraphGenerator(engine="numpy")
+    number_of_pairs = num_nodes * (num_nodes - 1) // 2
+    adjacency_matrices = []
+    for repetition_index in range(200):
+        generator.seed(tce.derive_task_seed(0, num_nodes, prob, repetition_index))
+        edges = generator.generate_edge_array(num_nodes, prob)
+        matrix = np.zeros((num_nodes + 1, num_nodes + 1), dtype=bool)
+        matrix[edges[:, 0], edges[:, 1]] = True
+        adjacency_matrices.append(matrix)
+
+    densities = [matrix.sum() / float(number_of_pairs) for matrix in adjacency_matrices]
+    common_edges = [(first & second).sum() / float(number_of_pairs)
+                    for first, second in zip(adjacency_matrices, adjacency_matrices[1:])]
+    assert abs(np.mean(densities) - prob) < 0.01
+    assert abs(np.mean(common_edges) - prob * prob) < 0.01
+
+
+def test_graph_of_a_task_does_not_depend_on_previously_generated_graphs():
+    generator = tce.SimpleRandomGraphGenerator(engine="numpy")
+    first = tce.regenerate_graph(generator, 0, 12, 0.3, 4)
+    tce.regenerate_graph(generator, 0, 20, 0.7, 1)
+    second = tce.regenerate_graph(tce.SimpleRandomGraphGenerator(engine="numpy"), 0, 12, 0.3, 4)
+
+    assert sorted(first.get_edge_representation()) == sorted(second.get_edge_representation())
@@ -0,0 +1,146 @@
+import multiprocessing as mp
+import os
+
+import pytest
+
+from evaluation_acm_ccr_2019 import treewidth_computation_experiments as tce
+from evaluation_acm_ccr_2019 import worker_supervision
+
+# tasks terminating the worker process processing them: always or only upon the first attempt
+POISON_TASK = "poison"
+CRASH_ONCE_TASK = "crash_once"
+POISON_EXIT_CODE = 3
+CRASH_EXIT_CODE = 4
+
+
+def _get_result_file(result_directory, process_index):
+    return os.path.join(result_directory, "results_{}.txt".format(process_index))
+
+
+def _run_worker(process_index, task_queue, status_queue, result_directory):
+    ''' Writes the tasks of each chunk to the result file of the process (one per line) and reports them. '''
+    while True:
+        chunk = task_queue.get()
+        if chunk is None:
+            return
+        chunk_index, tasks = chunk
+        for task in tasks:
+            if task == POISON_TASK:
+                os._exit(POISON_EXIT_CODE)
+            if task == CRASH_ONCE_TASK:
+                marker_file = os.path.join(result_directory, "crashed")
+                if not os.path.exists(marker_file):
+                    open(marker_file, "w").close()
+                    os._exit(CRASH_EXIT_CODE)
+            with open(_get_result_file(result_directory, process_index), "a") as f:
+                f.write(task + "\n")
+        status_queue.put((process_index, chunk_index, list(tasks)))
+
+
+def _supervise(tmp_path, chunks, number_of_workers=2, max_chunk_attempts=2, waiting_chunks=None):
+    ''' Processes the chunks and returns the supervisor, the reported results, and the failed chunks. The number of
+        waiting chunks is appended to waiting_chunks (if given) whenever results are reported.
+    '''
+    result_directory = str(tmp_path)
+
+    def start_worker(process_index, task_queue, status_queue):
+        process = mp.Process(target=_run_worker, args=(process_index, task_queue, status_queue, result_directory))
+        process.start()
+        return process
+
+    def recover_chunk(process_index, chunk):
+        written_tasks = set()
+        if os.path.exists(_get_result_file(result_directory, process_index)):
+            with open(_get_result_file(result_directory, process_index)) as f:
+                written_tasks = set(f.read().split())
+        chunk_index, tasks = chunk
+        remaining_tasks = tuple(task for task in tasks if task not in written_tasks)
+        recovered_results = [task for task in tasks if task in written_tasks]
+        return recovered_results, (chunk_index, remaining_tasks) if remaining_tasks else None
+
+    supervisor = worker_supervision.WorkerSupervisor(number_of_workers, start_worker, recover_chunk,
+                                                     max_chunk_attempts=max_chunk_attempts, poll_interval=0.05)
+    chunk_iterator = iter(chunks)
+    results = []
+
+    def on_chunk_finished(chunk_results):
+        results.extend(chunk_results)
+        if waiting_chunks is not None:
+            waiting_chunks.append(supervisor.get_number_of_waiting_chunks())
+
+    failed_chunks = supervisor.run(lambda: next(chunk_iterator, None), on_chunk_finished, number_of_chunks=len(chunks))
+    return supervisor, results, failed_chunks
+
+
+def _create_chunks(number_of_chunks, tasks_per_chunk=3):
+    return [(chunk_index, tuple("task_{}_{}".format(chunk_index, task_index) for task_index in range(tasks_per_chunk)))
+            for chunk_index in range(number_of_chunks)]
+
+
+def test_all_chunks_are_processed_by_healthy_workers(tmp_path):
+    chunks = _create_chunks(10)
+    supervisor, results, failed_chunks = _supervise(tmp_path, chunks)
+
+    assert sorted(results) == sorted(task for _, tasks in chunks for task in tasks)
+    assert failed_chunks == []
+    assert supervisor.number_of_respawns == 0
+
+
+def test_unfinished_tasks_of_a_crashed_worker_are_handed_out_again(tmp_path):
+    chunks = _create_chunks(6)
+    chunks[2] = (2, ("task_2_0", "task_2_1", CRASH_ONCE_TASK, "task_2_3"))
+    supervisor, results, failed_chunks = _supervise(tmp_path, chunks)
+
+    assert sorted(results) == sorted(task for _, tasks in chunks for task in tasks)
+    assert failed_chunks == []
+    assert supervisor.number_of_respawns == 1
+    assert dict(supervisor.attempts) == {2: 1}
+
+
+def test_poison_chunk_is_given_up_after_the_maximal_number_of_attempts(tmp_path):
+    chunks = _create_chunks(6)
+    chunks[3] = (3, ("task_3_0", POISON_TASK, "task_3_2"))
+    supervisor, results, failed_chunks = _supervise(tmp_path, chunks, max_chunk_attempts=3)
+
+    expected_results = [task for _, tasks in chunks for task in tasks if task not in (POISON_TASK, "task_3_2")]
+    assert sorted(results) == sorted(expected_results)
+    assert supervisor.number_of_respawns == 3
+    assert len(failed_chunks) == 1
+    assert failed_chunks[0].chunk == (3, (POISON_TASK, "task_3_2"))
+    assert failed_chunks[0].attempts == 3
+    assert failed_chunks[0].exit_codes == [POISON_EXIT_CODE] * 3
+
+
+def test_waiting_chunks_are_the_chunks_not_yet_handed_out(tmp_path):
+    chunks = _create_chunks(10)
+    waiting_chunks = []
+    supervisor, _, _ = _supervise(tmp_path, chunks, waiting_chunks=waiting_chunks)
+
+    # two chunks are assigned to each of the two workers as long as chunks are waiting
+    assert waiting_chunks[0] == len(chunks) - 4
+    assert waiting_chunks == sorted(waiting_chunks, reverse=True)
+    assert waiting_chunks[-1] == 0
+    assert supervisor.get_number_of_waiting_chunks() == 0
+
+
+def test_chunks_are_split_into_recovered_results_and_remaining_tasks():
+    completed_tasks = {(10, 0.5, 1): (3, 0.5), (10, 0.5, 4): (4, 1.5), (10, 0.1, 2): (1, 0.25)}
+
+    assert tce.split_chunk_by_completed_tasks((7, 10, 0.5, (1, 2, 3)), completed_tasks) == \
+        ([(10, 0.5, 1, 3, 0.5)], (7, 10, 0.5, (2, 3)))
+    assert tce.split_chunk_by_completed_tasks((7, 10, 0.5, (1, 4)), completed_tasks) == \
+        ([(10, 0.5, 1, 3, 0.5), (10, 0.5, 4, 4, 1.5)], None)
+
+
+def test_coupled_chunks_keep_the_tasks_completed_by_earlier_executions():
+    completed_tasks = {(10, 0.1, 2): (1, 0.25), (10, 0.5, 2): (3, 0.5), (10, 0.1, 3): (1, 0.25)}
+    chunk = (4, 10, (0.1, 0.5), (2, 3), frozenset({(0.1, 3)}))
+
+    chunk_results, remaining_chunk = tce.split_chunk_by_completed_tasks(chunk, completed_tasks)
+    assert sorted(chunk_results) == [(10, 0.1, 2, 1, 0.25), (10, 0.5, 2, 3, 0.5)]
+    assert remaining_chunk == (4, 10, (0.1, 0.5), (3,), frozenset({(0.1, 2), (0.5, 2), (0.1, 3)}))
+
+
+def test_invalid_number_of_attempts_is_rejected():
+    with pytest.raises(ValueError):
+        worker_supervision.WorkerSupervisor(1, None, None, max_chunk_attempts=0)